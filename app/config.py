@@ -23,15 +23,26 @@ def _getenv_int(key: str, default: int) -> int:
     except Exception:
         return default
 
+def _getenv_choice(key: str, default: str, choices: tuple) -> str:
+    v = os.getenv(key, default).strip()
+    if v not in choices:
+        raise ValueError(f"{key}={v!r} is not one of {', '.join(choices)}")
+    return v
+
 def _getenv_bool(key: str, default: bool) -> bool:
     v = os.getenv(key)
     if v is None:
         return default
     return str(v).strip().lower() in ("1", "true", "yes", "y", "on")
 
+ASR_PROFILES = ("fast", "balanced", "accurate")  # keys of asr.PROFILES
+
 class Settings:
     # Core
     WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "large-v3")
+    # Extra Whisper sizes kept loaded side by side, selectable per request (comma-separated)
+    WHISPER_MODELS: str = os.getenv("WHISPER_MODELS", "")
+    WARMUP_ON_STARTUP: bool = _getenv_bool("WARMUP_ON_STARTUP", True)
     LANGUAGE: str = os.getenv("LANGUAGE", "nl")
     COACH_THRESHOLD: float = _getenv_float("COACH_THRESHOLD", 0.72)
     SAMPLE_RATE: int = _getenv_int("SAMPLE_RATE", 16000)
@@ -43,8 +54,78 @@ class Settings:
     # Logging toggle (NEW)
     LOG_COSINE_SCORES: bool = _getenv_bool("LOG_COSINE_SCORES", False)
 
+    # ASR: "full" decodes the whole file, "voiced" only VAD regions packed into chunks
+    ASR_MODE: str = os.getenv("ASR_MODE", "full")
+    ASR_CHUNK_SEC: float = _getenv_float("ASR_CHUNK_SEC", 30.0)
+    ASR_CHUNK_GAP_SEC: float = _getenv_float("ASR_CHUNK_GAP_SEC", 0.3)
+    ASR_REGION_PAD_SEC: float = _getenv_float("ASR_REGION_PAD_SEC", 0.2)
+    ASR_NUM_WORKERS: int = _getenv_int("ASR_NUM_WORKERS", 1)  # concurrent CTranslate2 decoders
+    ASR_CPU_THREADS: int = _getenv_int("ASR_CPU_THREADS", 0)  # intra-op threads per decoder (0 = cores / concurrency)
+    # Default decoding profile. Every Whisper model is held once per compute type the profiles use:
+    # int8 (fast, balanced) and float32 (accurate) on CPU, so large-v3 costs ~1.5 GB + ~6 GB of RAM.
+    ASR_PROFILE: str = _getenv_choice("ASR_PROFILE", "balanced", ASR_PROFILES)
+
+    # Live streaming (/ws/transcribe)
+    STREAM_MAX_SESSIONS: int = _getenv_int("STREAM_MAX_SESSIONS", 4)
+    STREAM_PARTIAL_SEC: float = _getenv_float("STREAM_PARTIAL_SEC", 2.0)  # 0 disables partial results
+    STREAM_MAX_UTT_SEC: float = _getenv_float("STREAM_MAX_UTT_SEC", 30.0)
+    STREAM_CLUSTER_THRESHOLD: float = _getenv_float("STREAM_CLUSTER_THRESHOLD", 0.6)
+
+    # Speaker embeddings: padded audio per ECAPA forward pass
+    EMBED_MAX_BATCH_SEC: float = _getenv_float("EMBED_MAX_BATCH_SEC", 120.0)
+    EMBED_MAX_BATCH_SIZE: int = _getenv_int("EMBED_MAX_BATCH_SIZE", 64)
+    # Fbank features once per recording, sliced per segment; per-segment ("segment") or
+    # whole-recording ("recording") mean normalisation of the slices
+    EMBED_SHARED_FEATURES: bool = _getenv_bool("EMBED_SHARED_FEATURES", True)
+    EMBED_FEATURE_NORM: str = _getenv_choice("EMBED_FEATURE_NORM", "segment", ("segment", "recording"))
+    # ECAPA runtime: speechbrain | torchscript | onnx | quantized; used only if its embeddings
+    # match the eager model to this cosine, else eager PyTorch is kept
+    EMBED_BACKEND: str = os.getenv("EMBED_BACKEND", "speechbrain")
+    EMBED_PARITY_MIN_COS: float = _getenv_float("EMBED_PARITY_MIN_COS", 0.99)
+
+    # Enrolled-speaker search: top-k matches per segment; IVF index from this many speakers on
+    SPEAKER_TOP_K: int = _getenv_int("SPEAKER_TOP_K", 3)
+    SPEAKER_IVF_MIN_SPEAKERS: int = _getenv_int("SPEAKER_IVF_MIN_SPEAKERS", 4096)
+    SPEAKER_IVF_PROBES: int = _getenv_int("SPEAKER_IVF_PROBES", 8)
+
+    # Non-coach clustering: speaker cap, direct agglomerative up to CLUSTER_DIRECT_MAX segments,
+    # k-means to CLUSTER_CENTROIDS first above that; a cosine distance threshold > 0 estimates the count
+    CLUSTER_MAX_SPEAKERS: int = _getenv_int("CLUSTER_MAX_SPEAKERS", 4)
+    CLUSTER_DIRECT_MAX: int = _getenv_int("CLUSTER_DIRECT_MAX", 1000)
+    CLUSTER_CENTROIDS: int = _getenv_int("CLUSTER_CENTROIDS", 256)
+    CLUSTER_DISTANCE_THRESHOLD: float = _getenv_float("CLUSTER_DISTANCE_THRESHOLD", 0.0)
+
+    # Pipeline execution (CPU-bound stages run off the event loop)
+    PIPELINE_EXECUTOR: str = os.getenv("PIPELINE_EXECUTOR", "thread")  # "thread" | "process"
+    PIPELINE_MAX_CONCURRENCY: int = _getenv_int("PIPELINE_MAX_CONCURRENCY", 2)
+    PIPELINE_WORKERS: int = _getenv_int("PIPELINE_WORKERS", PIPELINE_MAX_CONCURRENCY)
+    PIPELINE_MAX_QUEUE: int = _getenv_int("PIPELINE_MAX_QUEUE", 8)
+    PIPELINE_RETRY_AFTER_SEC: int = _getenv_int("PIPELINE_RETRY_AFTER_SEC", 30)
+    PIPELINE_OVERLOAD_STATUS: int = _getenv_int("PIPELINE_OVERLOAD_STATUS", 503)  # 503 or 429
+
+    # Uploads are spooled to UPLOAD_DIR in chunks; larger ones are rejected with 413 (0 = no limit)
+    MAX_UPLOAD_MB: int = _getenv_int("MAX_UPLOAD_MB", 2048)
+
+    # Artifact cache: VAD segments, embeddings and ASR output per audio content hash (LRU on disk)
+    CACHE_ENABLED: bool = _getenv_bool("CACHE_ENABLED", True)
+    CACHE_MAX_MB: int = _getenv_int("CACHE_MAX_MB", 2048)
+
+    # Stored session intermediates for POST /sessions/{id}/rediarize
+    SESSIONS_ENABLED: bool = _getenv_bool("SESSIONS_ENABLED", True)
+    SESSION_TTL_HOURS: float = _getenv_float("SESSION_TTL_HOURS", 168.0)
+
+    # Async jobs (POST /jobs)
+    JOB_WORKERS: int = _getenv_int("JOB_WORKERS", 1)
+    JOB_POLL_SEC: float = _getenv_float("JOB_POLL_SEC", 2.0)
+    JOB_TTL_HOURS: float = _getenv_float("JOB_TTL_HOURS", 168.0)  # finished jobs kept this long (0 = forever)
+
     # Paths
     SPEAKER_DB_PATH: Path = STORE_DIR / "speaker_db.json"
+    JOBS_DB_PATH: Path = Path(os.getenv("JOBS_DB_PATH", str(STORE_DIR / "jobs.sqlite3")))
+    JOBS_DIR: Path = Path(os.getenv("JOBS_DIR", str(STORE_DIR / "jobs")))
+    UPLOAD_DIR: Path = Path(os.getenv("UPLOAD_DIR", str(STORE_DIR / "uploads")))
+    CACHE_DIR: Path = Path(os.getenv("CACHE_DIR", str(STORE_DIR / "cache")))
+    SESSIONS_DIR: Path = Path(os.getenv("SESSIONS_DIR", str(STORE_DIR / "sessions")))
 
     # Local model roots (must exist for offline-only)
     WHISPER_LOCAL_DIR: Path = Path(os.getenv("WHISPER_LOCAL_DIR", str(MODELS_DIR / "faster-whisper")))
@@ -54,6 +135,18 @@ class Settings:
     def whisper_model_path(self) -> Path:
         return self.WHISPER_LOCAL_DIR / self.WHISPER_MODEL
 
+    @property
+    def whisper_models(self) -> list:
+        names = [self.WHISPER_MODEL]
+        for n in self.WHISPER_MODELS.split(","):
+            n = n.strip()
+            if n and n not in names:
+                names.append(n)
+        return names
+
+    def whisper_path_for(self, name: str) -> Path:
+        return self.WHISPER_LOCAL_DIR / name
+
     @property
     def ecapa_local_path(self) -> Path:
         return self.SB_ECAPA_LOCAL_DIR
@@ -62,5 +155,6 @@ settings = Settings()
 
 # Ensure dirs exist
 STORE_DIR.mkdir(parents=True, exist_ok=True)
+settings.JOBS_DIR.mkdir(parents=True, exist_ok=True)
 (settings.WHISPER_LOCAL_DIR).mkdir(parents=True, exist_ok=True)
 (settings.SB_ECAPA_LOCAL_DIR).mkdir(parents=True, exist_ok=True)
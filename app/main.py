@@ -1,8 +1,15 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from app.routers import health, enroll, transcribe
+from app.routers import health, enroll, transcribe, jobs, stream, sessions, metrics
+from app.config import settings
+from app.services.executor import get_executor, shutdown_executor
+from app.services.uploads import UploadLimitMiddleware
+from app.services import warmup
 
 import logging
 # show INFO from our packages
@@ -11,8 +18,39 @@ logging.getLogger("app").setLevel(logging.INFO)
 logging.getLogger("app.services.diarization").setLevel(logging.INFO)
 
 
-app = FastAPI(title="nidos-transcribe", version="1.0.0")
+async def _warm_up_models():
+    # Runs in the background so /health answers while large models load; /ready reports progress.
+    loop = asyncio.get_running_loop()
+    try:
+        timings = await loop.run_in_executor(get_executor(), warmup.warm_up)
+    except Exception as e:
+        logging.getLogger("app").exception("model warm-up failed")
+        warmup.mark_failed(f"{type(e).__name__}: {e}")
+    else:
+        warmup.mark_ready(timings)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_executor()
+    warm_task = None
+    if settings.WARMUP_ON_STARTUP:
+        warm_task = asyncio.create_task(_warm_up_models())
+    else:
+        warmup.mark_ready()
+    jobs.start_job_workers()
+    yield
+    await jobs.stop_job_workers()
+    if warm_task is not None:
+        warm_task.cancel()
+    shutdown_executor()
+
+
+app = FastAPI(title="nidos-transcribe", version="1.0.0", lifespan=lifespan)
 
+# 413 for oversized uploads before Starlette spools the multipart body to disk (inside CORS,
+# so the rejection still carries CORS headers)
+app.add_middleware(UploadLimitMiddleware, paths=("/transcribe", "/enroll", "/jobs"))
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -25,6 +63,10 @@ app.add_middleware(
 app.include_router(health.router)
 app.include_router(enroll.router)
 app.include_router(transcribe.router)
+app.include_router(jobs.router)
+app.include_router(stream.router)
+app.include_router(sessions.router)
+app.include_router(metrics.router)
 
 # Static demo UI
 app.mount("/web", StaticFiles(directory="web", html=True), name="web")
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from pathlib import Path
 from fastapi import APIRouter, File, Form, UploadFile, HTTPException
 from typing import Optional
 import numpy as np
@@ -8,6 +9,8 @@ from app.config import settings
 from app.services.io_utils import load_audio
 from app.services.vad import detect_voiced_segments
 from app.services.embeddings import embed_segments, mean_pool, save_coach_embedding
+from app.services.executor import StageRunner, Overloaded, admission
+from app.routers.transcribe import overloaded_error, receive_upload
 
 router = APIRouter()
 
@@ -16,12 +19,22 @@ async def enroll_coach(
     file: UploadFile = File(...),
     speaker_name: str = Form("COACH"),
 ):
-    if file.content_type not in ("audio/wav", "audio/x-wav", "audio/wave", "application/octet-stream"):
-        raise HTTPException(status_code=415, detail="Please upload a WAV file.")
-    data = await file.read()
-    wav, sr = load_audio(data, target_sr=settings.SAMPLE_RATE, mono=True)
+    path, _ = await receive_upload(file)
+
+    try:
+        async with admission.slot():
+            return await _enroll(path, speaker_name)
+    except Overloaded as e:
+        raise overloaded_error(e)
+    finally:
+        path.unlink(missing_ok=True)
+
+async def _enroll(path: Path, speaker_name: str) -> EnrollResponse:
+    run = StageRunner()
+    wav, sr = await run.run("decode", load_audio, path, target_sr=settings.SAMPLE_RATE, mono=True)
     duration = len(wav) / sr
-    segments = detect_voiced_segments(
+    segments = await run.run(
+        "vad", detect_voiced_segments,
         wav, sr,
         frame_ms=settings.VAD_FRAME_MS,
         aggressiveness=2,
@@ -30,7 +43,7 @@ async def enroll_coach(
     )
     if not segments:
         raise HTTPException(status_code=400, detail="No voiced segments detected in enrollment audio.")
-    embs = embed_segments(wav, sr, segments)
+    embs = await run.run("embedding", embed_segments, wav, sr, segments)
     coach_emb = mean_pool(embs)
 
     save_coach_embedding(coach_emb, sr=sr, name=speaker_name, duration=duration)
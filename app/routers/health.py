@@ -1,8 +1,20 @@
-from fastapi import APIRouter
-from app.schemas import HealthResponse
+from fastapi import APIRouter, Response
+from app.schemas import HealthResponse, ReadyResponse
+from app.services import warmup
 
 router = APIRouter()
 
 @router.get("/health", response_model=HealthResponse)
 def health():
     return HealthResponse(status="ok")
+
+@router.get("/ready", response_model=ReadyResponse)
+def ready(response: Response):
+    state = warmup.readiness()
+    if not state["ready"]:
+        response.status_code = 503
+    if state["ready"]:
+        status = "ready"
+    else:
+        status = "failed" if state["error"] else "starting"  # a crashed load is not a slow one
+    return ReadyResponse(status=status, **state)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException
+
+from app.schemas import JobStatus, TranscribeResponse
+from app.config import settings
+from app.services.executor import admission
+from app.services.jobs import DONE, FAILED, get_job_store
+from app.routers.transcribe import run_pipeline, validate_options, parse_coach_ids, receive_upload
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+_workers: List[asyncio.Task] = []
+_wakeup: Optional[asyncio.Event] = None
+# Progress writes go to SQLite off the event loop; one thread keeps them in order
+_progress_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="job-progress")
+
+def _status(job: dict) -> JobStatus:
+    return JobStatus(
+        job_id=job["id"],
+        status=job["status"],
+        stage=job.get("stage"),
+        progress=float(job.get("progress") or 0.0),
+        error=job.get("error"),
+        created_at=float(job["created_at"]),
+        updated_at=float(job["updated_at"]),
+    )
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def create_job(
+    file: UploadFile = File(...),
+    language: str = Form(default=settings.LANGUAGE),
+    coach_threshold: float = Form(default=settings.COACH_THRESHOLD),
+    max_speakers: int = Form(default=2),
+    use_word_timestamps: bool = Form(default=True),
+    asr_mode: str = Form(default=settings.ASR_MODE),
+    model: Optional[str] = Form(default=None),
+    coach_ids: Optional[str] = Form(default=None),
+    top_k: int = Form(default=settings.SPEAKER_TOP_K),
+    profile: Optional[str] = Form(default=None),
+):
+    validate_options(asr_mode, model, profile)
+    coaches = parse_coach_ids(coach_ids, top_k)
+    job_id = str(uuid.uuid4())
+    audio_path, digest = await receive_upload(file, settings.JOBS_DIR / f"{job_id}.wav")
+
+    store = get_job_store()
+    await asyncio.to_thread(
+        store.create,
+        params={
+            "language": language,
+            "coach_threshold": float(coach_threshold),
+            "max_speakers": int(max_speakers),
+            "use_word_timestamps": bool(use_word_timestamps),
+            "asr_mode": asr_mode,
+            "model": model,
+            "profile": profile,
+            "coach_ids": coaches,
+            "top_k": int(top_k),
+            "audio_hash": digest,
+        },
+        audio_path=audio_path,
+        job_id=job_id,
+    )
+    if _wakeup is not None:
+        _wakeup.set()
+    return _status(await asyncio.to_thread(store.get, job_id))
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    return _status(job)
+
+@router.get("/jobs/{job_id}/result", response_model=TranscribeResponse)
+def get_job_result(job_id: str):
+    job = get_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id.")
+    if job["status"] == FAILED:
+        raise HTTPException(status_code=409, detail=f"Job failed: {job.get('error')}")
+    if job["status"] != DONE or not job.get("result"):
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}.")
+    return TranscribeResponse.model_validate_json(job["result"])
+
+# -------- Worker loop --------
+
+async def _process(job: dict) -> None:
+    store = get_job_store()
+    params = job["params"]
+    audio_path = Path(job["audio_path"])
+    loop = asyncio.get_running_loop()
+    pending: List[asyncio.Future] = []
+
+    def progress(stage: str, frac: float) -> None:
+        pending.append(loop.run_in_executor(_progress_pool, store.update_progress, job["id"], stage, frac))
+
+    try:
+        async with admission.slot(bounded=False) as queue_sec:
+            resp = await run_pipeline(
+                audio_path,
+                language=params["language"],
+                coach_threshold=params["coach_threshold"],
+                max_speakers=params["max_speakers"],
+                use_word_timestamps=params["use_word_timestamps"],
+                asr_mode=params.get("asr_mode", settings.ASR_MODE),
+                model_name=params.get("model"),
+                queue_sec=queue_sec,
+                progress=progress,
+                session_id=job["id"],
+                coach_ids=params.get("coach_ids"),
+                top_k=params.get("top_k", settings.SPEAKER_TOP_K),
+                audio_hash=params.get("audio_hash"),
+                profile=params.get("profile"),
+            )
+        await asyncio.gather(*pending, return_exceptions=True)
+        await asyncio.to_thread(store.complete, job["id"], resp.model_dump_json())
+    except asyncio.CancelledError:
+        # shutting down: leave it 'running' (audio included) so requeue_interrupted() picks it up on restart
+        raise
+    except Exception as e:
+        logger.exception("job %s failed", job["id"])
+        await asyncio.gather(*pending, return_exceptions=True)
+        await asyncio.to_thread(store.fail, job["id"], f"{type(e).__name__}: {e}")
+    # done or failed: the job will not run again, so its audio is not needed
+    audio_path.unlink(missing_ok=True)
+
+async def _worker_loop() -> None:
+    store = get_job_store()
+    while True:
+        job = await asyncio.to_thread(store.claim_next)
+        if job is None:
+            _wakeup.clear()
+            try:
+                await asyncio.wait_for(_wakeup.wait(), timeout=settings.JOB_POLL_SEC)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await _process(job)
+
+def start_job_workers() -> None:
+    global _wakeup
+    _wakeup = asyncio.Event()
+    requeued = get_job_store().requeue_interrupted()
+    if requeued:
+        logger.info("re-queued %d interrupted job(s)", requeued)
+    for _ in range(max(0, settings.JOB_WORKERS)):
+        _workers.append(asyncio.create_task(_worker_loop()))
+
+async def stop_job_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,57 @@
+from __future__ import annotations
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException
+
+from app.schemas import TranscribeResponse, RediarizeRequest
+from app.services import metrics
+from app.services.asr import model_name_display
+from app.services.executor import StageRunner, Overloaded, admission
+from app.services.sessions import get_session_store
+from app.routers.transcribe import diarize_and_align, check_coach_ids, overloaded_error, pipeline_metrics
+
+router = APIRouter()
+
+@router.post("/sessions/{session_id}/rediarize", response_model=TranscribeResponse)
+async def rediarize(session_id: str, req: RediarizeRequest):
+    """
+    Re-label a transcribed session with a new coach threshold, speaker count or coach
+    selection. Only identification, diarization and alignment run again.
+    """
+    coaches = check_coach_ids(req.coach_ids, req.top_k)
+    session = await asyncio.to_thread(get_session_store().load, session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired session id.")
+    meta = session["meta"]
+
+    t0 = time.perf_counter()
+    run = StageRunner()
+    try:
+        async with admission.slot() as queue_sec:
+            speakers, utterances, diar_segments, diar_stats = await diarize_and_align(
+                run, session["segments"], session["embs"], session["asr_segments"],
+                coach_threshold=req.coach_threshold,
+                max_speakers=req.max_speakers,
+                coach_ids=coaches,
+                top_k=req.top_k,
+            )
+    except Overloaded as e:
+        raise overloaded_error(e)
+    metrics.observe_rediarization()
+
+    return TranscribeResponse(
+        session_id=session_id,
+        language=meta.get("language", ""),
+        speakers=speakers,
+        utterances=utterances,
+        metrics=pipeline_metrics(
+            run, time.perf_counter() - t0, float(meta.get("audio_sec", 0.0)), len(session["segments"]),
+            utterances, diar_stats,
+            model=model_name_display(meta.get("model")),
+            queue_sec=queue_sec,
+            profile=meta.get("profile"),
+            observe=False,
+        ),
+        segments=diar_segments,
+    )
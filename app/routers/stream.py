@@ -0,0 +1,215 @@
+from __future__ import annotations
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.schemas import StreamConfig
+from app.config import settings
+from app.services.vad import StreamingVad
+from app.services.embeddings import embed_signal
+from app.services.diarization import OnlineSpeakerClusterer, SpeakerMatches, match_speakers
+from app.services.speaker_store import get_speaker_store
+from app.services.asr import transcribe as asr_transcribe, available_models
+from app.services.executor import admission, get_executor
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+STREAM_SR = 16000  # webrtcvad and Whisper both run at 16 kHz; the client resamples
+
+_active_sessions = 0
+
+def _pcm_to_float(pcm: np.ndarray) -> np.ndarray:
+    return pcm.astype(np.float32) * (1.0 / 32768.0)
+
+def _finalise_region(pcm: np.ndarray, cfg: StreamConfig) -> Tuple[np.ndarray, SpeakerMatches, List[Dict]]:
+    wav = _pcm_to_float(pcm)
+    emb = embed_signal(wav, STREAM_SR)
+    found = match_speakers([emb], top_k=cfg.top_k, coach_ids=cfg.coach_ids)
+    segs = asr_transcribe(wav, language=cfg.language, word_timestamps=cfg.use_word_timestamps, sr=STREAM_SR,
+                          model_name=cfg.model)
+    return emb, found, segs
+
+def _partial_text(pcm: np.ndarray, language: str, model_name: Optional[str]) -> str:
+    segs = asr_transcribe(_pcm_to_float(pcm), language=language, word_timestamps=False, sr=STREAM_SR, model_name=model_name)
+    return " ".join(s["text"] for s in segs).strip()
+
+class _LiveSession:
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.cfg = StreamConfig()
+        self.vad = StreamingVad(
+            sr=STREAM_SR,
+            frame_ms=settings.VAD_FRAME_MS,
+            aggressiveness=2,
+            min_seg_dur=settings.MIN_SEG_DUR,
+            merge_gap=settings.MERGE_GAP,
+            max_region_sec=settings.STREAM_MAX_UTT_SEC,
+        )
+        self.clusterer: Optional[OnlineSpeakerClusterer] = None
+        self.regions: asyncio.Queue = asyncio.Queue()
+        self._send_lock = asyncio.Lock()
+        self._partial: Optional[asyncio.Task] = None
+        self._partial_upto = 0.0
+
+    async def send(self, msg: Dict) -> None:
+        async with self._send_lock:
+            await self.ws.send_json(msg)
+
+    def configure(self, data: Dict) -> None:
+        self.cfg = StreamConfig(**{**self.cfg.model_dump(), **data})
+        if self.cfg.model and self.cfg.model not in available_models():
+            raise ValueError(f"model must be one of {', '.join(available_models())}")
+        if self.cfg.top_k < 1:
+            raise ValueError("top_k must be at least 1")
+        if self.cfg.coach_ids:
+            enrolled = set(get_speaker_store().names())
+            unknown = [n for n in self.cfg.coach_ids if n not in enrolled]
+            if unknown:
+                raise ValueError(f"unknown coach_ids: {', '.join(unknown)}")
+
+    async def start(self) -> None:
+        # Regions are scored against the enrolled coaches with match_speakers(), as in /transcribe
+        self.clusterer = OnlineSpeakerClusterer(
+            None,
+            coach_thr=self.cfg.coach_threshold,
+            cluster_thr=settings.STREAM_CLUSTER_THRESHOLD,
+            max_speakers=self.cfg.max_speakers,
+        )
+        enrolled = bool(self.cfg.coach_ids) or len(get_speaker_store().index()) > 0
+        await self.send({"type": "ready", "sample_rate": STREAM_SR, "coach_enrolled": enrolled})
+
+    def feed(self, pcm_bytes: bytes) -> None:
+        for region in self.vad.push(pcm_bytes):
+            self.regions.put_nowait(region)
+            self._partial_upto = 0.0
+        self._maybe_partial()
+
+    def _maybe_partial(self) -> None:
+        if settings.STREAM_PARTIAL_SEC <= 0:
+            return
+        cur = self.vad.current_region()
+        if cur is None or (self._partial is not None and not self._partial.done()):
+            return
+        t0, t1, pcm = cur
+        if (t1 - t0) - self._partial_upto < settings.STREAM_PARTIAL_SEC:
+            return
+        self._partial_upto = t1 - t0
+        self._partial = asyncio.create_task(self._send_partial(t0, t1, pcm))
+
+    async def _send_partial(self, t0: float, t1: float, pcm: np.ndarray) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            # live inference shares the pipeline slots, so streams cannot oversubscribe the cores
+            async with admission.slot(bounded=False):
+                text = await loop.run_in_executor(get_executor(), _partial_text, pcm, self.cfg.language, self.cfg.model)
+        except Exception:
+            logger.exception("partial transcription failed")
+            return
+        await self.send({"type": "partial", "start": t0, "end": t1, "text": text})
+
+    async def finalise_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            region = await self.regions.get()
+            if region is None:
+                return
+            t0, t1, pcm = region
+            try:
+                async with admission.slot(bounded=False):
+                    emb, found, segs = await loop.run_in_executor(get_executor(), _finalise_region, pcm, self.cfg)
+            except Exception as e:
+                logger.exception("live region %.2f–%.2f failed", t0, t1)
+                await self.send({"type": "error", "detail": f"{type(e).__name__}: {e}"})
+                return
+            coach_score = None if found.coach_scores is None else float(found.coach_scores[0])
+            cluster = self.clusterer.assign(emb, duration=t1 - t0, coach_score=coach_score)
+            speaker = self.clusterer.label_for(cluster)
+            words = [
+                {"w": w["word"], "start": t0 + w["start"], "end": t0 + w["end"], "speaker": speaker}
+                for s in segs for w in s.get("words", [])
+            ]
+            text = " ".join(s["text"] for s in segs).strip()
+            if not text:
+                continue
+            await self.send({
+                "type": "final",
+                "cluster": cluster,
+                "matches": [{"name": n, "score": v} for n, v in found.matches[0]],
+                "utterance": {"start": t0, "end": t1, "speaker": speaker, "text": text, "words": words},
+            })
+
+    async def close(self) -> None:
+        if self._partial is not None:
+            self._partial.cancel()
+        for region in self.vad.flush():
+            self.regions.put_nowait(region)
+        self.regions.put_nowait(None)
+
+@router.websocket("/ws/transcribe")
+async def ws_transcribe(ws: WebSocket):
+    """
+    Live transcription. Protocol:
+      client → optional text {"type": "config", ...StreamConfig}, then binary frames of
+               16 kHz mono little-endian int16 PCM, then text {"type": "stop"}
+      server → {"type": "ready"}, {"type": "partial", start, end, text} while a voiced region
+               is open, {"type": "final", utterance, matches} when it closes (matches: top-k
+               enrolled coaches for the region), {"type": "done"} at the end
+    """
+    global _active_sessions
+    await ws.accept()
+    if _active_sessions >= settings.STREAM_MAX_SESSIONS:
+        await ws.close(code=1013, reason="Too many live sessions, retry later.")
+        return
+    _active_sessions += 1
+
+    session = _LiveSession(ws)
+    consumer: Optional[asyncio.Task] = None
+    try:
+        while True:
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(msg.get("code", 1000))
+            if msg.get("bytes") is not None:
+                if consumer is None:
+                    await session.start()
+                    consumer = asyncio.create_task(session.finalise_loop())
+                session.feed(msg["bytes"])
+                continue
+            try:
+                data = json.loads(msg.get("text") or "{}")
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                await ws.close(code=1003, reason="Text frames must be JSON objects.")
+                return
+            kind = data.get("type")
+            if kind == "config" and consumer is None:
+                try:
+                    session.configure(data)
+                except (ValidationError, ValueError) as e:
+                    await ws.close(code=1003, reason=str(e)[:120])
+                    return
+            elif kind == "stop":
+                break
+
+        if consumer is None:
+            await session.start()
+            consumer = asyncio.create_task(session.finalise_loop())
+        await session.close()
+        await consumer
+        await session.send({"type": "done"})
+        await ws.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # on disconnect or an early close, stop the region consumer too
+        if consumer is not None and not consumer.done():
+            consumer.cancel()
+        _active_sessions -= 1
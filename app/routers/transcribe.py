@@ -1,102 +1,374 @@
 from __future__ import annotations
+import asyncio
+import time
 import uuid
 from fastapi import APIRouter, File, Form, UploadFile, HTTPException
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
 
-from app.schemas import TranscribeResponse, Speaker, Utterance, Metrics
+from app.schemas import TranscribeResponse, Speaker, Utterance, Word, Metrics, StageMetrics, DiarizationMetrics, DiarSegment, SpeakerMatch
 from app.config import settings
-from app.services.io_utils import load_audio, save_temp_wav
+from app.services.io_utils import audio_duration, load_audio, load_audio_mmap
 from app.services.vad import detect_voiced_segments
-from app.services.embeddings import embed_segments, load_coach_embedding
-from app.services.diarization import diarize
-from app.services.asr import transcribe as asr_transcribe, model_name_display
-from app.services.align import assign_speakers_to_words
+from app.services.embeddings import active_backend, embed_segments
+from app.services.diarization import diarize_with_stats, match_speakers, dominant_coach
+from app.services.speaker_store import get_speaker_store
+from app.services.asr import PROFILES, transcribe as asr_transcribe, transcribe_voiced, model_name_display, available_models, get_profile
+from app.services.align import AlignedUtterance, align_utterances
+from app.services.sessions import get_session_store
+from app.services.uploads import UploadTooLarge, spool_upload, file_key
+from app.services.cache import audio_key, params_key, get_artifact_cache
+from app.services.executor import StageRunner, Overloaded, admission, get_executor
+from app.services import metrics
 from app.utils import stopwatch
 
 router = APIRouter()
 
-@router.post("/transcribe", response_model=TranscribeResponse)
-async def transcribe_endpoint(
-    file: UploadFile = File(...),
-    language: str = Form(default=settings.LANGUAGE),
-    coach_threshold: float = Form(default=settings.COACH_THRESHOLD),
-    max_speakers: int = Form(default=2),
-    use_word_timestamps: bool = Form(default=True),
-):
-    if file.content_type not in ("audio/wav", "audio/x-wav", "audio/wave", "application/octet-stream"):
-        raise HTTPException(status_code=415, detail="Please upload a WAV file.")
-    data = await file.read()
+ASR_MODES = ("full", "voiced")
 
-    with stopwatch() as t0:
-        # Load audio (ensure mono/16k)
-        wav, sr = load_audio(data, target_sr=settings.SAMPLE_RATE, mono=True)
+# Fraction of the pipeline completed after each stage (ASR dominates wall time)
+STAGE_PROGRESS = {
+    "decode": 0.05,
+    "vad": 0.10,
+    "embedding": 0.25,
+    "asr": 0.90,
+    "identification": 0.92,
+    "diarization": 0.95,
+    "alignment": 1.0,
+}
+
+def build_utterances(aligned: List[AlignedUtterance]) -> List[Utterance]:
+    """Response models from the aligned records."""
+    return [
+        Utterance(
+            start=u.start, end=u.end, speaker=u.speaker, text=u.text,
+            words=[Word(w=w.w, start=w.start, end=w.end, speaker=w.speaker) for w in u.words],
+        )
+        for u in aligned
+    ]
+
+async def run_pipeline(
+    data: Union[bytes, Path],
+    language: str,
+    coach_threshold: float,
+    max_speakers: int,
+    use_word_timestamps: bool,
+    asr_mode: str = settings.ASR_MODE,
+    model_name: Optional[str] = None,
+    queue_sec: float = 0.0,
+    progress: Optional[Callable[[str, float], None]] = None,
+    session_id: Optional[str] = None,
+    coach_ids: Optional[List[str]] = None,
+    top_k: int = settings.SPEAKER_TOP_K,
+    audio_hash: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> TranscribeResponse:
+    """
+    Full transcription pipeline. CPU-bound stages are dispatched to the
+    pipeline executor so the event loop stays responsive.
+    progress(stage, fraction) is called after each stage when given.
+    VAD segments, embeddings and ASR output are reused from the artifact cache
+    for uploads with the same content (audio_hash, or the SHA-256 of data).
+    data is the uploaded file's bytes or, preferably, the path it was spooled to.
+    profile names the ASR decoding profile (default ASR_PROFILE).
+    """
+    on_stage = (lambda name: progress(name, STAGE_PROGRESS.get(name, 0.0))) if progress else None
+    run = StageRunner(on_stage=on_stage)
 
-        # VAD → segments
-        segments = detect_voiced_segments(
-            wav, sr,
+    cache = get_artifact_cache()
+    if audio_hash is None and cache is not None:
+        audio_hash = await asyncio.to_thread(file_key if isinstance(data, Path) else audio_key, data)
+    key = audio_hash
+    decoded = None
+
+    async def audio():
+        # decode lazily: when every artifact is cached the upload is never decoded
+        nonlocal decoded
+        if decoded is None:
+            if isinstance(data, Path):
+                # spooled file: 16 kHz mono PCM is memory-mapped instead of decoded
+                decoded = await run.run("decode", load_audio_mmap, data, target_sr=settings.SAMPLE_RATE)
+            else:
+                decoded = await run.run("decode", load_audio, data, target_sr=settings.SAMPLE_RATE, mono=True)
+        return decoded
+
+    async def cached(stage: str, kind: str, name: str):
+        if cache is None:
+            return None
+        hit = await asyncio.to_thread(getattr(cache, f"get_{kind}"), key, name)
+        if hit is not None:
+            run.skip(stage)
+        return hit
+
+    async def remember(kind: str, name: str, value) -> None:
+        if cache is not None:
+            await asyncio.to_thread(getattr(cache, f"put_{kind}"), key, name, value)
+
+    with stopwatch() as t0:
+        # VAD → segments (on mono/16k audio)
+        vad_params = dict(
             frame_ms=settings.VAD_FRAME_MS,
             aggressiveness=2,
             min_seg_dur=settings.MIN_SEG_DUR,
             merge_gap=settings.MERGE_GAP,
         )
+        vad_name = params_key("vad", {**vad_params, "sr": settings.SAMPLE_RATE})
+        segments = await cached("vad", "json", vad_name)
+        if segments is None:
+            wav, sr = await audio()
+            segments = await run.run("vad", detect_voiced_segments, wav, sr, **vad_params)
+            await remember("json", vad_name, segments)
+        segments = [(float(a), float(b)) for a, b in segments]
+
+        # Embeddings for segments, keyed on the runtime in use (a failed backend falls back to eager),
+        # as seen by the executor that will compute them
+        backend = await asyncio.get_running_loop().run_in_executor(get_executor(), active_backend)
+        emb_name = params_key("emb", {"vad": vad_name, "shared_features": settings.EMBED_SHARED_FEATURES,
+                                      "feature_norm": settings.EMBED_FEATURE_NORM, "backend": backend})
+        emb_matrix = await cached("embedding", "array", emb_name)
+        if emb_matrix is not None:
+            embs = list(emb_matrix)
+        else:
+            wav, sr = await audio()
+            embs = await run.run("embedding", embed_segments, wav, sr, segments)
+            await remember("array", emb_name, np.vstack(embs) if embs else np.zeros((0, 0), dtype=np.float32))
 
-        # Embeddings for segments
-        embs = embed_segments(wav, sr, segments)
+        # Run ASR (Faster-Whisper) on the already-decoded waveform
+        prof = get_profile(profile)
+        asr_params = {
+            "profile": prof._asdict(),
+            "model": model_name or settings.WHISPER_MODEL,
+            "language": language,
+            "word_timestamps": bool(use_word_timestamps),
+            "mode": asr_mode,
+        }
+        if asr_mode == "voiced":
+            asr_params.update(vad=vad_name, chunk_sec=settings.ASR_CHUNK_SEC,
+                              gap_sec=settings.ASR_CHUNK_GAP_SEC, pad_sec=settings.ASR_REGION_PAD_SEC)
+        asr_name = params_key("asr", asr_params)
+        asr_segments = await cached("asr", "json", asr_name)
+        if asr_segments is None:
+            wav, sr = await audio()
+            if asr_mode == "voiced":
+                asr_segments = await run.run(
+                    "asr", transcribe_voiced,
+                    wav, sr, segments,
+                    language=language,
+                    word_timestamps=bool(use_word_timestamps),
+                    model_name=model_name,
+                    profile=prof.name,
+                )
+            else:
+                asr_segments = await run.run(
+                    "asr", asr_transcribe,
+                    audio=wav,
+                    language=language,
+                    word_timestamps=bool(use_word_timestamps),
+                    sr=sr,
+                    model_name=model_name,
+                    profile=prof.name,
+                )
+            await remember("json", asr_name, asr_segments)
 
-        # Load coach embedding, diarize with constrained labeling
-        coach_emb = load_coach_embedding("COACH")
-        diar = diarize(
-            segments=segments,
-            embs=embs,
-            coach_emb=coach_emb,
-            thr=coach_threshold,
+        speakers, utterances, diar_segments, diar_stats = await diarize_and_align(
+            run, segments, embs, asr_segments,
+            coach_threshold=coach_threshold,
             max_speakers=max_speakers,
+            coach_ids=coach_ids,
+            top_k=top_k,
         )
+        if decoded is not None:
+            audio_sec = len(decoded[0]) / float(decoded[1])
+        else:
+            audio_sec = await asyncio.to_thread(audio_duration, data)
+        session_id = session_id or str(uuid.uuid4())
+        if settings.SESSIONS_ENABLED:
+            meta = {
+                "language": language,
+                "model": model_name,
+                "asr_mode": asr_mode,
+                "profile": prof.name,
+                "use_word_timestamps": bool(use_word_timestamps),
+                "audio_sec": audio_sec,
+            }
+            await asyncio.to_thread(get_session_store().save, session_id, segments, embs, asr_segments, meta)
 
-        # Run ASR (Faster-Whisper). Use a temp WAV path (more efficient).
-        tmp = save_temp_wav(data)
-        try:
-            asr_segments = asr_transcribe(
-                audio_path=str(tmp),
-                language=language,
-                word_timestamps=bool(use_word_timestamps),
-            )
-        finally:
-            try:
-                tmp.unlink(missing_ok=True)
-            except Exception:
-                pass
-
-        # Align diarization to ASR words/segments
-        utterances_dicts = assign_speakers_to_words(
-            diar_segments=diar,
-            whisper_segments=asr_segments,
-            merge_gap=settings.MERGE_GAP,
-            min_turn_dur=settings.MIN_SEG_DUR,
+        processing_sec = float(time.perf_counter() - t0)
+
+        return TranscribeResponse(
+            session_id=session_id,
+            language=language,
+            speakers=speakers,
+            utterances=utterances,
+            metrics=pipeline_metrics(
+                run, processing_sec, audio_sec, len(segments), utterances, diar_stats,
+                model=model_name_display(model_name),
+                queue_sec=queue_sec,
+                profile=prof.name,
+            ),
+            segments=diar_segments,
         )
 
-        # Build response
-        utterances = [
-            Utterance(
-                start=u["start"], end=u["end"], speaker=u["speaker"], text=u["text"],
-                words=[{"w": w["w"], "start": w["start"], "end": w["end"], "speaker": w["speaker"]} for w in u.get("words", [])]
-            )
-            for u in utterances_dicts
-        ]
+def pipeline_metrics(
+    run: StageRunner,
+    processing_sec: float,
+    audio_sec: float,
+    n_segments: int,
+    utterances: List[Utterance],
+    diar_stats: Dict,
+    model: str,
+    queue_sec: float = 0.0,
+    profile: Optional[str] = None,
+    observe: bool = True,
+) -> Metrics:
+    """
+    Response metrics for one run. With observe (the default) it also feeds the /metrics
+    pipeline series; re-runs over a stored session pass observe=False so the same audio
+    is not counted as a new transcription.
+    """
+    n_words = sum(len(u.words) or len(u.text.split()) for u in utterances)
+    if observe:
+        metrics.observe_pipeline(processing_sec, audio_sec, n_segments, n_words)
+    return Metrics(
+        processing_sec=processing_sec,
+        model=model,
+        profile=profile,
+        queue_sec=float(queue_sec),
+        stages=[StageMetrics(**s) for s in run.stages],
+        diarization=DiarizationMetrics(**diar_stats),
+        audio_sec=audio_sec,
+        rtf=processing_sec / audio_sec if audio_sec > 0 else None,
+        n_segments=n_segments,
+        n_words=n_words,
+    )
+
+async def diarize_and_align(
+    run: StageRunner,
+    segments: List[Tuple[float, float]],
+    embs: List[np.ndarray],
+    asr_segments: List[Dict],
+    coach_threshold: float,
+    max_speakers: int,
+    coach_ids: Optional[List[str]] = None,
+    top_k: int = settings.SPEAKER_TOP_K,
+) -> Tuple[List[Speaker], List[Utterance], Optional[List[DiarSegment]], Dict]:
+    """
+    Everything after ASR: coach identification, diarization and alignment.
+    Shared by the full pipeline and re-diarization of a stored session.
+    """
+    # Match segments against the enrolled coaches, diarize with constrained labeling
+    found = await run.run("identification", match_speakers, embs, top_k=top_k, coach_ids=coach_ids)
+    diar, diar_stats = await run.run(
+        "diarization", diarize_with_stats,
+        segments=segments,
+        embs=embs,
+        coach_emb=None,
+        thr=coach_threshold,
+        max_speakers=max_speakers,
+        coach_scores=found.coach_scores,
+    )
+
+    # Align diarization to ASR words/segments
+    aligned = await run.run(
+        "alignment", align_utterances,
+        diar_segments=diar,
+        whisper_segments=asr_segments,
+        merge_gap=settings.MERGE_GAP,
+        min_turn_dur=settings.MIN_SEG_DUR,
+    )
 
-        # Speakers list: keep COACH and JONGERE for UI
-        speakers = [
-            Speaker(id="COACH", display="Coach"),
-            Speaker(id="JONGERE", display="Jongere"),
+    # Build response
+    utterances = build_utterances(aligned)
+
+    # Speakers list: keep COACH and JONGERE for UI; name the coach when one enrolled voice dominates
+    coach_name = dominant_coach(segments, [lab for _, _, lab in diar], found.best_names())
+    speakers = [
+        Speaker(id="COACH", display=coach_name if coach_name and coach_name != "COACH" else "Coach"),
+        Speaker(id="JONGERE", display="Jongere"),
+    ]
+    diar_segments = None
+    if found.coach_scores is not None:
+        diar_segments = [
+            DiarSegment(start=a, end=b, speaker=lab, matches=[SpeakerMatch(name=n, score=v) for n, v in m])
+            for (a, b, lab), m in zip(diar, found.matches)
         ]
+    return speakers, utterances, diar_segments, diar_stats
 
-        processing_sec = float(__import__("time").time() - t0)
+def validate_options(asr_mode: str, model: Optional[str], profile: Optional[str] = None) -> None:
+    if asr_mode not in ASR_MODES:
+        raise HTTPException(status_code=422, detail=f"asr_mode must be one of {', '.join(ASR_MODES)}.")
+    if model and model not in available_models():
+        raise HTTPException(status_code=422, detail=f"model must be one of {', '.join(available_models())}.")
+    if profile and profile not in PROFILES:
+        raise HTTPException(status_code=422, detail=f"profile must be one of {', '.join(PROFILES)}.")
 
-        resp = TranscribeResponse(
-            session_id=str(uuid.uuid4()),
-            language=language,
-            speakers=speakers,
-            utterances=utterances,
-            metrics=Metrics(processing_sec=processing_sec, model=model_name_display()),
-        )
-        return resp
+def parse_coach_ids(coach_ids: Optional[str], top_k: int) -> Optional[List[str]]:
+    """Comma-separated enrolled names → list (None = every enrolled speaker)."""
+    names = [n.strip() for n in coach_ids.split(",") if n.strip()] if coach_ids else None
+    return check_coach_ids(names, top_k)
+
+def check_coach_ids(names: Optional[List[str]], top_k: int) -> Optional[List[str]]:
+    if top_k < 1:
+        raise HTTPException(status_code=422, detail="top_k must be at least 1.")
+    if not names:
+        return None
+    enrolled = set(get_speaker_store().names())
+    unknown = [n for n in names if n not in enrolled]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown coach_ids: {', '.join(unknown)}.")
+    return names
+
+async def receive_upload(file: UploadFile, dest: Optional[Path] = None) -> Tuple[Path, str]:
+    """Spools a WAV upload to disk (415/413 on bad type or size); returns (path, sha256)."""
+    if file.content_type not in ("audio/wav", "audio/x-wav", "audio/wave", "application/octet-stream"):
+        raise HTTPException(status_code=415, detail="Please upload a WAV file.")
+    try:
+        return await spool_upload(file, dest)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+def overloaded_error(exc: Overloaded) -> HTTPException:
+    return HTTPException(
+        status_code=settings.PIPELINE_OVERLOAD_STATUS,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@router.post("/transcribe", response_model=TranscribeResponse)
+async def transcribe_endpoint(
+    file: UploadFile = File(...),
+    language: str = Form(default=settings.LANGUAGE),
+    coach_threshold: float = Form(default=settings.COACH_THRESHOLD),
+    max_speakers: int = Form(default=2),
+    use_word_timestamps: bool = Form(default=True),
+    asr_mode: str = Form(default=settings.ASR_MODE),
+    model: Optional[str] = Form(default=None),
+    coach_ids: Optional[str] = Form(default=None, description="Comma-separated enrolled coaches to match against (default: all)"),
+    top_k: int = Form(default=settings.SPEAKER_TOP_K),
+    profile: Optional[str] = Form(default=None, description="ASR decoding profile: fast | balanced | accurate"),
+):
+    validate_options(asr_mode, model, profile)
+    coaches = parse_coach_ids(coach_ids, top_k)
+    path, digest = await receive_upload(file)
+
+    try:
+        async with admission.slot() as queue_sec:
+            return await run_pipeline(
+                path,
+                language=language,
+                coach_threshold=coach_threshold,
+                max_speakers=max_speakers,
+                use_word_timestamps=use_word_timestamps,
+                asr_mode=asr_mode,
+                model_name=model,
+                queue_sec=queue_sec,
+                coach_ids=coaches,
+                top_k=top_k,
+                audio_hash=digest,
+                profile=profile,
+            )
+    except Overloaded as e:
+        raise overloaded_error(e)
+    finally:
+        path.unlink(missing_ok=True)
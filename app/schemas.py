@@ -1,9 +1,18 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, Field
 
+from app.config import settings
+
 class HealthResponse(BaseModel):
     status: str = "ok"
 
+class ReadyResponse(BaseModel):
+    status: str = Field("ready", description="ready | starting | failed")
+    ready: bool = True
+    error: Optional[str] = None
+    models: List[str] = []
+    warmup_sec: Dict[str, float] = {}
+
 class EnrollResponse(BaseModel):
     speaker: str
     duration_sec: float
@@ -27,13 +36,71 @@ class Speaker(BaseModel):
     id: str
     display: str
 
+class SpeakerMatch(BaseModel):
+    name: str
+    score: float = Field(..., description="Cosine similarity to the enrolled voice")
+
+class DiarSegment(BaseModel):
+    start: float
+    end: float
+    speaker: str
+    matches: List[SpeakerMatch] = Field([], description="Top-k enrolled speakers, best first")
+
+class StageMetrics(BaseModel):
+    name: str
+    queue_sec: float = Field(0.0, description="Time spent waiting for a pipeline worker")
+    run_sec: float = Field(0.0, description="Time spent running the stage")
+    cached: bool = Field(False, description="Result served from the artifact cache")
+
+class DiarizationMetrics(BaseModel):
+    method: str = Field(..., description="none | single | agglomerative | kmeans+agglomerative")
+    n_clustered: int = Field(0, description="Non-coach segments clustered")
+    n_clusters: int = 0
+    peak_mem_mb: float = Field(0.0, description="Working set of the clustering matrices (distance matrix, k-means buffers)")
+
 class Metrics(BaseModel):
     processing_sec: float
     model: str
+    profile: Optional[str] = Field(None, description="ASR decoding profile")
+    queue_sec: float = Field(0.0, description="Time spent waiting for a pipeline slot")
+    stages: List[StageMetrics] = []
+    diarization: Optional[DiarizationMetrics] = None
+    audio_sec: float = Field(0.0, description="Duration of the input audio")
+    rtf: Optional[float] = Field(None, description="Real-time factor: processing_sec / audio_sec")
+    n_segments: int = Field(0, description="Voiced segments diarized")
+    n_words: int = Field(0, description="Words in the transcript")
 
 class TranscribeResponse(BaseModel):
     session_id: str
     language: str
     speakers: List[Speaker]
     utterances: List[Utterance]
-    metrics: Metrics
\ No newline at end of file
+    metrics: Metrics
+    segments: Optional[List[DiarSegment]] = Field(None, description="Diarization segments with enrolled-speaker matches")
+
+class RediarizeRequest(BaseModel):
+    """Body of POST /sessions/{id}/rediarize; ASR output and embeddings are reused."""
+    coach_threshold: float = Field(default_factory=lambda: settings.COACH_THRESHOLD)
+    max_speakers: int = 2
+    coach_ids: Optional[List[str]] = Field(None, description="Enrolled coaches to match against (default: all)")
+    top_k: int = Field(default_factory=lambda: settings.SPEAKER_TOP_K)
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued | running | done | failed")
+    stage: Optional[str] = None
+    progress: float = 0.0
+    error: Optional[str] = None
+    created_at: float
+    updated_at: float
+
+class StreamConfig(BaseModel):
+    """Optional first text message on /ws/transcribe; audio is 16 kHz mono int16 PCM."""
+    type: str = "config"
+    language: str = Field(default_factory=lambda: settings.LANGUAGE)
+    coach_threshold: float = Field(default_factory=lambda: settings.COACH_THRESHOLD)
+    max_speakers: int = 2
+    use_word_timestamps: bool = True
+    model: Optional[str] = None
+    coach_ids: Optional[List[str]] = Field(None, description="Enrolled coaches to match against (default: all)")
+    top_k: int = Field(default_factory=lambda: settings.SPEAKER_TOP_K)
@@ -1,5 +1,6 @@
 from __future__ import annotations
-from typing import Dict, List, Tuple
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import itertools
 import numpy as np
@@ -31,120 +32,167 @@ def _assign_label_by_overlap(t0: float, t1: float, diar: List[Tuple[float, float
             best_lab = lab
     return best_lab
 
-def assign_speakers_to_words(
+class DiarIndex:
+    """
+    Sorted-interval index over diarization segments for _assign_label_by_overlap lookups.
+
+    When segment starts and ends are both non-decreasing (always the case for VAD-derived
+    segments), the overlapping segments of [t0, t1] form one contiguous range found by
+    bisection, and the nearest centre is one of two neighbours, so each lookup is
+    O(log D + overlaps) instead of O(D). Labels, including tie-breaking (first segment in
+    diar order wins), are identical to the linear scan; unsorted input falls back to it.
+    """
+
+    def __init__(self, diar: List[Tuple[float, float, str]]):
+        self.diar = diar
+        self.starts = [float(a) for (a, _, _) in diar]
+        self.ends = [float(b) for (_, b, _) in diar]
+        self.centers = [0.5 * (a + b) for (a, b, _) in diar]
+        self.sorted = all(
+            self.starts[i] <= self.starts[i + 1] and self.ends[i] <= self.ends[i + 1]
+            for i in range(len(diar) - 1)
+        )
+
+    def label(self, t0: float, t1: float) -> str:
+        diar = self.diar
+        if not diar:
+            return "UNKNOWN"
+        if not self.sorted:
+            return _assign_label_by_overlap(t0, t1, diar)
+
+        # candidates: end > t0 and start < t1
+        lo = bisect_right(self.ends, t0)
+        hi = bisect_left(self.starts, t1)
+        totals: Dict[str, float] = {}
+        for i in range(lo, hi):
+            a, b, lab = diar[i]
+            ov = _overlap(t0, t1, a, b)
+            if ov > 0:
+                totals[lab] = totals.get(lab, 0.0) + ov
+        if totals:
+            return max(totals.items(), key=lambda kv: kv[1])[0]
+
+        # fallback: center-time nearest (earliest segment wins ties)
+        center = 0.5 * (t0 + t1)
+        centers = self.centers
+        idx = bisect_left(centers, center)
+        best = None
+        if idx < len(centers):
+            best = idx
+        if idx > 0:
+            left = bisect_left(centers, centers[idx - 1])
+            if best is None or abs(center - centers[left]) <= abs(center - centers[best]):
+                best = left
+        return diar[best][2]
+
+class AlignedWord(NamedTuple):
+    w: str
+    start: float
+    end: float
+    speaker: str
+
+class AlignedUtterance:
+    """
+    One speaker turn. Words are kept as AlignedWord tuples and the text is only joined
+    when first read, so merging turns is a list extend rather than a re-join.
+    """
+    __slots__ = ("start", "end", "speaker", "words", "_pieces", "_text")
+
+    def __init__(self, start: float, end: float, speaker: str, words: Optional[List[AlignedWord]] = None, text: str = ""):
+        self.start = float(start)
+        self.end = float(end)
+        self.speaker = speaker
+        self.words: List[AlignedWord] = words if words is not None else []
+        self._pieces: List[str] = [text] if text else []
+        self._text: Optional[str] = None
+
+    def absorb(self, other: "AlignedUtterance") -> None:
+        self.words.extend(other.words)
+        self._pieces.extend(other._pieces)
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            if self.words:
+                self._text = " ".join(w.w for w in self.words).strip()
+            else:
+                self._text = " ".join(p for p in self._pieces if p).strip()
+        return self._text
+
+    def as_dict(self) -> Dict:
+        return {
+            "start": self.start,
+            "end": self.end,
+            "speaker": self.speaker,
+            "text": self.text,
+            "words": [w._asdict() for w in self.words],
+        }
+
+def align_utterances(
     diar_segments: List[Tuple[float, float, str]],
     whisper_segments: List[Dict],
     merge_gap: float = 0.2,
     min_turn_dur: float = 0.5,
-) -> List[Dict]:
+) -> List[AlignedUtterance]:
     """
-    Returns "utterances": list of {start, end, speaker, text, words: [{w,start,end,speaker}, ...]}
+    Speaker turns from diarization + ASR output.
     We prefer word-level when available, else segment-level.
     """
-    utterances: List[Dict] = []
+    utterances: List[AlignedUtterance] = []
+    index = DiarIndex(diar_segments)
 
     # Case 1: word timestamps available for majority
     has_words = any("words" in s and s["words"] for s in whisper_segments)
 
     if has_words:
-        # Build per-word stream with assigned speakers
-        word_stream = []
+        # Group consecutive words by speaker with small gap tolerance
+        current: Optional[AlignedUtterance] = None
         for seg in whisper_segments:
-            seg_words = seg.get("words") or []
-            for w in seg_words:
+            for w in seg.get("words") or []:
                 w0 = float(w["start"])
                 w1 = float(w["end"])
-                spk = _assign_label_by_overlap(w0, w1, diar_segments)
-                word_stream.append({
-                    "w": w["word"],
-                    "start": w0,
-                    "end": w1,
-                    "speaker": spk
-                })
-
-        # Group consecutive words by speaker with small gap tolerance
-        if not word_stream:
-            return []
-
-        current = {
-            "start": word_stream[0]["start"],
-            "end": word_stream[0]["end"],
-            "speaker": word_stream[0]["speaker"],
-            "words": [word_stream[0]]
-        }
-
-        for w in word_stream[1:]:
-            same_spk = (w["speaker"] == current["speaker"])
-            gap = w["start"] - current["end"]
-            if same_spk and gap <= merge_gap:
-                current["end"] = max(current["end"], w["end"])
-                current["words"].append(w)
-            else:
-                # finalize
-                current["text"] = " ".join(x["w"] for x in current["words"]).strip()
-                utterances.append(current)
-                # start new
-                current = {"start": w["start"], "end": w["end"], "speaker": w["speaker"], "words": [w]}
-
-        # finalize last
-        current["text"] = " ".join(x["w"] for x in current["words"]).strip()
-        utterances.append(current)
-
+                word = AlignedWord(w["word"].strip(), w0, w1, index.label(w0, w1))
+                if current is not None and word.speaker == current.speaker and w0 - current.end <= merge_gap:
+                    current.end = max(current.end, w1)
+                    current.words.append(word)
+                else:
+                    current = AlignedUtterance(w0, w1, word.speaker, [word])
+                    utterances.append(current)
     else:
         # Segment-level only
         for seg in whisper_segments:
             s0 = float(seg["start"])
             s1 = float(seg["end"])
-            lab = _assign_label_by_overlap(s0, s1, diar_segments)
-            utterances.append({
-                "start": s0, "end": s1, "speaker": lab,
-                "text": seg["text"], "words": []
-            })
+            utterances.append(AlignedUtterance(s0, s1, index.label(s0, s1), text=seg["text"].strip()))
 
     # Merge too-short turns (< min_turn_dur) with neighbors of the same speaker
-    if utterances:
-        merged: List[Dict] = []
-        for utt in utterances:
-            if not merged:
-                merged.append(utt)
-                continue
-            prev = merged[-1]
-            if utt["speaker"] == prev["speaker"] and (utt["start"] - prev["end"]) <= merge_gap:
-                # merge
-                prev["end"] = utt["end"]
-                if prev["words"] and utt["words"]:
-                    prev["words"].extend(utt["words"])
-                    prev["text"] = " ".join(x["w"] for x in prev["words"]).strip()
-                else:
-                    prev["text"] = (prev["text"] + " " + utt["text"]).strip()
-            else:
-                merged.append(utt)
-        utterances = merged
-
-        # second pass: if an utterance still < min_turn_dur, try merging with neighbor speakers if same label exists
-        final: List[Dict] = []
-        for utt in utterances:
-            if final and (utt["end"] - utt["start"]) < min_turn_dur and utt["speaker"] == final[-1]["speaker"]:
-                # merge backward
-                prev = final[-1]
-                prev["end"] = max(prev["end"], utt["end"])
-                if prev["words"] and utt["words"]:
-                    prev["words"].extend(utt["words"])
-                    prev["text"] = " ".join(x["w"] for x in prev["words"]).strip()
-                else:
-                    prev["text"] = (prev["text"] + " " + utt["text"]).strip()
-            else:
-                final.append(utt)
-        utterances = final
-
-    # Normalize: strip text, ensure float types
-    for u in utterances:
-        u["text"] = u.get("text", "").strip()
-        u["start"] = float(u["start"])
-        u["end"] = float(u["end"])
-        for w in u.get("words", []):
-            w["w"] = w["w"].strip()
-            w["start"] = float(w["start"])
-            w["end"] = float(w["end"])
-
-    return utterances
+    merged: List[AlignedUtterance] = []
+    for utt in utterances:
+        if merged and utt.speaker == merged[-1].speaker and (utt.start - merged[-1].end) <= merge_gap:
+            merged[-1].end = utt.end
+            merged[-1].absorb(utt)
+        else:
+            merged.append(utt)
+
+    # second pass: if an utterance still < min_turn_dur, try merging with neighbor speakers if same label exists
+    final: List[AlignedUtterance] = []
+    for utt in merged:
+        if final and (utt.end - utt.start) < min_turn_dur and utt.speaker == final[-1].speaker:
+            final[-1].end = max(final[-1].end, utt.end)
+            final[-1].absorb(utt)
+        else:
+            final.append(utt)
+    return final
+
+def assign_speakers_to_words(
+    diar_segments: List[Tuple[float, float, str]],
+    whisper_segments: List[Dict],
+    merge_gap: float = 0.2,
+    min_turn_dur: float = 0.5,
+) -> List[Dict]:
+    """
+    Returns "utterances": list of {start, end, speaker, text, words: [{w,start,end,speaker}, ...]}
+    We prefer word-level when available, else segment-level.
+    """
+    return [u.as_dict() for u in align_utterances(diar_segments, whisper_segments, merge_gap, min_turn_dur)]
@@ -1,18 +1,58 @@
 from __future__ import annotations
-from typing import Dict, List, Optional
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 import os
+import threading
+import time
+import numpy as np
 import torch
 
 from faster_whisper import WhisperModel
 
 from app.config import settings
+from .io_utils import as_float32, resample
 
-_model: Optional[WhisperModel] = None
-_model_name_display: Optional[str] = None
+class AsrProfile(NamedTuple):
+    """Decoding settings for one speed/accuracy trade-off (compute_type applies on CPU)."""
+    name: str
+    beam_size: int
+    best_of: int
+    temperature: Tuple[float, ...]  # fallback schedule, tried in order when a decode fails its checks
+    compute_type: str  # int8 | int8_float32 | float32
+    condition_on_previous_text: bool
 
-def _assert_whisper_model_local():
-    local_dir = settings.whisper_model_path
+_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+# The cores each concurrently running pipeline can use without oversubscribing the machine
+_PIPELINE_CORES = max(1, (os.cpu_count() or 1) // max(1, settings.PIPELINE_MAX_CONCURRENCY))
+
+# fast: greedy, no fallback, for triage; balanced: the long-standing defaults; accurate: wider beam, fp32.
+# Profiles with the same compute type share one loaded model (see get_model).
+PROFILES: Dict[str, AsrProfile] = {
+    "fast": AsrProfile("fast", beam_size=1, best_of=1, temperature=(0.0,), compute_type="int8",
+                       condition_on_previous_text=False),
+    "balanced": AsrProfile("balanced", beam_size=5, best_of=5, temperature=_FALLBACK, compute_type="int8",
+                           condition_on_previous_text=True),
+    "accurate": AsrProfile("accurate", beam_size=8, best_of=5, temperature=_FALLBACK, compute_type="float32",
+                           condition_on_previous_text=True),
+}
+
+def get_profile(name: Optional[str] = None) -> AsrProfile:
+    name = name or settings.ASR_PROFILE
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown ASR profile {name!r} (expected one of {', '.join(PROFILES)})") from None
+
+# Registry of loaded models, keyed by (model size/name, compute type)
+_models: Dict[Tuple[str, str], WhisperModel] = {}
+_models_lock = threading.Lock()
+# Seconds spent loading each model, keyed "name:compute_type" (reported by /metrics)
+model_load_sec: Dict[str, float] = {}
+
+def _assert_whisper_model_local(name: str):
+    local_dir = settings.whisper_path_for(name)
     if not local_dir.exists() and settings.OFFLINE_ONLY:
         raise RuntimeError(
             f"Faster-Whisper model not found at '{local_dir}'. "
@@ -20,59 +60,263 @@ def _assert_whisper_model_local():
             "or disable OFFLINE_ONLY to allow an initial download."
         )
 
-def get_model() -> WhisperModel:
-    global _model, _model_name_display
-    if _model is not None:
-        return _model
+def available_models() -> List[str]:
+    """Model names requests may select (WHISPER_MODELS, always including WHISPER_MODEL)."""
+    return settings.whisper_models
+
+def _device() -> str:
+    return "cuda" if torch.cuda.is_available() else "cpu"
 
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    compute_type = "float16" if device == "cuda" else "int8"
+def _compute_type(prof: AsrProfile) -> str:
+    return "float16" if _device() == "cuda" else prof.compute_type
+
+def warmup_profiles() -> List[str]:
+    """One profile per distinct compute type on this device: warming these loads every model a request can use."""
+    by_type: Dict[str, str] = {}
+    for prof in PROFILES.values():
+        by_type.setdefault(_compute_type(prof), prof.name)
+    return list(by_type.values())
+
+def get_model(name: Optional[str] = None, profile: Optional[str] = None) -> WhisperModel:
+    """The model `name` loaded with the compute type of `profile`."""
+    name = name or settings.WHISPER_MODEL
+    device = _device()
+    compute_type = _compute_type(get_profile(profile))
+    # CTranslate2 fixes the thread count at load time, so it is the same for every profile:
+    # ASR_CPU_THREADS when set (the batch CLI bounds each worker process with it),
+    # otherwise this pipeline's share of the cores
+    threads = max(0, settings.ASR_CPU_THREADS) or _PIPELINE_CORES
+    key = (name, compute_type)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _models_lock:
+        if key in _models:
+            return _models[key]
+
+        # Prefer local path for offline
+        _assert_whisper_model_local(name)
+        local_dir = settings.whisper_path_for(name)
+        model_path = str(local_dir) if local_dir.exists() else name
+        t0 = time.perf_counter()
+        # num_workers > 1 lets several threads decode concurrently (see transcribe_voiced);
+        # cpu_threads bounds the intra-op threads of each of them.
+        model = WhisperModel(
+            model_path,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=threads,
+            num_workers=max(1, settings.ASR_NUM_WORKERS),
+        )
+        model_load_sec[f"{name}:{compute_type}"] = time.perf_counter() - t0
+        _models[key] = model
+    return model
 
-    # Prefer local path for offline
-    _assert_whisper_model_local()
-    model_path = str(settings.whisper_model_path) if settings.whisper_model_path.exists() else settings.WHISPER_MODEL
-    _model = WhisperModel(model_path, device=device, compute_type=compute_type)
-    _model_name_display = f"faster-whisper {settings.WHISPER_MODEL}"
-    return _model
+def loaded_models() -> List[str]:
+    return sorted({name for name, _ in _models})
+
+def _decode_options(prof: AsrProfile) -> Dict:
+    return dict(
+        beam_size=prof.beam_size,
+        best_of=prof.best_of,
+        temperature=list(prof.temperature),
+        condition_on_previous_text=prof.condition_on_previous_text,
+    )
+
+WHISPER_SR = 16000
 
 def transcribe(
-    audio_path: str,
+    audio: Union[str, np.ndarray],
     language: str = "nl",
     word_timestamps: bool = True,
+    sr: int = WHISPER_SR,
+    model_name: Optional[str] = None,
+    profile: Optional[str] = None,
 ) -> List[Dict]:
     """
+    Decoding settings come from the ASR profile (default ASR_PROFILE).
+    audio is either a file path or the already-decoded mono float32 waveform
+    (preferred: avoids a second decode of the same upload). Arrays not at 16 kHz are resampled.
     Returns list of segments:
     {
       "start": float, "end": float, "text": str,
       "words": [{"word": str, "start": float, "end": float}, ...]  # if available
     }
     """
-    model = get_model()
+    prof = get_profile(profile)
+    model = get_model(model_name, prof.name)
+
+    if isinstance(audio, np.ndarray):
+        audio = as_float32(audio)
+        if sr != WHISPER_SR:
+            audio = resample(audio, sr, WHISPER_SR)
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
 
     # We do not apply Faster-Whisper’s built-in VAD filter; our VAD is separate.
     segments, _ = model.transcribe(
-        audio_path,
+        audio,
         language=language,
         task="transcribe",
         word_timestamps=word_timestamps,
-        beam_size=5,
         vad_filter=False,
+        **_decode_options(prof),
     )
 
+    return _segments_to_dicts(segments)
+
+def _segments_to_dicts(segments, remap=None) -> List[Dict]:
+    remap = remap or (lambda t: t)
     out = []
     for seg in segments:
         item = {
-            "start": float(seg.start),
-            "end": float(seg.end),
+            "start": float(remap(seg.start)),
+            "end": float(remap(seg.end)),
             "text": seg.text.strip(),
         }
         if seg.words:
             words = []
             for w in seg.words:
-                words.append({"word": w.word.strip(), "start": float(w.start), "end": float(w.end)})
+                words.append({"word": w.word.strip(), "start": float(remap(w.start)), "end": float(remap(w.end))})
             item["words"] = words
         out.append(item)
     return out
 
-def model_name_display() -> str:
-    return _model_name_display or f"faster-whisper {settings.WHISPER_MODEL}"
+# -------- Voiced-region chunked decoding --------
+
+def pack_voiced_chunks(
+    segments: Sequence[Tuple[float, float]],
+    chunk_sec: float = 30.0,
+    pad_sec: float = 0.2,
+    gap_sec: float = 0.3,
+    total_sec: Optional[float] = None,
+) -> List[List[Tuple[float, float]]]:
+    """
+    Packs VAD regions (seconds, original timeline) into chunks whose packed length
+    (sum of regions + gap_sec between them) stays within chunk_sec.
+    Regions are padded by pad_sec, overlapping ones merged, and over-long ones split.
+    """
+    regions: List[Tuple[float, float]] = []
+    for (a, b) in sorted(segments):
+        a = max(0.0, a - pad_sec)
+        b = b + pad_sec
+        if total_sec is not None:
+            b = min(b, total_sec)
+        if b <= a:
+            continue
+        if regions and a <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], max(regions[-1][1], b))
+        else:
+            regions.append((a, b))
+
+    pieces: List[Tuple[float, float]] = []
+    for (a, b) in regions:
+        while b - a > chunk_sec:
+            pieces.append((a, a + chunk_sec))
+            a += chunk_sec
+        pieces.append((a, b))
+
+    chunks: List[List[Tuple[float, float]]] = []
+    current: List[Tuple[float, float]] = []
+    used = 0.0
+    for (a, b) in pieces:
+        need = (b - a) + (gap_sec if current else 0.0)
+        if current and used + need > chunk_sec:
+            chunks.append(current)
+            current, used, need = [], 0.0, b - a
+        current.append((a, b))
+        used += need
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _build_chunk(
+    wav: np.ndarray, sr: int, pieces: List[Tuple[float, float]], gap_sec: float,
+) -> Tuple[np.ndarray, List[Tuple[float, float, float]]]:
+    """
+    Concatenates the pieces with gap_sec of silence in between.
+    Returns (audio, offsets) with offsets[i] = (chunk_t0, orig_t0, duration).
+    """
+    gap = np.zeros(int(round(gap_sec * sr)), dtype=np.float32)
+    parts: List[np.ndarray] = []
+    offsets: List[Tuple[float, float, float]] = []
+    pos = 0
+    for k, (a, b) in enumerate(pieces):
+        if k:
+            parts.append(gap)
+            pos += len(gap)
+        x = wav[int(a * sr): int(b * sr)]
+        offsets.append((pos / sr, a, len(x) / sr))
+        parts.append(as_float32(x))  # int16 (memory-mapped) slices are scaled here
+        pos += len(x)
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32), offsets
+
+def _remapper(offsets: List[Tuple[float, float, float]]):
+    starts = [o[0] for o in offsets]
+
+    def remap(t: float) -> float:
+        k = max(0, bisect_right(starts, t) - 1)
+        c0, o0, dur = offsets[k]
+        # times inside the inserted silence snap to the end of the preceding piece
+        return o0 + min(max(0.0, t - c0), dur)
+    return remap
+
+def transcribe_voiced(
+    wav: np.ndarray,
+    sr: int,
+    segments: Sequence[Tuple[float, float]],
+    language: str = "nl",
+    word_timestamps: bool = True,
+    chunk_sec: float = settings.ASR_CHUNK_SEC,
+    workers: int = settings.ASR_NUM_WORKERS,
+    model_name: Optional[str] = None,
+    profile: Optional[str] = None,
+) -> List[Dict]:
+    """
+    Runs ASR only on voiced regions: VAD segments are packed into ~chunk_sec chunks
+    that are decoded concurrently (up to `workers`, matching the model's num_workers),
+    and all timestamps are mapped back to the original timeline.
+    Same output format as transcribe().
+    """
+    if sr != WHISPER_SR:
+        wav = resample(as_float32(wav), sr, WHISPER_SR)
+        sr = WHISPER_SR
+
+    chunks = pack_voiced_chunks(
+        segments,
+        chunk_sec=chunk_sec,
+        pad_sec=settings.ASR_REGION_PAD_SEC,
+        gap_sec=settings.ASR_CHUNK_GAP_SEC,
+        total_sec=len(wav) / sr,
+    )
+    if not chunks:
+        return []
+
+    prof = get_profile(profile)
+    model = get_model(model_name, prof.name)
+    # chunks join unrelated regions: never condition one region's text on the previous one
+    options = {**_decode_options(prof), "condition_on_previous_text": False}
+
+    def decode(pieces: List[Tuple[float, float]]) -> List[Dict]:
+        audio, offsets = _build_chunk(wav, sr, pieces, settings.ASR_CHUNK_GAP_SEC)
+        segs, _ = model.transcribe(
+            audio,
+            language=language,
+            task="transcribe",
+            word_timestamps=word_timestamps,
+            vad_filter=False,
+            **options,
+        )
+        # consume the generator inside the worker thread
+        return _segments_to_dicts(segs, remap=_remapper(offsets))
+
+    workers = max(1, min(int(workers), len(chunks)))
+    if workers == 1:
+        results = [decode(c) for c in chunks]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asr") as pool:
+            results = list(pool.map(decode, chunks))
+    return [seg for chunk_segs in results for seg in chunk_segs]
+
+def model_name_display(name: Optional[str] = None) -> str:
+    return f"faster-whisper {name or settings.WHISPER_MODEL}"
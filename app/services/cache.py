@@ -0,0 +1,150 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+def audio_key(data: bytes) -> str:
+    """Content hash of an uploaded file; identical uploads share cached artifacts."""
+    return hashlib.sha256(data).hexdigest()
+
+def params_key(prefix: str, params: Dict[str, Any]) -> str:
+    """Artifact name for a stage output that depends on params, e.g. 'vad-1a2b3c4d5e6f'."""
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:12]
+    return f"{prefix}-{digest}"
+
+class ArtifactCache:
+    """
+    Disk cache of intermediate pipeline artifacts, keyed by audio content hash.
+
+    Layout: <root>/<key[:2]>/<key>/<name>.json|.npy, one file per artifact, so a re-run
+    that changes only diarization parameters still hits the VAD, embedding and ASR
+    entries. Reads refresh the file mtime; once the cache grows past max_bytes the
+    least recently used files are deleted until it is back under 90% of the limit.
+    """
+
+    def __init__(self, root: Path = settings.CACHE_DIR, max_bytes: int = settings.CACHE_MAX_MB << 20):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str, name: str) -> Path:
+        return self.root / key[:2] / key / name
+
+    def _files(self) -> List[os.DirEntry]:
+        out = []
+        for shard in os.scandir(self.root):
+            if not shard.is_dir():
+                continue
+            for entry_dir in os.scandir(shard.path):
+                if entry_dir.is_dir():
+                    out.extend(f for f in os.scandir(entry_dir.path) if f.is_file() and not f.name.endswith(".tmp"))
+        return out
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            if self._total is None:
+                self._total = sum(f.stat().st_size for f in self._files())
+            return self._total
+
+    # -------- Reads --------
+
+    def _hit(self, path: Path) -> bool:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get_json(self, key: str, name: str) -> Optional[Any]:
+        path = self._path(key, name + ".json")
+        if not self._hit(path):
+            return None
+        try:
+            return json.loads(path.read_text())
+        except Exception:
+            logger.warning("dropping unreadable cache entry %s", path)
+            path.unlink(missing_ok=True)
+            return None
+
+    def get_array(self, key: str, name: str) -> Optional[np.ndarray]:
+        path = self._path(key, name + ".npy")
+        if not self._hit(path):
+            return None
+        try:
+            return np.load(path)
+        except Exception:
+            logger.warning("dropping unreadable cache entry %s", path)
+            path.unlink(missing_ok=True)
+            return None
+
+    # -------- Writes --------
+
+    def _write(self, path: Path, write) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with tmp.open("wb") as f:
+            write(f)
+        old = path.stat().st_size if path.exists() else 0
+        tmp.replace(path)
+        new = path.stat().st_size
+        with self._lock:
+            if self._total is not None:
+                self._total += new - old
+        if self.size_bytes() > self.max_bytes:
+            self.evict()
+
+    def put_json(self, key: str, name: str, value: Any) -> None:
+        data = json.dumps(value, ensure_ascii=False).encode()
+        self._write(self._path(key, name + ".json"), lambda f: f.write(data))
+
+    def put_array(self, key: str, name: str, value: np.ndarray) -> None:
+        self._write(self._path(key, name + ".npy"), lambda f: np.save(f, np.ascontiguousarray(value)))
+
+    def evict(self, target_bytes: Optional[int] = None) -> int:
+        """Delete least recently used files until the cache fits target_bytes; returns bytes freed."""
+        target = int(0.9 * self.max_bytes) if target_bytes is None else target_bytes
+        with self._lock:
+            files = sorted(self._files(), key=lambda f: f.stat().st_mtime_ns)
+            total = sum(f.stat().st_size for f in files)
+            freed = 0
+            for f in files:
+                if total - freed <= target:
+                    break
+                size = f.stat().st_size
+                try:
+                    os.unlink(f.path)
+                except FileNotFoundError:
+                    continue
+                freed += size
+                try:
+                    os.rmdir(os.path.dirname(f.path))  # only succeeds once the entry is empty
+                except OSError:
+                    pass
+            self._total = total - freed
+        if freed:
+            logger.info("artifact cache: evicted %.1f MB", freed / (1 << 20))
+        return freed
+
+_cache: Optional[ArtifactCache] = None
+
+def get_artifact_cache() -> Optional[ArtifactCache]:
+    """The process-wide cache, or None when CACHE_ENABLED is off."""
+    global _cache
+    if not settings.CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = ArtifactCache(settings.CACHE_DIR, settings.CACHE_MAX_MB << 20)
+    return _cache
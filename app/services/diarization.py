@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import List, Tuple, Dict, Optional
+from typing import List, NamedTuple, Sequence, Tuple, Dict, Optional
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import logging
 logger = logging.getLogger(__name__)
 
@@ -8,6 +9,27 @@ from sklearn.cluster import AgglomerativeClustering
 
 from app.config import settings
 from .embeddings import cosine
+from .speaker_store import get_speaker_store
+
+def coach_similarities(embs: List[np.ndarray], coach_emb: np.ndarray) -> np.ndarray:
+    """Cosine similarity of every segment embedding to coach_emb, as one matrix-vector product."""
+    if len(embs) == 0:
+        return np.zeros((0,), dtype=np.float32)
+    X = np.vstack(embs).astype(np.float32, copy=False)
+    X = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-8)
+    c = np.asarray(coach_emb, dtype=np.float32).reshape(-1)
+    c = c / max(float(np.linalg.norm(c)), 1e-8)
+    return X @ c
+
+def median_smooth(x: np.ndarray, k: int) -> np.ndarray:
+    """Sliding median over k items with edge padding (integer-truncated, like int(np.median))."""
+    x = np.asarray(x, dtype=np.int32)
+    if k <= 1 or len(x) < k:
+        return x.copy()
+    pad = k // 2
+    padded = np.pad(x, (pad, pad), mode="edge")
+    windows = sliding_window_view(padded, k)[: len(x)]
+    return np.median(windows, axis=1).astype(np.int32)
 
 def label_segments_with_coach(
     segments: List[Tuple[float, float]],
@@ -15,49 +37,109 @@ def label_segments_with_coach(
     coach_emb: Optional[np.ndarray],
     thr: float = 0.72,
     smooth_window: int = 3,
+    scores: Optional[np.ndarray] = None,
 ) -> List[str]:
     """
     Returns a list of labels with initial COACH/UNK classification and temporal smoothing.
+    scores, when given, are precomputed per-segment coach similarities (e.g. the best
+    match among several enrolled coaches) and replace the comparison with coach_emb.
     Also logs cosine similarities if enabled in settings.
     """
-    if coach_emb is None:
-        return ["UNK"] * len(segments)
+    if scores is None:
+        if coach_emb is None:
+            return ["UNK"] * len(segments)
+        scores = coach_similarities(embs, coach_emb)
+    scores = np.asarray(scores, dtype=np.float32)
 
     # --- NEW: log cosine similarities ---
-    if settings.LOG_COSINE_SCORES and len(segments) == len(embs):
+    if settings.LOG_COSINE_SCORES and len(segments) == len(scores):
         logger.info("=== Coach cosine similarities per VAD segment ===")
-        for (t0, t1), emb in zip(segments, embs):
-            sim = float(cosine(emb, coach_emb))
+        for (t0, t1), sim in zip(segments, scores.tolist()):
             logger.info(f"{t0:7.2f}–{t1:7.2f}  sim={sim:.3f}")
         logger.info("=== end similarities ===")
 
-    raw = np.array([1 if cosine(e, coach_emb) >= thr else 0 for e in embs], dtype=np.int32)
-
-    if len(raw) == 0:
+    if len(scores) == 0:
         return []
 
     # median smoothing over window
-    k = max(1, smooth_window)
-    smoothed = raw.copy()
-    if k > 1 and len(raw) >= k:
-        pad = k // 2
-        padded = np.pad(raw, (pad, pad), mode="edge")
-        out = []
-        for i in range(len(raw)):
-            window = padded[i : i + k]
-            out.append(int(np.median(window)))
-        smoothed = np.array(out, dtype=np.int32)
-
-    return ["COACH" if v == 1 else "UNK" for v in smoothed]
+    smoothed = median_smooth(scores >= thr, max(1, smooth_window))
+    return ["COACH" if v == 1 else "UNK" for v in smoothed.tolist()]
 
 def _dur(seg: Tuple[float, float]) -> float:
     return max(0.0, seg[1] - seg[0])
 
+def _cluster_direct(X: np.ndarray, n_clusters: int, distance_threshold: float) -> np.ndarray:
+    if distance_threshold > 0:
+        # estimate the speaker count: average-linkage cosine clustering cut at the threshold
+        Xn = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-8)
+        est = AgglomerativeClustering(
+            n_clusters=None, distance_threshold=distance_threshold, metric="cosine", linkage="average",
+        ).fit_predict(Xn)
+        if len(np.unique(est)) <= n_clusters:
+            return est
+    return AgglomerativeClustering(n_clusters=n_clusters).fit_predict(X)
+
+def _cluster_two_stage(X: np.ndarray, n_clusters: int, distance_threshold: float, n_centroids: int) -> np.ndarray:
+    """Mini-batch k-means down to n_centroids, then agglomerative on the centroids only."""
+    from sklearn.cluster import MiniBatchKMeans
+
+    km = MiniBatchKMeans(n_clusters=n_centroids, n_init=1, random_state=0, batch_size=1024).fit(X)
+    centroids = km.cluster_centers_
+    used = np.unique(km.labels_)  # empty k-means cells carry no segments
+    centroid_labels = np.zeros((len(centroids),), dtype=int)
+    if len(used) > 1:
+        centroid_labels[used] = _cluster_direct(centroids[used], min(n_clusters, len(used)), distance_threshold)
+    return centroid_labels[km.labels_]
+
+def _agglomerative_bytes(n: int, d: int) -> int:
+    # float64 copy of the rows plus the condensed pairwise distance matrix
+    return 8 * (n * d + n * (n - 1) // 2)
+
+def _two_stage_bytes(n: int, d: int, n_centroids: int, batch_size: int = 1024) -> int:
+    # k-means: float64 copy of the rows, labels, centroids and one batch of point-centroid distances;
+    # the agglomerative pass on the centroids runs after it and is smaller
+    kmeans = 8 * (n * d + n + n_centroids * d + min(n, batch_size) * n_centroids)
+    return max(kmeans, _agglomerative_bytes(n_centroids, d))
+
+def cluster_embeddings(
+    X: np.ndarray,
+    n_clusters: int,
+    distance_threshold: float = 0.0,
+    direct_max: int = 1000,
+    n_centroids: int = 256,
+    stats: Optional[Dict] = None,
+) -> np.ndarray:
+    """
+    Cluster labels for the rows of X, with at most n_clusters clusters.
+
+    Up to direct_max rows go straight into agglomerative clustering, whose distance
+    matrix is O(n²). Larger inputs are first reduced to n_centroids k-means centroids,
+    which keeps time and memory bounded on long sessions with many short turns.
+    With distance_threshold > 0 the number of clusters is estimated (cosine distance
+    cut) and n_clusters is only an upper bound.
+    stats gets the method, cluster counts and peak_mem_mb, the size of the largest
+    set of matrices the chosen method holds at once (computed, not traced).
+    """
+    n, d = len(X), (X.shape[1] if X.ndim == 2 else 1)
+    if n == 1 or n_clusters <= 1:
+        labels, method, work = np.zeros((n,), dtype=int), "single", 0
+    elif n <= max(direct_max, n_centroids):
+        labels, method = _cluster_direct(X, n_clusters, distance_threshold), "agglomerative"
+        work = _agglomerative_bytes(n, d)
+    else:
+        labels, method = _cluster_two_stage(X, n_clusters, distance_threshold, n_centroids), "kmeans+agglomerative"
+        work = _two_stage_bytes(n, d, n_centroids)
+    if stats is not None:
+        stats.update({"method": method, "n_clustered": n, "n_clusters": int(len(np.unique(labels))),
+                      "peak_mem_mb": work / (1 << 20)})
+    return labels
+
 def cluster_unknowns(
     segments: List[Tuple[float, float]],
     embs: List[np.ndarray],
     labels: List[str],
     max_speakers: int = 2,
+    stats: Optional[Dict] = None,
 ) -> List[str]:
     """Cluster segments labeled UNK into OTHER_1/OTHER_2..., then promote dominant to JONGERE."""
     final = labels.copy()
@@ -66,12 +148,14 @@ def cluster_unknowns(
         return final
 
     X = np.vstack([embs[i] for i in unk_idx])
-    n_clusters = min(max_speakers, max(1, min(len(unk_idx), 4)))
-    if len(unk_idx) == 1 or n_clusters == 1:
-        cluster_labels = np.zeros((len(unk_idx),), dtype=int)
-    else:
-        model = AgglomerativeClustering(n_clusters=n_clusters)
-        cluster_labels = model.fit_predict(X)
+    n_clusters = min(max_speakers, max(1, min(len(unk_idx), settings.CLUSTER_MAX_SPEAKERS)))
+    cluster_labels = cluster_embeddings(
+        X, n_clusters,
+        distance_threshold=settings.CLUSTER_DISTANCE_THRESHOLD,
+        direct_max=settings.CLUSTER_DIRECT_MAX,
+        n_centroids=settings.CLUSTER_CENTROIDS,
+        stats=stats,
+    )
 
     for j, i in enumerate(unk_idx):
         final[i] = f"OTHER_{int(cluster_labels[j])+1}"
@@ -87,17 +171,139 @@ def cluster_unknowns(
 
     return final
 
+def diarize_with_stats(
+    segments: List[Tuple[float, float]],
+    embs: List[np.ndarray],
+    coach_emb: Optional[np.ndarray],
+    thr: float = 0.72,
+    max_speakers: int = 2,
+    coach_scores: Optional[np.ndarray] = None,
+) -> Tuple[List[Tuple[float, float, str]], Dict]:
+    """
+    diarize(), plus clustering stats: method, n_clustered, n_clusters and peak_mem_mb
+    (working set of the clustering matrices, see cluster_embeddings()).
+    """
+    stats: Dict = {"method": "none", "n_clustered": 0, "n_clusters": 0, "peak_mem_mb": 0.0}
+    initial = label_segments_with_coach(segments, embs, coach_emb, thr=thr, smooth_window=3, scores=coach_scores)
+    final_labels = cluster_unknowns(segments, embs, initial, max_speakers=max_speakers, stats=stats)
+    return [(a, b, lab) for (a, b), lab in zip(segments, final_labels)], stats
+
 def diarize(
     segments: List[Tuple[float, float]],
     embs: List[np.ndarray],
     coach_emb: Optional[np.ndarray],
     thr: float = 0.72,
     max_speakers: int = 2,
+    coach_scores: Optional[np.ndarray] = None,
 ) -> List[Tuple[float, float, str]]:
     """
     Full diarization pipeline: COACH matching + smoothing + clustering unknowns.
     Returns [(t0, t1, label), ...]
     """
-    initial = label_segments_with_coach(segments, embs, coach_emb, thr=thr, smooth_window=3)
+    initial = label_segments_with_coach(segments, embs, coach_emb, thr=thr, smooth_window=3, scores=coach_scores)
     final_labels = cluster_unknowns(segments, embs, initial, max_speakers=max_speakers)
     return [(a, b, lab) for (a, b), lab in zip(segments, final_labels)]
+
+# -------- Enrolled-speaker identification --------
+
+class SpeakerMatches(NamedTuple):
+    matches: List[List[Tuple[str, float]]]  # per segment: top-k (name, cosine), best first
+    coach_scores: Optional[np.ndarray]       # per segment: best score, None when nobody is enrolled
+
+    def best_names(self) -> List[Optional[str]]:
+        return [m[0][0] if m else None for m in self.matches]
+
+def match_speakers(
+    embs: List[np.ndarray],
+    top_k: int = 3,
+    coach_ids: Optional[Sequence[str]] = None,
+) -> SpeakerMatches:
+    """
+    Scores every segment against all enrolled speakers (or only coach_ids) at once
+    and keeps the top_k per segment.
+    """
+    index = get_speaker_store().index()
+    if len(embs) == 0 or len(index) == 0:
+        return SpeakerMatches([[] for _ in embs], None)
+    rows, vals = index.search(np.vstack(embs), k=max(1, top_k), names=coach_ids)
+    if rows.shape[1] == 0:
+        return SpeakerMatches([[] for _ in embs], None)
+    names = index.names
+    matches = [
+        [(names[r], float(v)) for r, v in zip(rr, vv) if r >= 0]
+        for rr, vv in zip(rows.tolist(), vals.tolist())
+    ]
+    return SpeakerMatches(matches, vals[:, 0].astype(np.float32))
+
+def dominant_coach(
+    segments: List[Tuple[float, float]],
+    labels: List[str],
+    best_names: List[Optional[str]],
+) -> Optional[str]:
+    """Enrolled name with the most COACH-labelled speech."""
+    durations: Dict[str, float] = {}
+    for seg, lab, name in zip(segments, labels, best_names):
+        if lab == "COACH" and name:
+            durations[name] = durations.get(name, 0.0) + _dur(seg)
+    if not durations:
+        return None
+    return max(durations.items(), key=lambda kv: kv[1])[0]
+
+# -------- Incremental diarization (streaming) --------
+
+class OnlineSpeakerClusterer:
+    """
+    Assigns COACH/JONGERE/OTHER_n labels one voiced region at a time.
+
+    Regions matching the enrolled coach (cosine >= coach_thr, or a coach_score from
+    match_speakers() passed to assign()) are COACH. Other regions
+    join the most similar running-mean centroid when its similarity reaches
+    cluster_thr, otherwise they open a new cluster (up to max_speakers), so the
+    clustering is updated in O(clusters) per region instead of re-run from scratch.
+    The non-coach cluster with the most speech so far is reported as JONGERE.
+    """
+
+    def __init__(
+        self,
+        coach_emb: Optional[np.ndarray],
+        coach_thr: float = 0.72,
+        cluster_thr: float = 0.6,
+        max_speakers: int = 2,
+    ):
+        self.coach_emb = coach_emb
+        self.coach_thr = coach_thr
+        self.cluster_thr = cluster_thr
+        self.max_speakers = max(1, int(max_speakers))
+        self._sums: List[np.ndarray] = []
+        self._counts: List[int] = []
+        self._durations: List[float] = []
+
+    def _centroid(self, k: int) -> np.ndarray:
+        return self._sums[k] / self._counts[k]
+
+    def label_for(self, cluster: int) -> str:
+        if cluster < 0:
+            return "COACH"
+        dominant = int(np.argmax(self._durations)) if self._durations else -1
+        return "JONGERE" if cluster == dominant else f"OTHER_{cluster + 1}"
+
+    def assign(self, emb: np.ndarray, duration: float, coach_score: Optional[float] = None) -> int:
+        """Returns the cluster index for this region (-1 for COACH) and updates the model."""
+        emb = np.asarray(emb, dtype=np.float32).reshape(-1)
+        if coach_score is None and self.coach_emb is not None:
+            coach_score = cosine(emb, self.coach_emb)
+        if coach_score is not None and coach_score >= self.coach_thr:
+            return -1
+
+        sims = [cosine(emb, self._centroid(k)) for k in range(len(self._sums))]
+        best = int(np.argmax(sims)) if sims else -1
+        if best < 0 or (sims[best] < self.cluster_thr and len(self._sums) < self.max_speakers):
+            self._sums.append(emb.copy())
+            self._counts.append(1)
+            self._durations.append(float(duration))
+            return len(self._sums) - 1
+
+        self._sums[best] += emb
+        self._counts[best] += 1
+        self._durations[best] += float(duration)
+        return best
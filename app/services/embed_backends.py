@@ -0,0 +1,165 @@
+from __future__ import annotations
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+# Alternative CPU runtimes for the ECAPA embedding model (features -> embedding). The
+# Fbank front-end and mean normalisation stay in PyTorch; only clf.mods.embedding_model
+# is swapped, so embed_signal(), embed_segments() and the shared-feature path all use it.
+#   speechbrain  eager PyTorch (reference)
+#   torchscript  traced, frozen and optimised for inference      embedding_model.ts
+#   onnx         ONNX Runtime, fp32                              embedding_model.onnx
+#   quantized    ONNX Runtime, dynamic int8 weights              embedding_model.int8.onnx
+# Exported files are written next to the checkpoint on first use and re-exported when
+# the checkpoint is newer; workers starting together serialise on a lock file and only
+# ever see complete artifacts. onnx/quantized need `onnx` and `onnxruntime` installed.
+BACKENDS = ("speechbrain", "torchscript", "onnx", "quantized")
+
+_ARTIFACTS = {
+    "torchscript": "embedding_model.ts",
+    "onnx": "embedding_model.onnx",
+    "quantized": "embedding_model.int8.onnx",
+}
+
+def _length_to_mask(length: torch.Tensor, max_len=None, dtype=None, device=None) -> torch.Tensor:
+    # speechbrain's version calls len(length), which tracing freezes into the batch size
+    mask = torch.arange(max_len, device=length.device, dtype=length.dtype).unsqueeze(0) < length.unsqueeze(1)
+    return mask.to(dtype or length.dtype)
+
+@contextmanager
+def _export_friendly_masks() -> Iterator[None]:
+    import speechbrain.lobes.models.ECAPA_TDNN as ecapa
+
+    original = ecapa.length_to_mask
+    ecapa.length_to_mask = _length_to_mask
+    try:
+        yield
+    finally:
+        ecapa.length_to_mask = original
+
+def _example_inputs(n_mels: int):
+    return torch.randn(2, 200, n_mels), torch.tensor([1.0, 0.6])
+
+def _n_mels(model: torch.nn.Module) -> int:
+    first = next(p for p in model.parameters() if p.dim() == 3)  # [out, in, kernel] of the first Conv1d
+    return int(first.shape[1])
+
+def export_torchscript(model: torch.nn.Module, path: Path) -> None:
+    with torch.no_grad(), _export_friendly_masks():
+        traced = torch.jit.trace(model.eval(), _example_inputs(_n_mels(model)), check_trace=False)
+    torch.jit.save(traced, str(path))
+
+def export_onnx(model: torch.nn.Module, path: Path) -> None:
+    with torch.no_grad(), _export_friendly_masks():
+        torch.onnx.export(
+            model.eval(), _example_inputs(_n_mels(model)), str(path),
+            input_names=["feats", "lengths"],
+            output_names=["embeddings"],
+            dynamic_axes={"feats": {0: "batch", 1: "frames"}, "lengths": {0: "batch"}, "embeddings": {0: "batch"}},
+            opset_version=17,
+        )
+
+def quantize_onnx(src: Path, dst: Path) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+
+class OnnxEncoder(torch.nn.Module):
+    """ONNX Runtime session with the embedding model's call signature and output shape."""
+
+    def __init__(self, path: Path, threads: int = 0):
+        super().__init__()
+        import onnxruntime as ort
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = max(0, int(threads))
+        self.path = path
+        self.session = ort.InferenceSession(str(path), opts, providers=["CPUExecutionProvider"])
+
+    def forward(self, x: torch.Tensor, lengths: Optional[torch.Tensor] = None) -> torch.Tensor:
+        if lengths is None:
+            lengths = torch.ones(x.shape[0])
+        feats = x.detach().cpu().numpy().astype(np.float32, copy=False)
+        out = self.session.run(None, {"feats": feats, "lengths": lengths.detach().cpu().numpy().astype(np.float32)})[0]
+        return torch.from_numpy(out)
+
+@contextmanager
+def _export_lock(model_dir: Path) -> Iterator[None]:
+    """Exclusive lock across processes sharing model_dir (advisory; not taken on Windows)."""
+    try:
+        import fcntl
+    except ImportError:  # Windows: the atomic replace below still prevents torn reads
+        yield
+        return
+    with open(model_dir / ".export.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+@contextmanager
+def _atomic(path: Path) -> Iterator[Path]:
+    """A temporary path in the same directory, moved over path once the writer succeeds."""
+    tmp = path.with_name(f"{path.stem}.{os.getpid()}.tmp{path.suffix}")
+    try:
+        yield tmp
+        tmp.replace(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+def _stale(artifact: Path, checkpoint: Optional[Path]) -> bool:
+    if not artifact.exists():
+        return True
+    return checkpoint is not None and checkpoint.exists() and checkpoint.stat().st_mtime > artifact.stat().st_mtime
+
+def load_backend(name: str, model: torch.nn.Module, model_dir: Path) -> torch.nn.Module:
+    """The embedding model for `name`, exporting it into model_dir when needed."""
+    if name == "speechbrain":
+        return model
+    if name not in BACKENDS:
+        raise ValueError(f"unknown embedding backend {name!r} (expected one of {', '.join(BACKENDS)})")
+
+    checkpoint = model_dir / "embedding_model.ckpt"
+    path = model_dir / _ARTIFACTS[name]
+    fp32 = model_dir / _ARTIFACTS["onnx"]
+    with _export_lock(model_dir):
+        # re-checked under the lock: another worker may have exported while we waited
+        if name == "torchscript" and _stale(path, checkpoint):
+            logger.info("exporting ECAPA to TorchScript: %s", path)
+            with _atomic(path) as tmp:
+                export_torchscript(model, tmp)
+        if name in ("onnx", "quantized") and _stale(fp32, checkpoint):
+            logger.info("exporting ECAPA to ONNX: %s", fp32)
+            with _atomic(fp32) as tmp:
+                export_onnx(model, tmp)
+        if name == "quantized" and _stale(path, fp32):
+            logger.info("quantising ECAPA (dynamic int8): %s", path)
+            with _atomic(path) as tmp:
+                quantize_onnx(fp32, tmp)
+
+    if name == "torchscript":
+        return torch.jit.optimize_for_inference(torch.jit.freeze(torch.jit.load(str(path)).eval()))
+    return OnnxEncoder(path, threads=torch.get_num_threads())
+
+def parity(reference: torch.nn.Module, candidate: torch.nn.Module, seed: int = 0) -> float:
+    """Lowest cosine between reference and candidate embeddings over fixed padded feature batches."""
+    gen = torch.Generator().manual_seed(seed)
+    n_mels = _n_mels(reference)
+    worst = 1.0
+    with torch.no_grad():
+        for batch, frames in ((1, 150), (4, 300), (3, 800)):
+            x = torch.randn(batch, frames, n_mels, generator=gen)
+            lengths = torch.linspace(1.0, 0.5, batch)
+            a = reference(x, lengths).reshape(batch, -1)
+            b = candidate(x, lengths).reshape(batch, -1)
+            worst = min(worst, float(torch.nn.functional.cosine_similarity(a, b).min()))
+    return worst
@@ -1,5 +1,6 @@
 from __future__ import annotations
-import json
+import logging
+import threading
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
@@ -9,8 +10,16 @@ import torch
 from speechbrain.pretrained import EncoderClassifier
 
 from app.config import settings
+from .embed_backends import load_backend, parity
+from .io_utils import as_float32
+from .speaker_store import SpeakerStore, get_speaker_store
+
+logger = logging.getLogger(__name__)
 
 _classifier: Optional[EncoderClassifier] = None
+_classifier_lock = threading.Lock()
+classifier_load_sec: Optional[float] = None
+backend_info: Dict[str, object] = {}
 
 def _assert_local_model_exists(path: Path):
     if not path.exists():
@@ -21,49 +30,265 @@ def _assert_local_model_exists(path: Path):
         )
 
 def get_classifier() -> EncoderClassifier:
-    global _classifier
+    global _classifier, classifier_load_sec
     if _classifier is not None:
         return _classifier
 
-    local_path = settings.ecapa_local_path
-    _assert_local_model_exists(local_path)
+    with _classifier_lock:
+        if _classifier is not None:
+            return _classifier
+
+        local_path = settings.ecapa_local_path
+        _assert_local_model_exists(local_path)
 
-    # Use local dir. If OFFLINE_ONLY and files missing, raise early.
-    _classifier = EncoderClassifier.from_hparams(
-        source=str(local_path),
-        run_opts={"device": "cuda" if torch.cuda.is_available() else "cpu"},
-        savedir=str(local_path),  # avoid new dirs
-    )
-    _classifier.eval()
+        t0 = time.perf_counter()
+        # Use local dir. If OFFLINE_ONLY and files missing, raise early.
+        clf = EncoderClassifier.from_hparams(
+            source=str(local_path),
+            run_opts={"device": "cuda" if torch.cuda.is_available() else "cpu"},
+            savedir=str(local_path),  # avoid new dirs
+        )
+        clf.eval()
+        _select_backend(clf, settings.EMBED_BACKEND, local_path)
+        classifier_load_sec = time.perf_counter() - t0
+        _classifier = clf
     return _classifier
 
+def active_backend() -> str:
+    """The embedding runtime actually in use (EMBED_BACKEND, or speechbrain after a fallback)."""
+    if settings.EMBED_BACKEND == "speechbrain":
+        return "speechbrain"
+    get_classifier()
+    return str(backend_info.get("backend", "speechbrain"))
+
+def _select_backend(clf: EncoderClassifier, name: str, model_dir: Path) -> None:
+    """
+    Swaps in the configured embedding runtime when it agrees with the eager model
+    (cosine >= EMBED_PARITY_MIN_COS); otherwise keeps eager PyTorch and logs why.
+    """
+    backend_info.clear()
+    backend_info.update(requested=name, backend="speechbrain", parity_min_cos=1.0)
+    if name == "speechbrain":
+        return
+    reference = clf.mods.embedding_model
+    try:
+        candidate = load_backend(name, reference, model_dir)
+        score = parity(reference, candidate)
+    except Exception as e:
+        logger.warning("embedding backend %r unavailable, using speechbrain: %s: %s", name, type(e).__name__, e)
+        backend_info["error"] = f"{type(e).__name__}: {e}"
+        return
+    backend_info["parity_min_cos"] = score
+    if score < settings.EMBED_PARITY_MIN_COS:
+        logger.warning("embedding backend %r failed parity (cosine %.4f < %.4f), using speechbrain",
+                       name, score, settings.EMBED_PARITY_MIN_COS)
+        return
+    clf.mods.embedding_model = candidate
+    backend_info["backend"] = name
+    logger.info("embedding backend %s (parity cosine %.5f)", name, score)
+
+_device: Optional[str] = None
+
+def _get_device() -> str:
+    global _device
+    if _device is None:
+        _device = "cuda" if torch.cuda.is_available() else "cpu"
+    return _device
+
+def _slice_bounds(n_samples: int, sr: int, t0: Optional[float], t1: Optional[float]) -> Tuple[int, int]:
+    if t0 is not None and t1 is not None:
+        return max(0, int(t0 * sr)), min(n_samples, int(t1 * sr))
+    return 0, n_samples
+
 def embed_signal(wav: np.ndarray, sr: int, t0: Optional[float] = None, t1: Optional[float] = None) -> np.ndarray:
     """
     Compute ECAPA embedding for [t0, t1] slice (seconds) or full wav.
     Returns np.ndarray (dim ~192).
     """
-    if t0 is not None and t1 is not None:
-        start = max(0, int(t0 * sr))
-        end = min(len(wav), int(t1 * sr))
-        chunk = wav[start:end]
-    else:
-        chunk = wav
+    start, end = _slice_bounds(len(wav), sr, t0, t1)
+    chunk = wav[start:end]
 
     if len(chunk) == 0:
         # zero-length fallback
         return np.zeros((192,), dtype=np.float32)
 
-    x = torch.from_numpy(chunk).float().unsqueeze(0)  # [1, T]
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    x = x.to(device)
+    x = torch.from_numpy(as_float32(chunk)).unsqueeze(0)  # [1, T]
+    x = x.to(_get_device())
     with torch.no_grad():
         clf = get_classifier()
-        emb = clf.encode_batch(x)  # [1, D]
-        emb = emb.squeeze(0).detach().cpu().numpy().astype(np.float32)
+        emb = clf.encode_batch(x)  # [1, 1, D]
+        emb = emb.detach().cpu().numpy().astype(np.float32).reshape(-1)
     return emb
 
-def embed_segments(wav: np.ndarray, sr: int, segments: List[Tuple[float, float]]) -> List[np.ndarray]:
-    return [embed_signal(wav, sr, t0, t1) for (t0, t1) in segments]
+def _length_buckets(lengths: List[int], order: List[int], max_batch_samples: int, max_batch_size: int) -> List[List[int]]:
+    """
+    Greedily groups indices (already sorted by ascending length) into batches whose
+    padded size (batch_size * longest) stays within max_batch_samples.
+    """
+    batches: List[List[int]] = []
+    current: List[int] = []
+    for i in order:
+        # sorted ascending, so the newcomer is the longest in the batch
+        padded = (len(current) + 1) * lengths[i]
+        if current and (padded > max_batch_samples or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+FEATURE_BLOCK_FRAMES = 6000  # 60 s of 10 ms frames per Fbank call
+
+def _frame_geometry(clf: EncoderClassifier) -> Tuple[int, int]:
+    """(hop, n_fft) in samples of the classifier's STFT front-end."""
+    stft = clf.mods.compute_features.compute_STFT
+    return int(stft.hop_length), int(stft.n_fft)
+
+def recording_features(wav: np.ndarray, clf: Optional[EncoderClassifier] = None) -> torch.Tensor:
+    """
+    Fbank features of the whole recording, [n_frames, n_mels] with frame f centred on
+    sample f * hop, the same framing SpeechBrain uses for a single call on `wav`.
+    Computed in FEATURE_BLOCK_FRAMES blocks with enough overlap that every kept frame
+    sees its full window, so memory stays bounded for long recordings.
+    """
+    clf = clf or get_classifier()
+    device = _get_device()
+    hop, n_fft = _frame_geometry(clf)
+    n = len(wav)
+    n_frames = n // hop + 1
+    ctx = -(-(n_fft // 2) // hop)  # frames of context either side of a block
+    blocks: List[torch.Tensor] = []
+    with torch.no_grad():
+        for f0 in range(0, n_frames, FEATURE_BLOCK_FRAMES):
+            f1 = min(n_frames, f0 + FEATURE_BLOCK_FRAMES)
+            s0 = max(0, f0 - ctx) * hop
+            s1 = min(n, (f1 - 1 + ctx) * hop + 1)
+            x = torch.from_numpy(as_float32(wav[s0:s1])).unsqueeze(0).to(device)
+            feats = clf.mods.compute_features(x)[0]
+            first = f0 - s0 // hop
+            blocks.append(feats[first : first + (f1 - f0)])
+    if not blocks:
+        return torch.zeros((0, 0))
+    feats = torch.cat(blocks)
+    fbanks = clf.mods.compute_features.compute_fbanks
+    if getattr(fbanks, "log_mel", False) and getattr(fbanks, "top_db", None):
+        # the dB floor is relative to the max of each call; re-apply it for the whole recording
+        feats = torch.maximum(feats, feats.max() - fbanks.top_db)
+    return feats
+
+def _embed_from_features(
+    clf: EncoderClassifier,
+    feats: torch.Tensor,
+    bounds: List[Tuple[int, int]],
+    hop: int,
+    max_batch_frames: int,
+    max_batch_size: int,
+    feature_norm: str,
+) -> List[Optional[np.ndarray]]:
+    """Embeddings for sample ranges, taken as frame slices of the recording's features."""
+    n_frames = len(feats)
+    spans = []
+    for a, b in bounds:
+        # as many frames as SpeechBrain produces for wav[a:b] on its own
+        f0 = min(n_frames, a // hop)
+        spans.append((f0, min(n_frames, f0 + (b - a) // hop + 1)) if b > a else (f0, f0))
+    lengths = [f1 - f0 for f0, f1 in spans]
+    out: List[Optional[np.ndarray]] = [None] * len(bounds)
+    order = sorted((i for i in range(len(bounds)) if lengths[i] > 0), key=lambda i: lengths[i])
+    if not order:
+        return out
+
+    device = feats.device
+    recording_mean = feats.mean(dim=0) if feature_norm == "recording" else None
+    with torch.no_grad():
+        for batch in _length_buckets(lengths, order, max_batch_frames, max_batch_size):
+            longest = lengths[batch[-1]]
+            x = torch.empty((len(batch), longest, feats.shape[1]), dtype=feats.dtype, device=device)
+            for row, i in enumerate(batch):
+                f0, f1 = spans[i]
+                piece = feats[f0:f1]
+                if f1 - f0 < longest:  # mirror-pad, as for waveform batches
+                    reps = -(-longest // (2 * (f1 - f0)))
+                    piece = torch.cat([piece, piece.flip(0)] * reps)[:longest]
+                x[row] = piece
+            rel = torch.tensor([lengths[i] / longest for i in batch], dtype=torch.float32, device=device)
+            if recording_mean is not None:
+                x = x - recording_mean
+            else:
+                x = clf.mods.mean_var_norm(x, rel)
+            embs = clf.mods.embedding_model(x, rel)
+            embs = embs.detach().cpu().numpy().astype(np.float32).reshape(len(batch), -1)
+            for row, i in enumerate(batch):
+                out[i] = embs[row]
+    return out
+
+def embed_segments(
+    wav: np.ndarray,
+    sr: int,
+    segments: List[Tuple[float, float]],
+    max_batch_sec: float = settings.EMBED_MAX_BATCH_SEC,
+    max_batch_size: int = settings.EMBED_MAX_BATCH_SIZE,
+    shared_features: bool = settings.EMBED_SHARED_FEATURES,
+    feature_norm: str = settings.EMBED_FEATURE_NORM,
+) -> List[np.ndarray]:
+    """
+    Batched ECAPA embeddings, one per (t0, t1) segment, in input order.
+    Segments are sorted by length and packed into padded batches of at most
+    max_batch_sec padded audio; relative lengths (wav_lens) mask the padding, so
+    results match embed_signal() per segment up to numerical tolerance.
+
+    With shared_features the Fbank front-end runs once over the recording and each
+    segment's frames are sliced from it. feature_norm "segment" keeps SpeechBrain's
+    per-segment mean normalisation; "recording" subtracts the whole-recording mean.
+    Frames at segment edges see real neighbouring audio instead of zero padding; with
+    "segment" the embeddings still match the per-segment path to cosine >= 0.999
+    (>= 0.9999 for segments of a few seconds).
+    """
+    if feature_norm not in ("segment", "recording"):
+        raise ValueError(f"feature_norm must be 'segment' or 'recording', not {feature_norm!r}")
+    n = len(segments)
+    out: List[Optional[np.ndarray]] = [None] * n
+    bounds = [_slice_bounds(len(wav), sr, t0, t1) for (t0, t1) in segments]
+    lengths = [max(0, b - a) for (a, b) in bounds]
+
+    for i, length in enumerate(lengths):
+        if length == 0:
+            out[i] = np.zeros((192,), dtype=np.float32)
+
+    order = sorted((i for i in range(n) if lengths[i] > 0), key=lambda i: lengths[i])
+    if order and shared_features:
+        clf = get_classifier()
+        hop, _ = _frame_geometry(clf)
+        feats = recording_features(wav, clf)
+        embs = _embed_from_features(
+            clf, feats, bounds, hop,
+            max_batch_frames=max(1, int(max_batch_sec * sr) // hop),
+            max_batch_size=max(1, max_batch_size),
+            feature_norm=feature_norm,
+        )
+        for i, e in enumerate(embs):
+            if e is not None:
+                out[i] = e
+    elif order:
+        clf = get_classifier()
+        device = _get_device()
+        max_batch_samples = max(1, int(max_batch_sec * sr))
+        for batch in _length_buckets(lengths, order, max_batch_samples, max(1, max_batch_size)):
+            longest = lengths[batch[-1]]
+            x = np.empty((len(batch), longest), dtype=np.float32)
+            for row, i in enumerate(batch):
+                a, b = bounds[i]
+                # Mirror-pad instead of zero-pad: wav_lens masks the pooling, but the
+                # TDNN receptive field still sees the padding near the segment end.
+                x[row] = np.pad(as_float32(wav[a:b]), (0, longest - (b - a)), mode="symmetric")
+            rel = np.array([lengths[i] / longest for i in batch], dtype=np.float32)
+            with torch.no_grad():
+                embs = clf.encode_batch(torch.from_numpy(x).to(device), torch.from_numpy(rel).to(device))
+                embs = embs.detach().cpu().numpy().astype(np.float32).reshape(len(batch), -1)
+            for row, i in enumerate(batch):
+                out[i] = embs[row]
+    return out
 
 def cosine(a: np.ndarray, b: np.ndarray) -> float:
     if a is None or b is None or a.size == 0 or b.size == 0:
@@ -82,38 +307,14 @@ def mean_pool(vectors: List[np.ndarray]) -> np.ndarray:
 
 # -------- Speaker DB --------
 
-def _default_db() -> Dict:
-    return {}
-
 def load_speaker_db(path: Path = settings.SPEAKER_DB_PATH) -> Dict:
-    if not path.exists():
-        return _default_db()
-    try:
-        return json.loads(path.read_text())
-    except Exception:
-        return _default_db()
-
-def save_speaker_db(db: Dict, path: Path = settings.SPEAKER_DB_PATH) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
-    tmp.write_text(json.dumps(db, ensure_ascii=False, indent=2))
-    tmp.replace(path)
+    """Enrolled speakers' metadata, keyed by name (vectors live in the speaker store)."""
+    store = get_speaker_store() if path == settings.SPEAKER_DB_PATH else SpeakerStore(path)
+    return store.entries()
 
 def save_coach_embedding(embedding: np.ndarray, sr: int, name: str = "COACH", duration: float = 0.0) -> None:
-    db = load_speaker_db()
-    db[name] = {
-        "embedding": embedding.tolist(),
-        "sr": sr,
-        "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
-        "duration_sec": float(duration),
-        "name": name,
-    }
-    save_speaker_db(db)
+    get_speaker_store().put(name, embedding, sr=sr, duration=duration)
 
 def load_coach_embedding(name: str = "COACH") -> Optional[np.ndarray]:
-    db = load_speaker_db()
-    entry = db.get(name)
-    if not entry:
-        return None
-    emb = np.array(entry["embedding"], dtype=np.float32)
-    return emb
+    """L2-normalised enrolled embedding, served from the in-memory store."""
+    return get_speaker_store().get(name)
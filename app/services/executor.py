@@ -0,0 +1,134 @@
+from __future__ import annotations
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from app.config import settings
+from . import metrics
+from .warmup import warm_up_worker
+
+_executor: Optional[Executor] = None
+
+class Overloaded(RuntimeError):
+    """Raised when all pipeline slots are busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Transcription queue is full, retry later.")
+        self.retry_after = int(retry_after)
+
+def get_executor() -> Executor:
+    """
+    Process-wide executor for CPU-bound stages.
+    Threads are the default: torch, CTranslate2 and webrtcvad release the GIL and
+    the loaded models are shared. "process" isolates stages, but every worker
+    process loads its own models and stage inputs are pickled.
+    """
+    global _executor
+    if _executor is not None:
+        return _executor
+    workers = max(1, settings.PIPELINE_WORKERS)
+    if settings.PIPELINE_EXECUTOR.strip().lower() == "process":
+        initializer = warm_up_worker if settings.WARMUP_ON_STARTUP else None
+        _executor = ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+    else:
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pipeline")
+    return _executor
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def _timed_call(fn: Callable, args: Tuple, kwargs: Dict) -> Tuple[float, float, Any]:
+    # time.monotonic is system-wide on Linux, so it is comparable across worker processes
+    started = time.monotonic()
+    result = fn(*args, **kwargs)
+    return started, time.monotonic(), result
+
+class StageRunner:
+    """
+    Dispatches pipeline stages to the executor and records, per stage,
+    how long the call waited for a worker and how long it ran.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, on_stage: Optional[Callable[[str], None]] = None):
+        self._executor = executor
+        self._on_stage = on_stage
+        self.stages: List[Dict[str, Any]] = []
+
+    async def run(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        executor = self._executor or get_executor()
+        submitted = time.monotonic()
+        started, finished, result = await loop.run_in_executor(executor, _timed_call, fn, args, kwargs)
+        stage = {
+            "name": name,
+            "queue_sec": max(0.0, started - submitted),
+            "run_sec": max(0.0, finished - started),
+        }
+        self.stages.append(stage)
+        metrics.observe_stage(name, stage["run_sec"], stage["queue_sec"])
+        if self._on_stage is not None:
+            self._on_stage(name)
+        return result
+
+    def skip(self, name: str) -> None:
+        """Record a stage whose result came from the artifact cache."""
+        self.stages.append({"name": name, "queue_sec": 0.0, "run_sec": 0.0, "cached": True})
+        metrics.observe_stage(name, 0.0, cached=True)
+        if self._on_stage is not None:
+            self._on_stage(name)
+
+class AdmissionController:
+    """
+    Limits the number of pipelines in flight and the number waiting for a slot.
+    Callers beyond max_concurrency + max_queue are rejected with Overloaded.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, retry_after: int):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.max_queue = max(0, int(max_queue))
+        self.retry_after = int(retry_after)
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        self._active = 0
+        self._waiting = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @asynccontextmanager
+    async def slot(self, bounded: bool = True) -> AsyncIterator[float]:
+        """
+        Acquire a pipeline slot; yields the seconds spent waiting in the queue.
+        bounded=False waits without counting against max_queue (background job workers).
+        """
+        if bounded and self._active >= self.max_concurrency and self._waiting >= self.max_queue:
+            raise Overloaded(self.retry_after)
+        t0 = time.monotonic()
+        if bounded:
+            self._waiting += 1
+        try:
+            await self._sem.acquire()
+        finally:
+            if bounded:
+                self._waiting -= 1
+        self._active += 1
+        try:
+            yield time.monotonic() - t0
+        finally:
+            self._active -= 1
+            self._sem.release()
+
+admission = AdmissionController(
+    max_concurrency=settings.PIPELINE_MAX_CONCURRENCY,
+    max_queue=settings.PIPELINE_MAX_QUEUE,
+    retry_after=settings.PIPELINE_RETRY_AFTER_SEC,
+)
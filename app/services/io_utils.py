@@ -1,60 +1,219 @@
 from __future__ import annotations
 import io
-import tempfile
+import math
+import struct
 from pathlib import Path
-from typing import Tuple, Union
+from typing import Optional, Tuple, Union
 
 import numpy as np
 import soundfile as sf
-from scipy.signal import resample_poly
+from scipy.signal import firwin, resample_poly, upfirdn
+
+DECODE_BLOCK_FRAMES = 1 << 16
+PCM16_SCALE = 1.0 / 32768.0  # what soundfile uses for int16 -> float32
 
 def load_audio(path_or_bytes: Union[str, Path, bytes, io.BytesIO], target_sr: int = 16000, mono: bool = True) -> Tuple[np.ndarray, int]:
     """
     Loads audio using soundfile and returns float32 mono @ target_sr.
+    The file is decoded, downmixed and resampled block by block into one preallocated
+    output buffer, so peak memory is the output plus a few blocks, never the full
+    source-rate signal. Without `mono` the first channel is kept.
     """
     if isinstance(path_or_bytes, (str, Path)):
-        data, sr = sf.read(str(path_or_bytes), always_2d=True, dtype="float32")
-    else:
-        if isinstance(path_or_bytes, bytes):
-            bio = io.BytesIO(path_or_bytes)
-        else:
-            bio = path_or_bytes
-        data, sr = sf.read(bio, always_2d=True, dtype="float32")
-
-    # to mono
-    if mono and data.shape[1] > 1:
-        data = np.mean(data, axis=1, dtype=np.float32).reshape(-1, 1)
+        src = str(path_or_bytes)
+    elif isinstance(path_or_bytes, bytes):
+        src = io.BytesIO(path_or_bytes)
     else:
-        data = data[:, :1]  # ensure shape (N,1)
-
-    wav = data.squeeze(1)  # (N,)
-    # resample if needed
-    if sr != target_sr:
-        # resample with resample_poly for efficiency
-        gcd = np.gcd(sr, target_sr)
-        up = target_sr // gcd
-        down = sr // gcd
-        wav = resample_poly(wav, up, down).astype(np.float32)
-        sr = target_sr
+        src = path_or_bytes
+
+    with sf.SoundFile(src) as f:
+        sr, channels, frames = f.samplerate, f.channels, f.frames
+
+        # fast path: already 16-bit mono at the target rate (int16 / 32768 is within [-1, 1))
+        if channels == 1 and sr == target_sr and f.subtype == "PCM_16":
+            return f.read(dtype="float32"), sr
 
+        resampler = PolyphaseResampler(sr, target_sr) if sr != target_sr else None
+        n_out = resampler.output_length(frames) if resampler else frames
+        out = np.empty(n_out, dtype=np.float32)
+        pos = 0
+
+        def emit(y: np.ndarray) -> None:
+            nonlocal out, pos
+            if pos + len(y) > len(out):  # header without a reliable frame count
+                out = np.concatenate([out[:pos], np.empty(max(len(y), pos), dtype=np.float32)])
+            out[pos : pos + len(y)] = y
+            pos += len(y)
+
+        for block in f.blocks(blocksize=DECODE_BLOCK_FRAMES, dtype="float32", always_2d=True):
+            # to mono
+            if mono and channels > 1:
+                x = np.mean(block, axis=1, dtype=np.float32)
+            else:
+                x = block[:, 0]
+            emit(resampler.push(x) if resampler else x)
+        if resampler:
+            emit(resampler.flush())
+
+    wav = out[:pos]
     # sanity: clip to [-1, 1]
-    wav = np.clip(wav, -1.0, 1.0).astype(np.float32)
-    return wav, sr
+    np.clip(wav, -1.0, 1.0, out=wav)
+    return wav, target_sr
+
+def audio_duration(path_or_bytes: Union[str, Path, bytes]) -> float:
+    """Duration in seconds from the file header, without decoding."""
+    src = io.BytesIO(path_or_bytes) if isinstance(path_or_bytes, bytes) else str(path_or_bytes)
+    info = sf.info(src)
+    return info.frames / float(info.samplerate) if info.samplerate else 0.0
+
+def _pcm16_mono_layout(path: Path) -> Optional[Tuple[int, int, int]]:
+    """
+    (sample_rate, data_offset, n_samples) when path is a 16-bit mono PCM WAV, else None.
+    Walks the RIFF chunks, so files with LIST/fact chunks before 'data' are fine.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(12)
+            if len(head) < 12 or head[:4] != b"RIFF" or head[8:12] != b"WAVE":
+                return None
+            fmt = None
+            while True:
+                hdr = f.read(8)
+                if len(hdr) < 8:
+                    return None
+                cid, size = hdr[:4], struct.unpack("<I", hdr[4:])[0]
+                if cid == b"fmt ":
+                    body = f.read(size)
+                    if len(body) < 16:
+                        return None
+                    tag, channels, sr, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                    if tag == 0xFFFE and len(body) >= 26:  # WAVE_FORMAT_EXTENSIBLE: PCM sub-format
+                        tag = struct.unpack("<H", body[24:26])[0]
+                    fmt = (tag, channels, sr, bits)
+                    if size % 2:
+                        f.seek(1, io.SEEK_CUR)
+                elif cid == b"data":
+                    if fmt is None or fmt[0] != 1 or fmt[1] != 1 or fmt[3] != 16:
+                        return None
+                    offset = f.tell()
+                    file_size = Path(path).stat().st_size
+                    # streaming writers leave 0/0xFFFFFFFF here; trust the file length instead
+                    n_bytes = min(size, file_size - offset) if size else file_size - offset
+                    return fmt[2], offset, n_bytes // 2
+                else:
+                    f.seek(size + (size % 2), io.SEEK_CUR)
+    except OSError:
+        return None
+
+def load_audio_mmap(path: Union[str, Path], target_sr: int = 16000) -> Tuple[np.ndarray, int]:
+    """
+    Zero-copy access to a file on disk: a 16-bit mono PCM WAV at target_sr comes back as a
+    read-only int16 memory map, so only the windows VAD/embedding/ASR touch become resident.
+    Consumers convert the slices they use with as_float32(). Any other file falls back to
+    load_audio() (float32, decoded into memory).
+    """
+    layout = _pcm16_mono_layout(Path(path))
+    if layout is None or layout[0] != target_sr:
+        return load_audio(path, target_sr=target_sr, mono=True)
+    sr, offset, n = layout
+    if n == 0:
+        return np.zeros(0, dtype=np.int16), sr
+    return np.memmap(path, dtype="<i2", mode="r", offset=offset, shape=(n,)), sr
+
+def as_float32(x: np.ndarray) -> np.ndarray:
+    """float32 samples in [-1, 1) from a float or int16 PCM array (int16 slices are copied and scaled)."""
+    if x.dtype == np.int16:
+        out = x.astype(np.float32)
+        out *= PCM16_SCALE
+        return out
+    return np.asarray(x, dtype=np.float32)
 
-def save_temp_wav(data_bytes: bytes) -> Path:
+def resample(wav: np.ndarray, sr: int, target_sr: int) -> np.ndarray:
     """
-    Save uploaded bytes to a temp WAV file and return the path.
+    Polyphase resampling of a mono float32 signal from sr to target_sr.
     """
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    tmp.write(data_bytes)
-    tmp.flush()
-    tmp.close()
-    return Path(tmp.name)
+    if sr == target_sr:
+        return wav
+    # resample with resample_poly for efficiency
+    gcd = np.gcd(sr, target_sr)
+    up = target_sr // gcd
+    down = sr // gcd
+    return resample_poly(wav, up, down).astype(np.float32, copy=False)
+
+class PolyphaseResampler:
+    """
+    Streaming equivalent of scipy.signal.resample_poly(x, up, down) for float32 signals:
+    same Kaiser-windowed FIR, same output alignment and length, fed one block at a time.
+
+    Each output sample only depends on the inputs under the filter, so we keep that
+    much context between blocks. The retained context always starts at an input index
+    that is a multiple of `down`, which keeps the polyphase phase of every output
+    identical to the one-shot computation.
+    """
+
+    def __init__(self, sr: int, target_sr: int):
+        g = math.gcd(int(sr), int(target_sr))
+        self.up = int(target_sr) // g
+        self.down = int(sr) // g
+        max_rate = max(self.up, self.down)
+        half_len = 10 * max_rate
+        h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)).astype(np.float32)
+        h *= self.up
+        n_pre_pad = self.down - half_len % self.down
+        self.h = np.concatenate([np.zeros(n_pre_pad, dtype=np.float32), h])
+        self.skip = (half_len + n_pre_pad) // self.down  # leading outputs dropped by resample_poly
+        self._buf = np.zeros(0, dtype=np.float32)
+        self._buf_start = 0  # input index of _buf[0], a multiple of down
+        self._n_in = 0
+        self._m_next = self.skip  # next output index on the full upfirdn timeline
+
+    def output_length(self, n_in: int) -> int:
+        return -(-int(n_in) * self.up // self.down)
+
+    def _emit(self, m_end: int) -> np.ndarray:
+        if m_end <= self._m_next or len(self._buf) == 0:
+            return np.zeros(0, dtype=np.float32)
+        offset = self._buf_start * self.up // self.down
+        y = upfirdn(self.h, self._buf, self.up, self.down)
+        lo, hi = self._m_next - offset, m_end - offset
+        if hi > len(y):  # trailing outputs past the filter tail are zero, as in resample_poly
+            y = np.concatenate([y, np.zeros(hi - len(y), dtype=y.dtype)])
+        out = y[lo:hi].astype(np.float32, copy=False)
+        self._m_next = m_end
+
+        # keep only the inputs the next output still needs, from a multiple of down
+        need = max(0, -(-(self._m_next * self.down - (len(self.h) - 1)) // self.up))
+        start = min(need, self._n_in) // self.down * self.down
+        if start > self._buf_start:
+            self._buf = self._buf[start - self._buf_start :]
+            self._buf_start = start
+        return out
+
+    def push(self, x: np.ndarray) -> np.ndarray:
+        """Feeds the next block of input; returns every output sample that is now final."""
+        x = np.asarray(x, dtype=np.float32)
+        if len(x) == 0:
+            return np.zeros(0, dtype=np.float32)
+        self._buf = np.concatenate([self._buf, x])
+        self._n_in += len(x)
+        # output m is final once the last input under the filter, floor(m*down/up), has arrived
+        m_ready = (self._n_in - 1) * self.up // self.down + 1
+        return self._emit(min(m_ready, self.skip + self.output_length(self._n_in)))
+
+    def flush(self) -> np.ndarray:
+        """Returns the remaining output once the input has ended."""
+        return self._emit(self.skip + self.output_length(self._n_in))
+
+def float_to_int16(wav: np.ndarray) -> np.ndarray:
+    """
+    Converts float32 [-1,1] wav to an int16 array (one scratch copy, clipped and scaled in place).
+    """
+    wav16 = np.clip(wav, -1.0, 1.0)
+    wav16 *= 32767.0
+    return wav16.astype(np.int16)
 
 def float_to_int16_pcm(wav: np.ndarray) -> bytes:
     """
     Converts float32 [-1,1] wav to 16-bit PCM bytes (little-endian).
     """
-    wav16 = np.clip(wav, -1.0, 1.0)
-    wav16 = (wav16 * 32767.0).astype(np.int16)
-    return wav16.tobytes()
+    return float_to_int16(wav).tobytes()
@@ -0,0 +1,156 @@
+from __future__ import annotations
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    stage       TEXT,
+    progress    REAL NOT NULL DEFAULT 0,
+    params      TEXT NOT NULL,
+    audio_path  TEXT,
+    result      TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+def _row_to_dict(row: sqlite3.Row) -> Dict:
+    d = dict(row)
+    d["params"] = json.loads(d["params"]) if d.get("params") else {}
+    return d
+
+class JobStore:
+    """
+    Durable job queue backed by a local SQLite file.
+    Jobs survive restarts: anything left 'running' is re-queued by requeue_interrupted().
+    Finished jobs are deleted ttl_sec after they completed or failed (0 = never).
+    """
+
+    def __init__(self, path: Path = settings.JOBS_DB_PATH, ttl_sec: float = settings.JOB_TTL_HOURS * 3600.0):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def create(self, params: Dict, audio_path: Optional[Path] = None, job_id: Optional[str] = None) -> str:
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, progress, params, audio_path, created_at, updated_at) "
+                "VALUES (?, ?, 0, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(params), str(audio_path) if audio_path else None, now, now),
+            )
+        self.purge()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def claim_next(self) -> Optional[Dict]:
+        """Atomically move the oldest queued job to 'running' and return it."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, time.time(), row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = _row_to_dict(row)
+        job["status"] = RUNNING
+        return job
+
+    def update_progress(self, job_id: str, stage: str, progress: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ?",
+                (stage, float(progress), time.time(), job_id),
+            )
+
+    def complete(self, job_id: str, result_json: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, progress = 1, result = ?, error = NULL, updated_at = ? WHERE id = ?",
+                (DONE, result_json, time.time(), job_id),
+            )
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                (FAILED, error, time.time(), job_id),
+            )
+
+    def requeue_interrupted(self) -> int:
+        """Put jobs that were running when the process stopped back in the queue."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = NULL, progress = 0, updated_at = ? WHERE status = ?",
+                (QUEUED, time.time(), RUNNING),
+            )
+        return cur.rowcount
+
+    def purge(self) -> int:
+        """Delete done/failed jobs that finished more than ttl_sec ago; returns how many were removed."""
+        if self.ttl_sec <= 0:
+            return 0
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, time.time() - self.ttl_sec),
+            )
+        if cur.rowcount:
+            logger.info("purged %d finished job(s)", cur.rowcount)
+        return cur.rowcount
+
+    def count(self, status: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (status,)).fetchone()
+        return int(row[0])
+
+_store: Optional[JobStore] = None
+
+def get_job_store() -> JobStore:
+    global _store
+    if _store is None:
+        _store = JobStore(settings.JOBS_DB_PATH)
+    return _store
@@ -0,0 +1,132 @@
+from __future__ import annotations
+import bisect
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition (format 0.0.4) without the client library: the handful of
+# series we export are kept in plain dicts and rendered on each scrape.
+
+STAGE_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+RTF_BUCKETS = (0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _fmt(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v))
+
+def _labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    esc = lambda s: str(s).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in items) + "}"
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (observations are counted in the first bucket >= value)."""
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, List] = {}  # labels -> [bucket counts, sum, count]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        s = self._series.get(key)
+        if s is None:
+            s = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        i = bisect.bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            s[0][i] += 1
+        s[1] += float(value)
+        s[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, n) in sorted(self._series.items()):
+            acc = 0
+            for le, c in zip(self.buckets, counts):
+                acc += c
+                lines.append(f"{self.name}_bucket{_labels(key, ('le', _fmt(le)))} {acc}")
+            lines.append(f"{self.name}_bucket{_labels(key, ('le', '+Inf'))} {n}")
+            lines.append(f"{self.name}_sum{_labels(key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(key)} {n}")
+        return lines
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._series: Dict[Labels, float] = {}
+
+    def inc(self, value: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        self._series[key] = self._series.get(key, 0.0) + float(value)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(key)} {_fmt(v)}" for key, v in sorted(self._series.items())]
+        return lines
+
+def _gauge(name: str, help: str, series: Sequence[Tuple[Labels, float]]) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+    lines += [f"{name}{_labels(key)} {_fmt(v)}" for key, v in series]
+    return lines
+
+# -------- Registry --------
+
+_lock = threading.Lock()
+
+stage_seconds = Histogram("nidos_stage_duration_seconds", "Run time of a pipeline stage (cache hits excluded).", STAGE_BUCKETS)
+stage_queue_seconds = Histogram("nidos_stage_queue_seconds", "Time a stage waited for a pipeline worker.", STAGE_BUCKETS)
+stage_cache_hits = Counter("nidos_stage_cache_hits_total", "Stages served from the artifact cache.")
+pipeline_seconds = Histogram("nidos_pipeline_duration_seconds", "End-to-end processing time of a transcription.", STAGE_BUCKETS)
+realtime_factor = Histogram("nidos_realtime_factor", "Processing time divided by audio duration.", RTF_BUCKETS)
+pipelines_total = Counter("nidos_pipelines_total", "Completed transcriptions.")
+audio_seconds_total = Counter("nidos_audio_seconds_total", "Audio processed, in seconds.")
+segments_total = Counter("nidos_segments_total", "Voiced segments diarized.")
+words_total = Counter("nidos_words_total", "Words transcribed.")
+rediarizations_total = Counter("nidos_rediarizations_total", "Stored sessions re-diarized.")
+
+def observe_stage(name: str, run_sec: float, queue_sec: float = 0.0, cached: bool = False) -> None:
+    with _lock:
+        if cached:
+            stage_cache_hits.inc(stage=name)
+        else:
+            stage_seconds.observe(run_sec, stage=name)
+            stage_queue_seconds.observe(queue_sec, stage=name)
+
+def observe_pipeline(processing_sec: float, audio_sec: float, n_segments: int, n_words: int) -> None:
+    with _lock:
+        pipelines_total.inc()
+        pipeline_seconds.observe(processing_sec)
+        if audio_sec > 0:
+            realtime_factor.observe(processing_sec / audio_sec)
+        audio_seconds_total.inc(audio_sec)
+        segments_total.inc(n_segments)
+        words_total.inc(n_words)
+
+def observe_rediarization() -> None:
+    with _lock:
+        rediarizations_total.inc()
+
+def render() -> str:
+    """Current values of every series, in the Prometheus text format."""
+    from app.services import asr, embeddings
+    from app.services.executor import admission
+
+    load = [((("model", f"whisper:{name}"),), sec) for name, sec in sorted(asr.model_load_sec.items())]
+    if embeddings.classifier_load_sec is not None:
+        load.append(((("model", "ecapa"),), embeddings.classifier_load_sec))
+
+    with _lock:
+        lines: List[str] = []
+        for metric in (stage_seconds, stage_queue_seconds, stage_cache_hits, pipeline_seconds, realtime_factor,
+                       pipelines_total, audio_seconds_total, segments_total, words_total, rediarizations_total):
+            lines += metric.render()
+    lines += _gauge("nidos_pipeline_active", "Pipelines currently running.", [((), admission.active)])
+    lines += _gauge("nidos_pipeline_waiting", "Pipelines waiting for a slot.", [((), admission.waiting)])
+    lines += _gauge("nidos_model_load_seconds", "Time it took to load each model.", load)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,96 @@
+from __future__ import annotations
+import json
+import logging
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+class SessionStore:
+    """
+    Per-session pipeline intermediates, so a session can be re-diarized without
+    touching the audio again. Layout: <root>/<session_id>/
+      meta.json      language, model, asr_mode, use_word_timestamps, created_at
+      segments.json  VAD segments [[t0, t1], ...]
+      embs.npy       [n_segments, D] float32 speaker embeddings
+      asr.json       ASR segments (with word timestamps when requested)
+    """
+
+    def __init__(self, root: Path = settings.SESSIONS_DIR, ttl_sec: float = settings.SESSION_TTL_HOURS * 3600.0):
+        self.root = root
+        self.ttl_sec = ttl_sec
+        root.mkdir(parents=True, exist_ok=True)
+
+    def _dir(self, session_id: str) -> Optional[Path]:
+        if not _SESSION_ID.match(session_id or ""):
+            return None
+        return self.root / session_id
+
+    def save(
+        self,
+        session_id: str,
+        segments: List[Tuple[float, float]],
+        embs: List[np.ndarray],
+        asr_segments: List[Dict],
+        meta: Dict,
+    ) -> None:
+        d = self._dir(session_id)
+        if d is None:
+            raise ValueError(f"invalid session id: {session_id!r}")
+        tmp = d.with_name(f".{session_id}.tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        (tmp / "segments.json").write_text(json.dumps([[float(a), float(b)] for a, b in segments]))
+        np.save(tmp / "embs.npy", np.vstack(embs).astype(np.float32) if embs else np.zeros((0, 0), dtype=np.float32))
+        (tmp / "asr.json").write_text(json.dumps(asr_segments, ensure_ascii=False))
+        (tmp / "meta.json").write_text(json.dumps({**meta, "created_at": time.time()}, ensure_ascii=False))
+        shutil.rmtree(d, ignore_errors=True)
+        tmp.replace(d)
+        self.purge()
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        """{meta, segments, embs, asr_segments}, or None for an unknown or expired session."""
+        d = self._dir(session_id)
+        if d is None or not (d / "meta.json").exists():
+            return None
+        try:
+            return {
+                "meta": json.loads((d / "meta.json").read_text()),
+                "segments": [(a, b) for a, b in json.loads((d / "segments.json").read_text())],
+                "embs": list(np.load(d / "embs.npy")),
+                "asr_segments": json.loads((d / "asr.json").read_text()),
+            }
+        except FileNotFoundError:
+            return None
+
+    def purge(self) -> int:
+        """Delete sessions older than the TTL; returns how many were removed."""
+        if self.ttl_sec <= 0:
+            return 0
+        cutoff = time.time() - self.ttl_sec
+        removed = 0
+        for d in self.root.iterdir():
+            meta = d / "meta.json"
+            if d.is_dir() and meta.exists() and meta.stat().st_mtime < cutoff:
+                shutil.rmtree(d, ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info("purged %d expired session(s)", removed)
+        return removed
+
+_store: Optional[SessionStore] = None
+
+def get_session_store() -> SessionStore:
+    global _store
+    if _store is None:
+        _store = SessionStore(settings.SESSIONS_DIR)
+    return _store
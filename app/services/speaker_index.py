@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+def _top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column indices and values of the k largest entries per row, best first."""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64), np.zeros((scores.shape[0], 0), dtype=np.float32)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    vals = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-vals, axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(vals, order, axis=1)
+
+class SpeakerIndex:
+    """
+    Cosine top-k search over enrolled speakers (rows are L2-normalised).
+
+    Small galleries are searched exhaustively with one [S, D] x [D, N] matrix product.
+    From ivf_min speakers on, an IVF index is built: rows are bucketed by k-means
+    centroid and each query only scores the rows of its n_probe closest buckets.
+    """
+
+    def __init__(self, names: Sequence[str], matrix: np.ndarray, ivf_min: int = 4096, n_probe: int = 8):
+        self.names = list(names)
+        self.matrix = np.asarray(matrix, dtype=np.float32)
+        self.n_probe = max(1, int(n_probe))
+        self._pos = {n: i for i, n in enumerate(self.names)}
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        if ivf_min > 0 and len(self.names) >= ivf_min:
+            self._build_ivf()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @property
+    def is_ivf(self) -> bool:
+        return self._centroids is not None
+
+    def _build_ivf(self) -> None:
+        from sklearn.cluster import MiniBatchKMeans
+
+        n_lists = max(2, int(np.sqrt(len(self.names))))
+        km = MiniBatchKMeans(n_clusters=n_lists, n_init=1, random_state=0, batch_size=4096).fit(self.matrix)
+        centroids = km.cluster_centers_.astype(np.float32)
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-8)
+        assign = km.labels_
+        self._centroids = centroids
+        self._lists = [np.flatnonzero(assign == c) for c in range(n_lists)]
+
+    def rows_for(self, names: Optional[Sequence[str]]) -> Optional[np.ndarray]:
+        if names is None:
+            return None
+        return np.array([self._pos[n] for n in names if n in self._pos], dtype=np.int64)
+
+    def search(self, queries: np.ndarray, k: int = 1, names: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (rows [S, k'], scores [S, k']) of the best matches per query, best first,
+        with k' = min(k, candidates). names restricts the search to those speakers.
+        IVF results are padded with row -1 when the probed buckets hold fewer than k rows.
+        """
+        q = np.asarray(queries, dtype=np.float32)
+        if q.ndim == 1:
+            q = q[None, :]
+        q = q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-8)
+        subset = self.rows_for(names)
+
+        if len(self.names) == 0 or len(q) == 0 or (subset is not None and len(subset) == 0):
+            return np.zeros((len(q), 0), dtype=np.int64), np.zeros((len(q), 0), dtype=np.float32)
+
+        if subset is not None or not self.is_ivf:
+            mat = self.matrix if subset is None else self.matrix[subset]
+            cols, vals = _top_k(q @ mat.T, k)
+            return (cols if subset is None else subset[cols]), vals
+
+        return self._search_ivf(q, k)
+
+    def _search_ivf(self, q: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        n_probe = min(self.n_probe, len(self._lists))
+        probes, _ = _top_k(q @ self._centroids.T, n_probe)
+        k = min(k, len(self.names))
+        out_rows = np.full((len(q), k), -1, dtype=np.int64)
+        out_vals = np.full((len(q), k), -np.inf, dtype=np.float32)
+        for i in range(len(q)):
+            cand = np.concatenate([self._lists[c] for c in probes[i]])
+            cols, vals = _top_k(q[i : i + 1] @ self.matrix[cand].T, k)
+            n = cols.shape[1]
+            out_rows[i, :n] = cand[cols[0]]
+            out_vals[i, :n] = vals[0]
+        return out_rows, out_vals
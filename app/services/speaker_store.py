@@ -0,0 +1,197 @@
+from __future__ import annotations
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from .speaker_index import SpeakerIndex
+
+logger = logging.getLogger(__name__)
+
+def _normalise_rows(mat: np.ndarray) -> np.ndarray:
+    mat = np.asarray(mat, dtype=np.float32)
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.maximum(norms, 1e-8)
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+class SpeakerStore:
+    """
+    Process-wide cache of enrolled speakers.
+
+    Metadata lives in speaker_db.json ({name: {row, sr, duration_sec, updated_at, name}}),
+    the vectors in a float32 .npy sidecar next to it, one L2-normalised row per speaker,
+    memory-mapped on load. The cache is reloaded when either file's mtime/size changes
+    (another process enrolled someone) and refreshed in place on our own writes.
+    Legacy databases with an inline "embedding" list per speaker are read transparently
+    and converted on the next write.
+    """
+
+    def __init__(self, path: Path = settings.SPEAKER_DB_PATH):
+        self.path = path
+        self.matrix_path = path.with_suffix(".npy")
+        self._lock = threading.RLock()
+        self._meta: Dict[str, Dict] = {}
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._names: List[str] = []
+        self._stamp: Optional[Tuple] = None
+        self._index: Optional[SpeakerIndex] = None
+
+    # -------- Loading --------
+
+    def _current_stamp(self) -> Tuple:
+        return (_stamp(self.path), _stamp(self.matrix_path))
+
+    def _load(self) -> None:
+        meta: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                meta = json.loads(self.path.read_text())
+            except Exception:
+                logger.exception("could not read speaker DB %s", self.path)
+                meta = {}
+
+        stored = None
+        if self.matrix_path.exists():
+            try:
+                stored = np.load(self.matrix_path, mmap_mode="r")
+            except Exception:
+                logger.exception("could not read speaker matrix %s", self.matrix_path)
+
+        names: List[str] = []
+        rows: List[np.ndarray] = []
+        for name, entry in meta.items():
+            if "embedding" in entry:
+                rows.append(np.asarray(entry["embedding"], dtype=np.float32))
+            elif stored is not None and 0 <= int(entry.get("row", -1)) < len(stored):
+                rows.append(stored[int(entry["row"])])
+            else:
+                continue
+            names.append(name)
+
+        if not rows:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        elif stored is not None and all("embedding" not in meta[n] for n in names) \
+                and [int(meta[n]["row"]) for n in names] == list(range(len(stored))):
+            matrix = stored  # already normalised and in order: keep the memory map
+        else:
+            matrix = _normalise_rows(np.vstack(rows))
+
+        self._meta = {n: meta[n] for n in names}
+        self._names = names
+        self._matrix = matrix
+        self._index = None
+
+    def _refresh(self) -> None:
+        stamp = self._current_stamp()
+        if stamp != self._stamp:
+            self._load()
+            self._stamp = stamp
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stamp = None
+
+    # -------- Reads --------
+
+    def names(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return list(self._names)
+
+    def entries(self) -> Dict[str, Dict]:
+        """Metadata per speaker (no vectors)."""
+        with self._lock:
+            self._refresh()
+            return {n: {k: v for k, v in e.items() if k not in ("row", "embedding")} for n, e in self._meta.items()}
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        """L2-normalised embedding for one speaker, or None when not enrolled."""
+        with self._lock:
+            self._refresh()
+            try:
+                i = self._names.index(name)
+            except ValueError:
+                return None
+            return np.array(self._matrix[i], dtype=np.float32)
+
+    def matrix(self) -> Tuple[List[str], np.ndarray]:
+        """(names, [N, D] float32 matrix of L2-normalised rows), row i belonging to names[i]."""
+        with self._lock:
+            self._refresh()
+            return list(self._names), self._matrix
+
+    def index(self) -> SpeakerIndex:
+        """Top-k search index over the current speakers, rebuilt after any change."""
+        with self._lock:
+            self._refresh()
+            if self._index is None:
+                self._index = SpeakerIndex(
+                    self._names, self._matrix,
+                    ivf_min=settings.SPEAKER_IVF_MIN_SPEAKERS,
+                    n_probe=settings.SPEAKER_IVF_PROBES,
+                )
+            return self._index
+
+    # -------- Writes --------
+
+    def put(self, name: str, embedding: np.ndarray, sr: int, duration: float = 0.0) -> None:
+        vec = _normalise_rows(np.asarray(embedding, dtype=np.float32).reshape(1, -1))
+        with self._lock:
+            self._refresh()
+            names = list(self._names)
+            if name in names:
+                matrix = np.array(self._matrix, dtype=np.float32)
+                matrix[names.index(name)] = vec[0]
+            else:
+                names.append(name)
+                matrix = vec if len(self._matrix) == 0 else np.vstack([self._matrix, vec])
+
+            meta = {n: {k: v for k, v in self._meta.get(n, {}).items() if k != "embedding"} for n in names}
+            meta[name] = {
+                "sr": sr,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "duration_sec": float(duration),
+                "name": name,
+            }
+            for i, n in enumerate(names):
+                meta[n]["row"] = i
+            self._write(meta, matrix)
+
+            self._meta = meta
+            self._names = names
+            self._matrix = matrix
+            self._index = None
+            self._stamp = self._current_stamp()
+
+    def _write(self, meta: Dict[str, Dict], matrix: np.ndarray) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # vectors first: readers resolve rows through the JSON, so the old JSON stays valid meanwhile
+        tmp = self.matrix_path.with_suffix(".npy.tmp")
+        with tmp.open("wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        tmp.replace(self.matrix_path)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(meta, ensure_ascii=False))
+        tmp.replace(self.path)
+
+_store: Optional[SpeakerStore] = None
+_store_lock = threading.Lock()
+
+def get_speaker_store() -> SpeakerStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SpeakerStore(settings.SPEAKER_DB_PATH)
+    return _store
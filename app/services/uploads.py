@@ -0,0 +1,134 @@
+from __future__ import annotations
+import hashlib
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+
+CHUNK_BYTES = 1 << 20
+
+class UploadTooLarge(Exception):
+    def __init__(self, limit_bytes: int):
+        super().__init__(f"Upload exceeds the {limit_bytes >> 20} MB limit.")
+        self.limit_bytes = limit_bytes
+
+# Multipart boundaries, part headers and the small form fields around the file
+FORM_OVERHEAD_BYTES = 64 << 10
+
+class _BodyTooLarge(Exception):
+    pass
+
+class UploadLimitMiddleware:
+    """
+    Rejects oversized upload requests with 413 before the form is parsed.
+
+    Starlette spools the whole multipart body to its own temporary file before the
+    endpoint runs, so a check in the endpoint comes after the disk has been filled.
+    This middleware answers on Content-Length alone when it is over the limit, and
+    otherwise counts the body as it streams in, aborting once it passes the limit
+    (chunked requests without a Content-Length).
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str], max_bytes: Optional[int] = None):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_bytes = max_bytes
+
+    def _limit(self) -> int:
+        max_bytes = settings.MAX_UPLOAD_MB << 20 if self.max_bytes is None else self.max_bytes
+        return max_bytes + FORM_OVERHEAD_BYTES if max_bytes > 0 else 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        limit = self._limit()
+        if limit <= 0:
+            await self.app(scope, receive, send)
+            return
+        too_large = JSONResponse({"detail": str(UploadTooLarge(limit - FORM_OVERHEAD_BYTES))}, status_code=413)
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > limit:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        overflowed = False
+        started = False
+
+        async def counted_receive() -> Message:
+            nonlocal received, overflowed
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    overflowed = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal started
+            # FastAPI turns errors raised while parsing the form into its own 400; after an
+            # overflow that response is dropped and the 413 below is sent instead
+            if overflowed and not started:
+                return
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        try:
+            await self.app(scope, counted_receive, guarded_send)
+        except _BodyTooLarge:
+            if started:
+                raise
+        if overflowed and not started:
+            await too_large(scope, receive, send)
+
+async def spool_upload(
+    file: UploadFile,
+    dest: Optional[Path] = None,
+    max_bytes: Optional[int] = None,
+) -> Tuple[Path, str]:
+    """
+    Copies an upload to dest (default: a fresh file in UPLOAD_DIR) in CHUNK_BYTES pieces,
+    hashing it on the way, so the request never holds the whole file in memory.
+    Returns (path, sha256 hex). Raises UploadTooLarge, leaving no partial file behind.
+    By now Starlette has already parsed the body; UploadLimitMiddleware keeps
+    oversized requests from getting that far, this check enforces the exact file size.
+    """
+    if max_bytes is None:
+        max_bytes = settings.MAX_UPLOAD_MB << 20
+    if dest is None:
+        dest = settings.UPLOAD_DIR / f"{uuid.uuid4()}.wav"
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with dest.open("wb") as f:
+            while True:
+                chunk = await file.read(CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes > 0 and size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        dest.unlink(missing_ok=True)
+        raise
+    return dest, digest.hexdigest()
+
+def file_key(path: Path) -> str:
+    """SHA-256 of a file on disk, read in chunks (same value as cache.audio_key of its bytes)."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -1,10 +1,74 @@
 from __future__ import annotations
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 import numpy as np
 import webrtcvad
 
-from .io_utils import float_to_int16_pcm
+from .io_utils import float_to_int16
+
+def _as_int16(wav: np.ndarray) -> np.ndarray:
+    # int16 input (e.g. a memory-mapped PCM WAV) is used as-is, without a copy
+    if wav.dtype == np.int16:
+        return np.ascontiguousarray(wav)
+    return float_to_int16(wav)
+
+def voiced_frame_flags(pcm16: np.ndarray, sr: int, frame_ms: int = 30, aggressiveness: int = 2) -> np.ndarray:
+    """
+    Runs WebRTC VAD over consecutive frames of an int16 buffer.
+    Frames are zero-copy memoryview slices of the buffer. Returns a bool array, one flag per frame.
+    """
+    assert frame_ms in (10, 20, 30), "webrtcvad supports 10/20/30ms frames"
+    vad = webrtcvad.Vad(int(aggressiveness))
+    frame_bytes = int(sr * (frame_ms / 1000.0)) * 2  # int16
+    buf = memoryview(pcm16).cast("B")
+    n_frames = len(buf) // frame_bytes
+    is_speech = vad.is_speech
+    return np.fromiter(
+        (is_speech(buf[i:i + frame_bytes], sr) for i in range(0, n_frames * frame_bytes, frame_bytes)),
+        dtype=bool,
+        count=n_frames,
+    )
+
+def _runs(flags: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) frame indices of each run of True."""
+    edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def flags_to_segments(
+    flags: np.ndarray,
+    frame_ms: int = 30,
+    min_seg_dur: float = 0.5,
+    merge_gap: float = 0.2,
+    padding_ms: int = 0,
+    hangover_ms: int = 0,
+) -> List[Tuple[float, float]]:
+    """
+    Vectorised run-length detection + gap merging on per-frame VAD flags.
+    padding_ms extends each run backwards (pre-roll), hangover_ms forwards; both are
+    rounded to whole frames and clipped to the signal.
+    """
+    starts, ends = _runs(np.asarray(flags, dtype=bool))
+    if len(starts) == 0:
+        return []
+
+    if padding_ms or hangover_ms:
+        starts = np.maximum(starts - int(round(padding_ms / frame_ms)), 0)
+        ends = np.minimum(ends + int(round(hangover_ms / frame_ms)), len(flags))
+
+    t0 = starts * frame_ms / 1000.0
+    t1 = ends * frame_ms / 1000.0
+
+    # Merge small gaps (<= merge_gap); padded runs that overlap merge as well
+    new_group = np.empty(len(t0), dtype=bool)
+    new_group[0] = True
+    new_group[1:] = (t0[1:] - t1[:-1]) > merge_gap
+    first = np.flatnonzero(new_group)
+    m0 = t0[first]
+    m1 = np.maximum.reduceat(t1, first)
+
+    # Remove too-short segments
+    keep = (m1 - m0) >= min_seg_dur
+    return list(zip(m0[keep].tolist(), m1[keep].tolist()))
 
 def detect_voiced_segments(
     wav: np.ndarray,
@@ -13,55 +77,123 @@ def detect_voiced_segments(
     aggressiveness: int = 2,
     min_seg_dur: float = 0.5,
     merge_gap: float = 0.2,
+    padding_ms: int = 0,
+    hangover_ms: int = 0,
 ) -> List[Tuple[float, float]]:
     """
     Returns a list of (t0, t1) voiced segments in seconds using WebRTC VAD.
 
-    - Assumes wav is mono float32 at sr=16k ideally (function works at any sr; VAD requires 8k/16k/32k/48k; we use 16k).
+    - Assumes wav is mono at sr=16k ideally (function works at any sr; VAD requires 8k/16k/32k/48k; we use 16k).
+      float32 [-1, 1] is converted to int16 once; int16 input is framed in place.
     - frame_ms must be one of {10,20,30}.
+    - padding_ms / hangover_ms optionally widen each voiced run before merging.
     """
-    assert frame_ms in (10, 20, 30), "webrtcvad supports 10/20/30ms frames"
-    vad = webrtcvad.Vad(int(aggressiveness))
-    pcm = float_to_int16_pcm(wav)
-    bytes_per_sample = 2  # int16
-    frame_bytes = int(sr * (frame_ms / 1000.0)) * bytes_per_sample
-    n_frames = len(pcm) // frame_bytes
-
-    flags = []
-    for i in range(n_frames):
-        start_b = i * frame_bytes
-        frame = pcm[start_b : start_b + frame_bytes]
-        is_speech = vad.is_speech(frame, sr)
-        flags.append(1 if is_speech else 0)
-
-    # Merge contiguous speech frames into segments
-    segments: List[Tuple[float, float]] = []
-    i = 0
-    while i < n_frames:
-        if flags[i] == 1:
-            start_i = i
-            while i < n_frames and flags[i] == 1:
-                i += 1
-            end_i = i  # exclusive
-            t0 = start_i * frame_ms / 1000.0
-            t1 = end_i * frame_ms / 1000.0
-            segments.append((t0, t1))
-        else:
-            i += 1
-
-    # Merge small gaps (<merge_gap)
-    merged: List[Tuple[float, float]] = []
-    for s in segments:
-        if not merged:
-            merged.append(s)
-        else:
-            (p0, p1) = merged[-1]
-            (q0, q1) = s
-            if q0 - p1 <= merge_gap:
-                merged[-1] = (p0, q1)
-            else:
-                merged.append(s)
+    pcm16 = _as_int16(wav)
+    flags = voiced_frame_flags(pcm16, sr, frame_ms=frame_ms, aggressiveness=aggressiveness)
+    return flags_to_segments(
+        flags,
+        frame_ms=frame_ms,
+        min_seg_dur=min_seg_dur,
+        merge_gap=merge_gap,
+        padding_ms=padding_ms,
+        hangover_ms=hangover_ms,
+    )
 
-    # Remove too-short segments
-    filtered = [(a, b) for (a, b) in merged if (b - a) >= min_seg_dur]
-    return filtered
+# -------- Streaming (frame-by-frame) VAD --------
+
+class StreamingVad:
+    """
+    Incremental WebRTC VAD over a live stream of 16-bit mono PCM.
+
+    push() consumes arbitrary-sized byte chunks and returns the voiced regions that
+    closed during that call as (t0, t1, pcm) with pcm an int16 array. A region closes
+    once silence exceeds merge_gap (same gap semantics as detect_voiced_segments) or
+    it reaches max_region_sec; regions shorter than min_seg_dur are dropped.
+    """
+
+    def __init__(
+        self,
+        sr: int = 16000,
+        frame_ms: int = 30,
+        aggressiveness: int = 2,
+        min_seg_dur: float = 0.5,
+        merge_gap: float = 0.2,
+        max_region_sec: float = 30.0,
+    ):
+        assert frame_ms in (10, 20, 30), "webrtcvad supports 10/20/30ms frames"
+        self.sr = sr
+        self.frame_ms = frame_ms
+        self.min_seg_dur = min_seg_dur
+        self._vad = webrtcvad.Vad(int(aggressiveness))
+        self._frame_bytes = int(sr * frame_ms / 1000) * 2
+        # close after more than merge_gap of silence
+        self._hangover = int(merge_gap * 1000 / frame_ms + 1e-9) + 1
+        self._max_frames = max(1, int(max_region_sec * 1000 / frame_ms))
+        self._pending = bytearray()  # bytes not yet forming a full frame
+        self._frame_idx = 0          # index of the next frame to process
+        self._region = bytearray()   # PCM since region start (incl. trailing silence)
+        self._start_idx: int = -1    # first frame of the open region, -1 if none
+        self._last_voiced: int = -1  # last voiced frame of the open region
+
+    @property
+    def in_speech(self) -> bool:
+        return self._start_idx >= 0
+
+    def current_region(self) -> Optional[Tuple[float, float, np.ndarray]]:
+        """The open region so far (for partial results), or None."""
+        if not self.in_speech:
+            return None
+        return self._region_tuple(self._last_voiced + 1)
+
+    def _region_tuple(self, end_idx: int) -> Tuple[float, float, np.ndarray]:
+        n = (end_idx - self._start_idx) * self._frame_bytes
+        pcm = np.frombuffer(bytes(self._region[:n]), dtype=np.int16)
+        t0 = self._start_idx * self.frame_ms / 1000.0
+        t1 = end_idx * self.frame_ms / 1000.0
+        return t0, t1, pcm
+
+    def _close(self, out: List[Tuple[float, float, np.ndarray]]) -> None:
+        t0, t1, pcm = self._region_tuple(self._last_voiced + 1)
+        if (t1 - t0) >= self.min_seg_dur:
+            out.append((t0, t1, pcm))
+        self._region = bytearray()
+        self._start_idx = -1
+        self._last_voiced = -1
+
+    def push(self, pcm_bytes: bytes) -> List[Tuple[float, float, np.ndarray]]:
+        closed: List[Tuple[float, float, np.ndarray]] = []
+        self._pending.extend(pcm_bytes)
+        fb = self._frame_bytes
+        n_frames = len(self._pending) // fb
+        if n_frames == 0:
+            return closed
+        data = bytes(self._pending[: n_frames * fb])
+        del self._pending[: n_frames * fb]
+        view = memoryview(data)
+        for k in range(n_frames):
+            frame = view[k * fb:(k + 1) * fb]
+            idx = self._frame_idx
+            self._frame_idx += 1
+            speech = self._vad.is_speech(frame, self.sr)
+            if self.in_speech:
+                self._region.extend(frame)
+                if speech:
+                    self._last_voiced = idx
+                if idx - self._last_voiced >= self._hangover:
+                    self._close(closed)
+                elif idx - self._start_idx + 1 >= self._max_frames:
+                    self._last_voiced = idx
+                    self._close(closed)
+            elif speech:
+                self._start_idx = idx
+                self._last_voiced = idx
+                self._region.extend(frame)
+        return closed
+
+    def flush(self) -> List[Tuple[float, float, np.ndarray]]:
+        """Closes the open region at end of stream."""
+        closed: List[Tuple[float, float, np.ndarray]] = []
+        if self.in_speech:
+            self._close(closed)
+        self._pending = bytearray()
+        return closed
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import logging
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from .asr import get_model, transcribe, warmup_profiles
+from .embeddings import embed_segments
+
+logger = logging.getLogger(__name__)
+
+_ready: bool = False
+_error: Optional[str] = None
+_warmup_sec: Dict[str, float] = {}
+
+def _synthetic_speech(sr: int, seconds: float = 2.0) -> np.ndarray:
+    # Harmonic-rich, amplitude-modulated tone: enough to exercise the full model graphs
+    t = np.arange(int(sr * seconds), dtype=np.float32) / sr
+    f0 = 140.0
+    x = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 8))
+    x *= 0.5 * (1.0 + np.sin(2 * np.pi * 3.0 * t))
+    return (0.1 * x / np.max(np.abs(x))).astype(np.float32)
+
+def warm_up(models: Optional[List[str]] = None) -> Dict[str, float]:
+    """
+    Loads the ECAPA classifier and every configured Whisper model in each compute type
+    the ASR profiles use, then runs one short synthetic inference through each so the
+    first real request does not pay for lazy initialisation, whatever its profile.
+    Returns seconds spent per model (load + warm-up inference, summed over compute types).
+    """
+    sr = settings.SAMPLE_RATE
+    wav = _synthetic_speech(sr)
+    timings: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    embed_segments(wav, sr, [(0.0, len(wav) / sr)])
+    timings["ecapa"] = time.perf_counter() - t0
+
+    for name in models or settings.whisper_models:
+        t0 = time.perf_counter()
+        for profile in warmup_profiles():
+            get_model(name, profile)
+            transcribe(wav, language=settings.LANGUAGE, word_timestamps=False, sr=sr, model_name=name, profile=profile)
+        timings[f"whisper:{name}"] = time.perf_counter() - t0
+    return timings
+
+def warm_up_worker() -> None:
+    """Process-pool initializer: every worker process loads and warms its own models."""
+    try:
+        warm_up()
+    except Exception:
+        logger.exception("model warm-up failed in worker process")
+
+def mark_ready(timings: Optional[Dict[str, float]] = None) -> None:
+    global _ready, _error
+    _warmup_sec.update(timings or {})
+    _ready = True
+    _error = None
+    if timings:
+        logger.info("models warmed up: %s", ", ".join(f"{k}={v:.1f}s" for k, v in timings.items()))
+
+def mark_failed(error: str) -> None:
+    global _ready, _error
+    _ready = False
+    _error = error
+
+def is_ready() -> bool:
+    return _ready
+
+def readiness() -> Dict:
+    return {
+        "ready": _ready,
+        "error": _error,
+        "models": [k.split(":", 1)[1] for k in _warmup_sec if k.startswith("whisper:")],
+        "warmup_sec": dict(_warmup_sec),
+    }
@@ -4,10 +4,9 @@ from typing import Iterator
 
 @contextmanager
 def stopwatch() -> Iterator[float]:
-    start = time.time()
+    # perf_counter: monotonic and high resolution, unlike time.time(); callers compute perf_counter() - start
+    start = time.perf_counter()
     yield start
-    end = time.time()
-    # no automatic print; callers compute end-start
 
 def seconds() -> float:
     return time.time()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""
+Alignment benchmark on synthetic session-length inputs.
+
+    python -m benchmarks.align_bench --minutes 60
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+from app.services.align import DiarIndex, _assign_label_by_overlap, assign_speakers_to_words
+
+def synth_session(minutes: float, seed: int = 0) -> Tuple[List[Tuple[float, float, str]], List[Dict]]:
+    """
+    Returns (diar_segments, whisper_segments) for a session of the given length:
+    ~1k diarization turns and ~10k words per hour, with pauses between turns.
+    """
+    rng = random.Random(seed)
+    total = minutes * 60.0
+    diar: List[Tuple[float, float, str]] = []
+    t = 0.0
+    while t < total:
+        d = rng.uniform(0.8, 5.5)
+        diar.append((t, min(total, t + d), rng.choice(["COACH", "JONGERE", "OTHER_2"])))
+        t += d + rng.uniform(0.05, 1.2)
+
+    whisper: List[Dict] = []
+    words: List[Dict] = []
+    t = 0.0
+    while t < total:
+        d = rng.uniform(0.12, 0.6)
+        words.append({"word": f"w{len(words)}", "start": t, "end": min(total, t + d)})
+        t += d + rng.uniform(0.0, 0.25)
+        if len(words) == 15:
+            whisper.append({"start": words[0]["start"], "end": words[-1]["end"],
+                            "text": " ".join(w["word"] for w in words), "words": words})
+            words = []
+    if words:
+        whisper.append({"start": words[0]["start"], "end": words[-1]["end"],
+                        "text": " ".join(w["word"] for w in words), "words": words})
+    return diar, whisper
+
+def run(minutes: float, seed: int = 0) -> Dict:
+    diar, whisper = synth_session(minutes, seed)
+    spans = [(w["start"], w["end"]) for s in whisper for w in s["words"]]
+
+    t0 = time.perf_counter()
+    linear = [_assign_label_by_overlap(a, b, diar) for (a, b) in spans]
+    linear_sec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    index = DiarIndex(diar)
+    indexed = [index.label(a, b) for (a, b) in spans]
+    indexed_sec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    utts = assign_speakers_to_words(diar, whisper)
+    assign_sec = time.perf_counter() - t0
+
+    return {
+        "minutes": minutes,
+        "diar_segments": len(diar),
+        "words": len(spans),
+        "utterances": len(utts),
+        "linear_label_sec": linear_sec,
+        "indexed_label_sec": indexed_sec,
+        "speedup": linear_sec / max(indexed_sec, 1e-9),
+        "assign_speakers_to_words_sec": assign_sec,
+        "labels_identical": linear == indexed,
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark speaker-to-word alignment")
+    ap.add_argument("--minutes", type=float, nargs="+", default=[60.0], help="Synthetic session lengths (default: 60)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="Optional path to write results as JSON")
+    args = ap.parse_args()
+
+    results = [run(m, args.seed) for m in args.minutes]
+    for r in results:
+        print(f"[align] {r['minutes']:.0f} min: {r['words']} words × {r['diar_segments']} segments  "
+              f"linear={r['linear_label_sec']:.3f}s indexed={r['indexed_label_sec']:.3f}s "
+              f"(×{r['speedup']:.0f})  assign={r['assign_speakers_to_words_sec']:.3f}s  "
+              f"identical={r['labels_identical']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""
+ASR decoding profiles: latency vs accuracy on one recording.
+
+    python -m benchmarks.asr_bench --wav session.wav --profiles fast balanced accurate
+    python -m benchmarks.asr_bench --wav session.wav --reference session.txt --json asr.json
+
+Each profile transcribes the same audio (after one warm-up decode of the first
+seconds) and reports wall time, real-time factor, speed-up over `balanced` and word
+error rate against --reference, or against the `accurate` output when no reference
+transcript is given. Needs the Whisper model(s) installed locally.
+"""
+from __future__ import annotations
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.asr import PROFILES, get_model, transcribe, transcribe_voiced
+from app.services.io_utils import load_audio_mmap
+from app.services.vad import detect_voiced_segments
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+(?:'\w+)?", text.lower())
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance divided by the reference length (case and punctuation ignored)."""
+    ref, hyp = _words(reference), _words(hypothesis)
+    if not ref:
+        return float(len(hyp) > 0)
+    vocab: Dict[str, int] = {}
+    ref_ids = [vocab.setdefault(w, len(vocab)) for w in ref]
+    hyp_ids = np.array([vocab.setdefault(w, len(vocab)) for w in hyp], dtype=np.int64)
+    offsets = np.arange(len(hyp) + 1)
+    prev = offsets.copy()
+    for i, r in enumerate(ref_ids, 1):
+        # substitution/deletion first, then insertions as a running minimum along the row:
+        # cur[j] = min_k<=j (best[k] + j - k)
+        best = np.empty_like(prev)
+        best[0] = i
+        best[1:] = np.minimum(prev[:-1] + (hyp_ids != r), prev[1:] + 1)
+        prev = np.minimum.accumulate(best - offsets) + offsets
+    return float(prev[-1]) / len(ref)
+
+def run(wav_path: Path, profiles: List[str], model: Optional[str], language: str, asr_mode: str,
+        reference: Optional[str] = None) -> List[Dict]:
+    wav, sr = load_audio_mmap(wav_path, target_sr=settings.SAMPLE_RATE)
+    audio_sec = len(wav) / sr
+    segments = detect_voiced_segments(wav, sr, frame_ms=settings.VAD_FRAME_MS, aggressiveness=2,
+                                      min_seg_dur=settings.MIN_SEG_DUR, merge_gap=settings.MERGE_GAP)
+    results: List[Dict] = []
+    texts: Dict[str, str] = {}
+    for name in profiles:
+        t0 = time.perf_counter()
+        get_model(model, name)
+        load_sec = time.perf_counter() - t0
+        transcribe(wav[: 5 * sr], language=language, word_timestamps=False, sr=sr, model_name=model, profile=name)
+
+        t0 = time.perf_counter()
+        if asr_mode == "voiced":
+            segs = transcribe_voiced(wav, sr, segments, language=language, model_name=model, profile=name)
+        else:
+            segs = transcribe(wav, language=language, sr=sr, model_name=model, profile=name)
+        wall = time.perf_counter() - t0
+        texts[name] = " ".join(s["text"] for s in segs)
+        results.append({
+            "profile": name,
+            **{k: v for k, v in PROFILES[name]._asdict().items() if k != "name"},
+            "model": model or settings.WHISPER_MODEL,
+            "asr_mode": asr_mode,
+            "audio_sec": audio_sec,
+            "load_sec": load_sec,
+            "wall_sec": wall,
+            "rtf": wall / max(audio_sec, 1e-9),
+            "n_words": len(_words(texts[name])),
+        })
+
+    base = next((r["wall_sec"] for r in results if r["profile"] == "balanced"), None)
+    ref_text = reference if reference is not None else texts.get("accurate")
+    for r in results:
+        r["speedup_vs_balanced"] = base / r["wall_sec"] if base else None
+        r["wer"] = word_error_rate(ref_text, texts[r["profile"]]) if ref_text is not None else None
+        r["wer_reference"] = "transcript" if reference is not None else ("accurate" if ref_text else None)
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="Compare ASR decoding profiles on one recording")
+    ap.add_argument("--wav", required=True, help="Speech recording to transcribe")
+    ap.add_argument("--reference", help="Reference transcript (plain text) for WER")
+    ap.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    ap.add_argument("--model", default=settings.WHISPER_MODEL, help="Whisper model size (default: %(default)s)")
+    ap.add_argument("--lang", default=settings.LANGUAGE, help="Language code (default: %(default)s)")
+    ap.add_argument("--asr_mode", choices=["full", "voiced"], default=settings.ASR_MODE)
+    ap.add_argument("--json", help="Optional path to write results as JSON")
+    args = ap.parse_args(argv)
+
+    reference = Path(args.reference).read_text() if args.reference else None
+    results = run(Path(args.wav), args.profiles, args.model, args.lang, args.asr_mode, reference)
+    for r in results:
+        speedup = f"x{r['speedup_vs_balanced']:.2f}" if r["speedup_vs_balanced"] else "-"
+        wer = f"{100 * r['wer']:.1f}% (vs {r['wer_reference']})" if r["wer"] is not None else "-"
+        print(f"[asr] {r['profile']:<9} wall={r['wall_sec']:.1f}s rtf={r['rtf']:.3f} {speedup:<6} "
+              f"words={r['n_words']} wer={wer}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
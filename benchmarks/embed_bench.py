@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Speaker-embedding throughput per ECAPA backend, with parity against eager PyTorch.
+
+    python -m benchmarks.embed_bench --minutes 10 --backends speechbrain torchscript onnx quantized
+    python -m benchmarks.embed_bench --random   # random weights, when the model is not installed
+
+Runs embed_segments() over the VAD segments of a synthetic session once per backend
+and reports embeddings/sec and the lowest cosine to the speechbrain embeddings.
+"""
+from __future__ import annotations
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import torch
+
+from app.config import settings
+from app.services import embeddings
+from app.services.embed_backends import BACKENDS, load_backend
+from app.services.io_utils import load_audio
+from app.services.vad import detect_voiced_segments
+from benchmarks.synth import write_session
+
+def random_classifier():
+    """EncoderClassifier with the voxceleb ECAPA layout and random weights."""
+    from speechbrain.lobes.features import Fbank
+    from speechbrain.lobes.models.ECAPA_TDNN import ECAPA_TDNN
+    from speechbrain.processing.features import InputNormalization
+    from speechbrain.pretrained import EncoderClassifier
+
+    torch.manual_seed(0)
+    clf = EncoderClassifier(modules={
+        "compute_features": Fbank(n_mels=80),
+        "mean_var_norm": InputNormalization(norm_type="sentence", std_norm=False),
+        "embedding_model": ECAPA_TDNN(80, lin_neurons=192),
+    }, hparams={})
+    clf.eval()
+    return clf
+
+def run(backends: List[str], minutes: float, random_weights: bool, seed: int = 0) -> List[Dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        session = write_session(Path(tmp) / "session.wav", minutes, seed=seed)
+        wav, sr = load_audio(session.path, target_sr=settings.SAMPLE_RATE)
+        segments = detect_voiced_segments(wav, sr, frame_ms=settings.VAD_FRAME_MS, aggressiveness=2,
+                                          min_seg_dur=settings.MIN_SEG_DUR, merge_gap=settings.MERGE_GAP)
+
+        if random_weights:
+            clf, model_dir = random_classifier(), Path(tmp)
+        else:
+            settings.EMBED_BACKEND = "speechbrain"
+            clf, model_dir = embeddings.get_classifier(), settings.ecapa_local_path
+        eager = clf.mods.embedding_model
+        embeddings._classifier = clf
+
+        results: List[Dict] = []
+        reference: Optional[np.ndarray] = None
+        try:
+            for name in ["speechbrain"] + [b for b in backends if b != "speechbrain"]:
+                row: Dict = {"backend": name, "segments": len(segments), "audio_sec": len(wav) / sr}
+                try:
+                    t0 = time.perf_counter()
+                    clf.mods.embedding_model = load_backend(name, eager, model_dir)
+                    row["load_sec"] = time.perf_counter() - t0
+                    embeddings.embed_segments(wav, sr, segments[:8])  # warm-up
+                    t0 = time.perf_counter()
+                    embs = np.vstack(embeddings.embed_segments(wav, sr, segments))
+                    row["embed_sec"] = time.perf_counter() - t0
+                except Exception as e:
+                    row["error"] = f"{type(e).__name__}: {e}"
+                    results.append(row)
+                    continue
+                if reference is None:
+                    reference = embs
+                cos = (embs * reference).sum(1) / np.maximum(
+                    np.linalg.norm(embs, axis=1) * np.linalg.norm(reference, axis=1), 1e-9)
+                row["embeddings_per_sec"] = len(segments) / max(row["embed_sec"], 1e-9)
+                row["min_cosine"] = float(cos.min())
+                results.append(row)
+        finally:
+            clf.mods.embedding_model = eager
+            embeddings._classifier = None
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    ap = argparse.ArgumentParser(description="ECAPA embedding throughput per backend")
+    ap.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    ap.add_argument("--minutes", type=float, default=5.0, help="Length of the synthetic session (default: 5)")
+    ap.add_argument("--random", action="store_true", help="Use random ECAPA weights instead of the local model")
+    ap.add_argument("--threads", type=int, default=0, help="torch/ORT threads (default: torch default)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="Optional path to write results as JSON")
+    args = ap.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    results = run(args.backends, args.minutes, args.random, args.seed)
+    base = next((r["embed_sec"] for r in results if r["backend"] == "speechbrain" and "embed_sec" in r), None)
+    for r in results:
+        if "error" in r:
+            print(f"[embed] {r['backend']:<12} unavailable: {r['error']}")
+            continue
+        speedup = f"x{base / r['embed_sec']:.2f}" if base else ""
+        print(f"[embed] {r['backend']:<12} {r['embeddings_per_sec']:7.1f} emb/s  {speedup:<6} "
+              f"min cosine={r['min_cosine']:.5f}  load={r['load_sec']:.2f}s")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+Offline pipeline benchmark on synthetic multi-speaker sessions (no model weights needed).
+
+    python -m benchmarks.suite --minutes 1 10 60 --json bench.json
+    python -m benchmarks.suite --minutes 60 --compare bench.json
+
+Times load_audio, detect_voiced_segments, label_segments_with_coach, cluster_unknowns
+and assign_speakers_to_words; the encoder and ASR are stubs (see benchmarks/synth.py),
+reported separately. With --compare, stages that got slower than the baseline file by
+more than --tolerance are listed and the exit status is 1.
+"""
+from __future__ import annotations
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.align import assign_speakers_to_words
+from app.services.diarization import cluster_unknowns, label_segments_with_coach
+from app.services.io_utils import load_audio
+from app.services.vad import detect_voiced_segments
+from benchmarks.synth import ASRS, ENCODERS, speaker_vector, write_session
+
+TIMED = ("load_audio", "detect_voiced_segments", "label_segments_with_coach", "cluster_unknowns",
+         "assign_speakers_to_words")
+
+def _timed(results: Dict, name: str, fn: Callable, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    results[name] = time.perf_counter() - t0
+    return out
+
+def run(
+    minutes: float,
+    n_speakers: int = 3,
+    source_sr: int = 16000,
+    channels: int = 1,
+    encoder: str = "oracle",
+    asr: str = "stub",
+    seed: int = 0,
+    workdir: Optional[Path] = None,
+) -> Dict:
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        t0 = time.perf_counter()
+        session = write_session(Path(tmp) / "session.wav", minutes, n_speakers, source_sr, channels, seed)
+        synth_sec = time.perf_counter() - t0
+
+        sec: Dict[str, float] = {}
+        wav, sr = _timed(sec, "load_audio", load_audio, session.path, target_sr=settings.SAMPLE_RATE)
+
+    segments = _timed(sec, "detect_voiced_segments", detect_voiced_segments, wav, sr,
+                      frame_ms=settings.VAD_FRAME_MS, aggressiveness=2,
+                      min_seg_dur=settings.MIN_SEG_DUR, merge_gap=settings.MERGE_GAP)
+    encode = ENCODERS[encoder](session.turns, seed=seed)
+    embs = _timed(sec, "stub_encoder", encode, wav, sr, segments)
+    transcribe = ASRS[asr](seed=seed)
+    asr_segments = _timed(sec, "stub_asr", transcribe, wav, sr, segments)
+
+    labels = _timed(sec, "label_segments_with_coach", label_segments_with_coach,
+                    segments, embs, speaker_vector(encode, 0), thr=0.72)
+    labels = _timed(sec, "cluster_unknowns", cluster_unknowns, segments, embs, labels, max_speakers=n_speakers - 1)
+    diar = [(a, b, lab) for (a, b), lab in zip(segments, labels)]
+    utterances = _timed(sec, "assign_speakers_to_words", assign_speakers_to_words, diar, asr_segments,
+                        merge_gap=settings.MERGE_GAP, min_turn_dur=settings.MIN_SEG_DUR)
+
+    return {
+        "minutes": minutes,
+        "source_sr": source_sr,
+        "channels": channels,
+        "n_speakers": n_speakers,
+        "encoder": encoder,
+        "asr": asr,
+        "audio_sec": len(wav) / sr,
+        "n_turns": len(session.turns),
+        "n_segments": len(segments),
+        "n_words": sum(len(s["words"]) for s in asr_segments),
+        "n_utterances": len(utterances),
+        "coach_segments": int(sum(lab == "COACH" for lab in labels)),
+        "synth_sec": synth_sec,
+        "stage_sec": sec,
+        "timed_total_sec": sum(sec[k] for k in TIMED),
+    }
+
+def _environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "machine": platform.machine(), "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> List[str]:
+    """Regressions: stages slower than the baseline run of the same configuration by more than tolerance."""
+    config = lambda r: (r["minutes"], r["source_sr"], r["channels"], r["n_speakers"], r["encoder"], r["asr"])
+    base = {config(r): r for r in baseline}
+    out = []
+    for r in results:
+        b = base.get(config(r))
+        if b is None:
+            continue
+        for stage in TIMED:
+            new, old = r["stage_sec"][stage], b["stage_sec"].get(stage)
+            # ignore sub-10 ms stages: timer noise dominates
+            if old and max(new, old) > 0.01 and new > old * (1.0 + tolerance):
+                out.append(f"{r['minutes']:g} min {stage}: {old:.3f}s -> {new:.3f}s (x{new / old:.2f})")
+    return out
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Offline pipeline benchmark with synthetic audio and stub models")
+    ap.add_argument("--minutes", type=float, nargs="+", default=[1.0, 10.0, 60.0],
+                    help="Session lengths in minutes (default: 1 10 60; up to 120)")
+    ap.add_argument("--speakers", type=int, default=3, help="Speakers per session, coach included (default: 3)")
+    ap.add_argument("--source_sr", type=int, default=16000, help="Sample rate of the synthetic WAV (default: 16000)")
+    ap.add_argument("--channels", type=int, default=1, help="Channels of the synthetic WAV (default: 1)")
+    ap.add_argument("--encoder", choices=sorted(ENCODERS), default="oracle")
+    ap.add_argument("--asr", choices=sorted(ASRS), default="stub")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--json", help="Write results (plus commit and environment) to this file")
+    ap.add_argument("--compare", help="Baseline JSON from an earlier run to check for regressions")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (default: 0.25)")
+    args = ap.parse_args(argv)
+
+    results = []
+    for m in args.minutes:
+        r = run(m, args.speakers, args.source_sr, args.channels, args.encoder, args.asr, args.seed)
+        results.append(r)
+        stages = "  ".join(f"{k}={v:.3f}s" for k, v in r["stage_sec"].items())
+        print(f"[bench] {m:g} min: {r['n_segments']} segments, {r['n_words']} words  {stages}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": _environment(), "results": results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"[bench] REGRESSION {line}")
+        if regressions:
+            return 1
+        print("[bench] no regressions against", args.compare)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+"""
+Synthetic multi-speaker sessions and stub models for the offline benchmarks.
+
+Each speaker is a harmonic "voice" with its own pitch and spectral tilt, spoken in
+syllable-rate bursts, so WebRTC VAD sees speech and silence where a real session
+would have them. The stub encoder and ASR stand in for ECAPA and Whisper with the
+same call signatures as embed_segments() and transcribe(), so the pure-Python
+stages around them can be timed at scale without model weights.
+"""
+from __future__ import annotations
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import soundfile as sf
+
+Turn = Tuple[float, float, int]  # (start, end, speaker index)
+
+class Session(NamedTuple):
+    path: Path
+    sr: int
+    duration: float
+    turns: List[Turn]
+    n_speakers: int
+
+def synth_turns(minutes: float, n_speakers: int = 3, seed: int = 0) -> List[Turn]:
+    """Turn-taking script: speaker 0 (the coach) talks about half the time, turns of 0.8-8 s."""
+    rng = np.random.default_rng(seed)
+    total = minutes * 60.0
+    weights = np.array([0.5] + [0.5 / max(1, n_speakers - 1)] * (n_speakers - 1))
+    turns: List[Turn] = []
+    t = rng.uniform(0.2, 1.0)
+    prev = -1
+    while t < total - 0.5:
+        spk = int(rng.choice(n_speakers, p=weights / weights.sum()))
+        if spk == prev and n_speakers > 1:
+            spk = (spk + 1) % n_speakers
+        d = float(rng.uniform(0.8, 8.0))
+        turns.append((t, min(total, t + d), spk))
+        prev = spk
+        t += d + float(rng.uniform(0.3, 1.5))
+    return turns
+
+def _voice(n: int, sr: int, f0: float, tilt: float, rng: np.random.Generator) -> np.ndarray:
+    """n samples of a buzzy harmonic voice with vibrato and 4-6 Hz syllable bursts."""
+    t = np.arange(n, dtype=np.float64) / sr
+    pitch = f0 * (1.0 + 0.03 * np.sin(2 * np.pi * rng.uniform(3, 6) * t))
+    phase = 2 * np.pi * np.cumsum(pitch) / sr
+    x = np.zeros(n, dtype=np.float64)
+    for k in range(1, int(min(30, 3800 // f0))):
+        x += (k ** -tilt) * np.sin(k * phase)
+    envelope = np.clip(np.sin(2 * np.pi * rng.uniform(4, 6) * t + rng.uniform(0, np.pi)), 0.0, None) ** 0.5
+    x *= 0.25 * envelope / max(1e-9, np.abs(x).max())
+    x += 0.003 * rng.standard_normal(n)
+    return x.astype(np.float32)
+
+def write_session(
+    path: Path,
+    minutes: float,
+    n_speakers: int = 3,
+    sr: int = 16000,
+    channels: int = 1,
+    seed: int = 0,
+) -> Session:
+    """
+    Renders a session straight to a 16-bit WAV, turn by turn, so even two hours at
+    44.1 kHz never sit in memory as a whole.
+    """
+    rng = np.random.default_rng(seed + 1)
+    turns = synth_turns(minutes, n_speakers, seed)
+    voices = [(float(rng.uniform(95, 240)), float(rng.uniform(0.6, 1.6))) for _ in range(n_speakers)]
+    total = int(minutes * 60.0 * sr)
+    pos = 0
+    with sf.SoundFile(str(path), "w", samplerate=sr, channels=channels, subtype="PCM_16") as f:
+        def write(x: np.ndarray) -> None:
+            f.write(np.repeat(x[:, None], channels, axis=1) if channels > 1 else x)
+
+        for t0, t1, spk in turns:
+            a, b = int(t0 * sr), int(t1 * sr)
+            write(0.002 * rng.standard_normal(a - pos).astype(np.float32))
+            write(_voice(b - a, sr, *voices[spk], rng))
+            pos = b
+        write(0.002 * rng.standard_normal(max(0, total - pos)).astype(np.float32))
+    return Session(path, sr, total / sr, turns, n_speakers)
+
+# -------- Stub models --------
+
+def _majority_speaker(turns: Sequence[Turn], starts: np.ndarray, t0: float, t1: float) -> int:
+    """Speaker with the most overlap with [t0, t1] (turns are sorted and disjoint)."""
+    i = max(0, int(np.searchsorted(starts, t0, side="right")) - 1)
+    best, best_ov = -1, 0.0
+    while i < len(turns) and turns[i][0] < t1:
+        ov = min(t1, turns[i][1]) - max(t0, turns[i][0])
+        if ov > best_ov:
+            best, best_ov = turns[i][2], ov
+        i += 1
+    return best
+
+def oracle_encoder(turns: Sequence[Turn], dim: int = 192, noise: float = 0.35, seed: int = 0) -> Callable:
+    """
+    embed_segments() stand-in: each segment gets its true speaker's vector plus noise
+    (a random direction for segments with no speaker), L2-normalised like ECAPA output.
+    """
+    rng = np.random.default_rng(seed)
+    n_spk = 1 + max((s for _, _, s in turns), default=0)
+    centres = rng.standard_normal((n_spk + 1, dim)).astype(np.float32)
+    centres /= np.linalg.norm(centres, axis=1, keepdims=True)
+    starts = np.array([a for a, _, _ in turns])
+
+    def encode(wav: np.ndarray, sr: int, segments: Sequence[Tuple[float, float]]) -> List[np.ndarray]:
+        out = []
+        for t0, t1 in segments:
+            spk = _majority_speaker(turns, starts, t0, t1)
+            v = centres[spk] + noise * rng.standard_normal(dim).astype(np.float32) / np.sqrt(dim)
+            out.append((v / np.linalg.norm(v)).astype(np.float32))
+        return out
+
+    encode.speaker_vector = lambda spk: centres[spk]
+    return encode
+
+def stub_asr(words_per_sec: float = 2.8, words_per_segment: int = 15, seed: int = 0) -> Callable:
+    """
+    transcribe_voiced()-style stand-in: fills the voiced regions with evenly paced
+    words and groups them into Whisper-like segments with word timestamps.
+    """
+    rng = np.random.default_rng(seed)
+
+    def transcribe(wav: np.ndarray, sr: int, segments: Sequence[Tuple[float, float]], **_: object) -> List[Dict]:
+        out: List[Dict] = []
+        words: List[Dict] = []
+        n = 0
+
+        def flush() -> None:
+            if words:
+                out.append({"start": words[0]["start"], "end": words[-1]["end"],
+                            "text": " ".join(w["word"] for w in words), "words": list(words)})
+                words.clear()
+
+        for t0, t1 in segments:
+            t = t0
+            step = 1.0 / words_per_sec
+            while t + 0.1 < t1:
+                d = float(rng.uniform(0.4, 0.9)) * step
+                words.append({"word": f"w{n}", "start": t, "end": min(t1, t + d)})
+                n += 1
+                t += step
+                if len(words) >= words_per_segment:
+                    flush()
+            flush()
+        return out
+
+    return transcribe
+
+ENCODERS: Dict[str, Callable[..., Callable]] = {"oracle": oracle_encoder}
+ASRS: Dict[str, Callable[..., Callable]] = {"stub": stub_asr}
+
+def speaker_vector(encoder: Callable, speaker: int) -> Optional[np.ndarray]:
+    """Enrolled-voice vector for a speaker, when the encoder can provide one."""
+    fn = getattr(encoder, "speaker_vector", None)
+    return None if fn is None else np.asarray(fn(speaker), dtype=np.float32)
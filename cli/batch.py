@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+"""
+Batch diarization + transcription over a directory of WAVs or a JSONL manifest.
+
+    python -m cli.batch --input /data/sessions --out_dir /data/out --workers 4
+    python -m cli.batch --input manifest.jsonl --out_dir /data/out
+
+Manifest lines: {"wav": "path.wav", "out": "optional.json", "lang": ..., "thr": ..., "max_speakers": ...,
+                 "profile": ..., "coach_ids": [...], "top_k": ...}
+Each worker process loads the models once and handles many files; files whose
+output already exists are skipped, so an interrupted run can simply be restarted.
+"""
+from __future__ import annotations
+import argparse
+import json
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from app.config import settings
+
+def _items_from_dir(root: Path, out_dir: Path, pattern: str) -> List[Dict]:
+    items = []
+    for wav in sorted(root.rglob(pattern)):
+        rel = wav.relative_to(root).with_suffix(".json")
+        items.append({"wav": str(wav), "out": str(out_dir / rel)})
+    return items
+
+def _items_from_manifest(path: Path, out_dir: Path) -> List[Dict]:
+    """
+    Manifest entries without "out" are written under out_dir at their path relative to
+    the common folder of all the manifest's WAVs, so same-named files in different
+    folders do not share an output. Duplicate output paths are rejected.
+    """
+    items = []
+    with path.open() as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if "wav" not in item:
+                raise SystemExit(f"{path}:{n}: manifest entry without 'wav'")
+            items.append(item)
+
+    if items:
+        root = Path(os.path.commonpath([str(Path(it["wav"]).resolve().parent) for it in items]))
+        for item in items:
+            rel = Path(item["wav"]).resolve().relative_to(root).with_suffix(".json")
+            item.setdefault("out", str(out_dir / rel))
+
+    seen: Dict[str, str] = {}
+    for item in items:
+        out = str(Path(item["out"]).resolve())
+        if out in seen:
+            raise SystemExit(f"{path}: {seen[out]} and {item['wav']} would both write {item['out']}")
+        seen[out] = item["wav"]
+    return items
+
+# -------- Worker process --------
+
+_opts: Dict = {}
+
+def _init_worker(opts: Dict, threads: int) -> None:
+    """Pool initializer: bound the threads of this process and load the models once."""
+    import torch
+    from app.services.asr import get_model
+    from app.services.embeddings import get_classifier
+
+    _opts.update(opts)
+    torch.set_num_threads(max(1, threads))
+    settings.ASR_CPU_THREADS = max(1, threads)
+    try:
+        get_classifier()
+        get_model(opts.get("model"), opts.get("profile"))
+    except Exception as e:
+        # an exception here would only surface as BrokenProcessPool; report it per file instead
+        _opts["init_error"] = f"{type(e).__name__}: {e}"
+
+def _run_one(item: Dict) -> Dict:
+    from cli.demo_batch import process_file
+
+    t0 = time.perf_counter()
+    out_path = Path(item["out"])
+    try:
+        if "init_error" in _opts:
+            raise RuntimeError(f"model loading failed: {_opts['init_error']}")
+        out = process_file(
+            Path(item["wav"]),
+            lang=item.get("lang", _opts["lang"]),
+            thr=float(item.get("thr", _opts["thr"])),
+            max_speakers=int(item.get("max_speakers", _opts["max_speakers"])),
+            word_timestamps=_opts["word_timestamps"],
+            model=_opts.get("model"),
+            asr_mode=_opts["asr_mode"],
+            log=lambda msg: None,
+            profile=item.get("profile", _opts.get("profile")),
+            coach_ids=item.get("coach_ids", _opts.get("coach_ids")),
+            top_k=int(item.get("top_k", _opts.get("top_k", settings.SPEAKER_TOP_K))),
+        )
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out_path.with_suffix(out_path.suffix + ".tmp")
+        tmp.write_text(json.dumps(out, ensure_ascii=False, indent=2))
+        tmp.replace(out_path)
+        return {"wav": item["wav"], "out": str(out_path), "status": "ok",
+                "audio_sec": out["metrics"]["audio_sec"], "processing_sec": time.perf_counter() - t0}
+    except Exception as e:
+        return {"wav": item["wav"], "out": str(out_path), "status": "failed",
+                "error": f"{type(e).__name__}: {e}", "processing_sec": time.perf_counter() - t0}
+
+# -------- Driver --------
+
+def main(argv: Optional[List[str]] = None):
+    from app.services.asr import PROFILES
+    from cli.demo_batch import parse_coach_ids
+
+    ap = argparse.ArgumentParser(description="Batch diarization + transcription (directory or JSONL manifest)")
+    ap.add_argument("--input", required=True, help="Directory of WAVs (searched recursively) or a .jsonl manifest")
+    ap.add_argument("--out_dir", required=True, help="Where per-file JSON results are written")
+    ap.add_argument("--glob", default="*.wav", help="File pattern in directory mode (default: %(default)s)")
+    ap.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1)")
+    ap.add_argument("--threads", type=int, default=0,
+                    help="CPU threads per worker (default: cores / workers)")
+    ap.add_argument("--overwrite", action="store_true", help="Re-process files whose output already exists")
+    ap.add_argument("--results", help="JSONL log of per-file results (default: <out_dir>/batch_results.jsonl)")
+    ap.add_argument("--lang", default=settings.LANGUAGE, help="Language code (default: %(default)s)")
+    ap.add_argument("--thr", type=float, default=settings.COACH_THRESHOLD,
+                    help="Coach similarity threshold (default: %(default)s)")
+    ap.add_argument("--coach_ids", help="Comma-separated enrolled coaches to match against (default: all)")
+    ap.add_argument("--top_k", type=int, default=settings.SPEAKER_TOP_K,
+                    help="Enrolled-speaker matches kept per segment (default: %(default)s)")
+    ap.add_argument("--max_speakers", type=int, default=2, help="Max non-coach speakers (default: 2)")
+    ap.add_argument("--no_words", action="store_true", help="Disable word timestamps")
+    ap.add_argument("--model", default=settings.WHISPER_MODEL, help="Whisper model size (default: %(default)s)")
+    ap.add_argument("--asr_mode", choices=["full", "voiced"], default=settings.ASR_MODE,
+                    help="ASR over the whole file or only VAD regions (default: %(default)s)")
+    ap.add_argument("--profile", choices=list(PROFILES), default=settings.ASR_PROFILE,
+                    help="ASR decoding profile: fast | balanced | accurate (default: %(default)s)")
+    args = ap.parse_args(argv)
+
+    src = Path(args.input)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    items = _items_from_manifest(src, out_dir) if src.is_file() else _items_from_dir(src, out_dir, args.glob)
+
+    todo = [it for it in items if args.overwrite or not Path(it["out"]).exists()]
+    print(f"[batch] {len(items)} file(s), {len(items) - len(todo)} already done, {len(todo)} to process")
+    if not todo:
+        return
+
+    workers = max(1, min(args.workers, len(todo)))
+    threads = args.threads or max(1, (os.cpu_count() or 1) // workers)
+    opts = {
+        "lang": args.lang,
+        "thr": args.thr,
+        "max_speakers": args.max_speakers,
+        "word_timestamps": not args.no_words,
+        "model": args.model,
+        "asr_mode": args.asr_mode,
+        "profile": args.profile,
+        "coach_ids": parse_coach_ids(args.coach_ids),
+        "top_k": args.top_k,
+    }
+    results_path = Path(args.results) if args.results else out_dir / "batch_results.jsonl"
+
+    t0 = time.perf_counter()
+    audio_sec = 0.0
+    n_ok = n_failed = 0
+    # spawn: every worker starts clean and loads its own models in the initializer
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                             initializer=_init_worker, initargs=(opts, threads)) as pool, \
+            results_path.open("a") as log:
+        futures = [pool.submit(_run_one, it) for it in todo]
+        for fut in as_completed(futures):
+            res = fut.result()
+            log.write(json.dumps(res, ensure_ascii=False) + "\n")
+            log.flush()
+            if res["status"] == "ok":
+                n_ok += 1
+                audio_sec += res["audio_sec"]
+            else:
+                n_failed += 1
+            wall = time.perf_counter() - t0
+            print(f"[batch] {n_ok + n_failed}/{len(todo)} {res['status']} {res['wav']} "
+                  f"({res['processing_sec']:.1f}s)  throughput={audio_sec / max(wall, 1e-9):.1f} audio-h/wall-h"
+                  + (f"  {res['error']}" if res["status"] != "ok" else ""))
+
+    wall = time.perf_counter() - t0
+    print(f"[batch] done: ok={n_ok} failed={n_failed} audio={audio_sec / 3600:.2f}h wall={wall / 3600:.2f}h "
+          f"throughput={audio_sec / max(wall, 1e-9):.1f} audio-hours per wall-hour ({workers} worker(s) x {threads} thread(s))")
+
+if __name__ == "__main__":
+    main()
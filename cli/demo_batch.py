@@ -1,35 +1,49 @@
 #!/usr/bin/env python
 from __future__ import annotations
 import argparse
+import asyncio
 import json
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import time
+from typing import Callable, Dict, List, Optional
 
 from app.config import settings
-from app.services.io_utils import load_audio, save_temp_wav
+from app.services.io_utils import load_audio_mmap
 from app.services.vad import detect_voiced_segments
-from app.services.embeddings import embed_segments, load_coach_embedding
-from app.services.diarization import diarize
-from app.services.asr import transcribe as asr_transcribe, model_name_display
-from app.services.align import assign_speakers_to_words
+from app.services.embeddings import embed_segments
+from app.services.executor import StageRunner
+from app.services.speaker_store import get_speaker_store
+from app.services.asr import PROFILES, get_profile, transcribe as asr_transcribe, transcribe_voiced, model_name_display
+from app.routers.transcribe import diarize_and_align
 
-def main():
-    ap = argparse.ArgumentParser(description="Run diarization + transcription on a WAV")
-    ap.add_argument("--wav", required=True, help="Path to session WAV")
-    ap.add_argument("--out", required=True, help="Output JSON path")
-    ap.add_argument("--lang", default="nl", help="Language code (default: nl)")
-    ap.add_argument("--thr", type=float, default=0.72, help="Coach similarity threshold (default: 0.72)")
-    ap.add_argument("--max_speakers", type=int, default=2, help="Max non-coach speakers (default: 2)")
-    ap.add_argument("--no_words", action="store_true", help="Disable word timestamps")
-    args = ap.parse_args()
+# Post-ASR stages run through the same StageRunner code as /transcribe, on one local thread
+_stages = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-stage")
 
-    t0 = time.time()
+def process_file(
+    wav_path: Path,
+    lang: str = settings.LANGUAGE,
+    thr: float = settings.COACH_THRESHOLD,
+    max_speakers: int = 2,
+    word_timestamps: bool = True,
+    model: Optional[str] = None,
+    asr_mode: str = settings.ASR_MODE,
+    log: Callable[[str], None] = print,
+    profile: Optional[str] = None,
+    coach_ids: Optional[List[str]] = None,
+    top_k: int = settings.SPEAKER_TOP_K,
+) -> Dict:
+    """
+    Runs diarization + transcription on one WAV and returns the output JSON document.
+    Identification, diarization and alignment are diarize_and_align() from the
+    /transcribe router, so batch output matches the API for the same settings.
+    """
+    t0 = time.perf_counter()
 
-    wav_path = Path(args.wav)
-    wav, sr = load_audio(wav_path, target_sr=settings.SAMPLE_RATE, mono=True)
+    wav, sr = load_audio_mmap(wav_path, target_sr=settings.SAMPLE_RATE)
     duration = len(wav) / sr
-    print(f"[batch] audio: {wav_path} duration={duration:.2f}s")
+    log(f"[batch] audio: {wav_path} duration={duration:.2f}s")
 
     segments = detect_voiced_segments(
         wav, sr,
@@ -38,61 +52,87 @@ def main():
         min_seg_dur=settings.MIN_SEG_DUR,
         merge_gap=settings.MERGE_GAP,
     )
-    print(f"[batch] VAD segments: {len(segments)}")
+    log(f"[batch] VAD segments: {len(segments)}")
 
     embs = embed_segments(wav, sr, segments)
-    coach_emb = load_coach_embedding("COACH")
-    diar = diarize(segments, embs, coach_emb, thr=args.thr, max_speakers=args.max_speakers)
-    n_coach = sum(1 for _,_,lab in diar if lab == "COACH")
-    n_noncoach = len(diar) - n_coach
-    print(f"[batch] diarization: coach={n_coach} noncoach={n_noncoach}")
 
-    tmp = save_temp_wav(wav_path.read_bytes())
-    try:
+    # ASR on the same decoded buffer (no second decode of the file)
+    if asr_mode == "voiced":
+        asr_segments = transcribe_voiced(wav, sr, segments, language=lang, word_timestamps=word_timestamps,
+                                         model_name=model, profile=profile)
+    else:
         asr_segments = asr_transcribe(
-            audio_path=str(tmp),
-            language=args.lang,
-            word_timestamps=not args.no_words,
+            audio=wav,
+            language=lang,
+            word_timestamps=word_timestamps,
+            sr=sr,
+            model_name=model,
+            profile=profile,
         )
-    finally:
-        try:
-            tmp.unlink(missing_ok=True)
-        except Exception:
-            pass
 
-    utterances = assign_speakers_to_words(
-        diar_segments=diar,
-        whisper_segments=asr_segments,
-        merge_gap=settings.MERGE_GAP,
-        min_turn_dur=settings.MIN_SEG_DUR,
-    )
+    speakers, utterances, diar_segments, diar_stats = asyncio.run(diarize_and_align(
+        StageRunner(executor=_stages), segments, embs, asr_segments,
+        coach_threshold=thr, max_speakers=max_speakers, coach_ids=coach_ids, top_k=top_k,
+    ))
+    log(f"[batch] diarization: {diar_stats['method']}, {diar_stats['n_clusters']} non-coach cluster(s)")
 
-    # Build output JSON
-    out = {
+    # Build output JSON (the TranscribeResponse layout)
+    return {
         "session_id": str(uuid.uuid4()),
-        "language": args.lang,
-        "speakers": [
-            {"id": "COACH", "display": "Coach"},
-            {"id": "JONGERE", "display": "Jongere"},
-        ],
-        "utterances": [
-            {
-                "start": float(u["start"]),
-                "end": float(u["end"]),
-                "speaker": u["speaker"],
-                "text": u["text"],
-                "words": [
-                    {"w": w["w"], "start": float(w["start"]), "end": float(w["end"]), "speaker": w["speaker"]}
-                    for w in u.get("words", [])
-                ]
-            } for u in utterances
-        ],
+        "language": lang,
+        "speakers": [s.model_dump() for s in speakers],
+        "utterances": [u.model_dump() for u in utterances],
         "metrics": {
-            "processing_sec": float(time.time() - t0),
-            "model": model_name_display(),
-        }
+            "processing_sec": float(time.perf_counter() - t0),
+            "model": model_name_display(model),
+            "profile": get_profile(profile).name,
+            "audio_sec": float(duration),
+            "diarization": diar_stats,
+        },
+        "segments": None if diar_segments is None else [d.model_dump() for d in diar_segments],
     }
 
+def parse_coach_ids(value: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated enrolled names → list (None = every enrolled speaker); exits on unknown names."""
+    names = [n.strip() for n in value.split(",") if n.strip()] if value else None
+    if names:
+        unknown = sorted(set(names) - set(get_speaker_store().names()))
+        if unknown:
+            raise SystemExit(f"unknown coach_ids: {', '.join(unknown)}")
+    return names
+
+def main():
+    ap = argparse.ArgumentParser(description="Run diarization + transcription on a WAV")
+    ap.add_argument("--wav", required=True, help="Path to session WAV")
+    ap.add_argument("--out", required=True, help="Output JSON path")
+    ap.add_argument("--lang", default=settings.LANGUAGE, help="Language code (default: %(default)s)")
+    ap.add_argument("--thr", type=float, default=settings.COACH_THRESHOLD,
+                    help="Coach similarity threshold (default: %(default)s)")
+    ap.add_argument("--coach_ids", help="Comma-separated enrolled coaches to match against (default: all)")
+    ap.add_argument("--top_k", type=int, default=settings.SPEAKER_TOP_K,
+                    help="Enrolled-speaker matches kept per segment (default: %(default)s)")
+    ap.add_argument("--max_speakers", type=int, default=2, help="Max non-coach speakers (default: 2)")
+    ap.add_argument("--no_words", action="store_true", help="Disable word timestamps")
+    ap.add_argument("--model", default=settings.WHISPER_MODEL, help="Whisper model size (default: %(default)s)")
+    ap.add_argument("--asr_mode", choices=["full", "voiced"], default=settings.ASR_MODE,
+                    help="ASR over the whole file or only VAD regions in parallel chunks (default: %(default)s)")
+    ap.add_argument("--profile", choices=list(PROFILES), default=settings.ASR_PROFILE,
+                    help="ASR decoding profile: fast | balanced | accurate (default: %(default)s)")
+    args = ap.parse_args()
+
+    out = process_file(
+        Path(args.wav),
+        lang=args.lang,
+        thr=args.thr,
+        max_speakers=args.max_speakers,
+        word_timestamps=not args.no_words,
+        model=args.model,
+        asr_mode=args.asr_mode,
+        profile=args.profile,
+        coach_ids=parse_coach_ids(args.coach_ids),
+        top_k=args.top_k,
+    )
+
     out_path = Path(args.out)
     out_path.write_text(json.dumps(out, ensure_ascii=False, indent=2))
     print(f"[batch] wrote {out_path}")
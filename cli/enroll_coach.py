@@ -4,7 +4,7 @@ import argparse
 from pathlib import Path
 
 from app.config import settings
-from app.services.io_utils import load_audio
+from app.services.io_utils import load_audio_mmap
 from app.services.vad import detect_voiced_segments
 from app.services.embeddings import embed_segments, mean_pool, save_coach_embedding
 
@@ -15,7 +15,7 @@ def main():
     args = ap.parse_args()
 
     wav_path = Path(args.wav)
-    wav, sr = load_audio(wav_path, target_sr=settings.SAMPLE_RATE, mono=True)
+    wav, sr = load_audio_mmap(wav_path, target_sr=settings.SAMPLE_RATE)
     duration = len(wav) / sr
     print(f"[enroll] loaded {wav_path} duration={duration:.2f}s sr={sr}")
 
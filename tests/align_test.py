@@ -0,0 +1,51 @@
+import os
+import random
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def _random_diar(rng, n, overlapping=False):
+    t, diar = 0.0, []
+    for _ in range(n):
+        t += rng.choice([0.0, rng.uniform(0.0, 2.0)])
+        d = rng.choice([0.0, rng.uniform(0.1, 4.0)])
+        diar.append((t, t + d, rng.choice(["COACH", "JONGERE", "OTHER_2"])))
+        t += d if not overlapping else d * rng.uniform(-0.5, 1.0)
+    return diar
+
+def test_index_labels_match_linear_scan():
+    from app.services.align import DiarIndex, _assign_label_by_overlap
+
+    rng = random.Random(0)
+    for trial in range(200):
+        diar = _random_diar(rng, rng.randint(0, 40), overlapping=trial % 4 == 0)
+        index = DiarIndex(diar)
+        span = diar[-1][1] + 3.0 if diar else 10.0
+        for _ in range(50):
+            t0 = rng.uniform(-1.0, span)
+            t1 = t0 + rng.choice([0.0, rng.uniform(0.0, 3.0)])
+            assert index.label(t0, t1) == _assign_label_by_overlap(t0, t1, diar)
+
+def test_nearest_centre_tie_prefers_earlier_segment():
+    from app.services.align import DiarIndex
+
+    diar = [(0.0, 1.0, "COACH"), (3.0, 4.0, "JONGERE")]
+    assert DiarIndex(diar).label(2.0, 2.0) == "COACH"
+    assert DiarIndex(diar).label(2.1, 2.2) == "JONGERE"
+
+def test_merged_turns_join_text_once():
+    from app.services.align import align_utterances, assign_speakers_to_words
+    from app.routers.transcribe import build_utterances
+    from app.schemas import Utterance
+
+    # one long monologue, split into many tiny segment-level turns
+    whisper = [{"start": i * 0.3, "end": i * 0.3 + 0.2, "text": f" w{i} "} for i in range(2000)]
+    diar = [(0.0, 600.0, "COACH")]
+    utts = align_utterances(diar, whisper, merge_gap=0.2, min_turn_dur=0.5)
+    assert len(utts) == 1
+    assert utts[0].text == " ".join(f"w{i}" for i in range(2000))
+    assert assign_speakers_to_words(diar, whisper)[0]["text"] == utts[0].text
+
+    words = [{"word": " hallo", "start": 0.0, "end": 0.4}, {"word": "daar", "start": 0.5, "end": 0.9}]
+    models = build_utterances(align_utterances(diar, [{"start": 0.0, "end": 0.9, "text": "", "words": words}]))
+    assert Utterance.model_validate_json(models[0].model_dump_json()) == models[0]
+    assert models[0].text == "hallo daar" and models[0].words[1].speaker == "COACH"
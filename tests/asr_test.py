@@ -0,0 +1,168 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+class _FakeWhisper:
+    def __init__(self):
+        self.calls = []
+
+    def transcribe(self, audio, **kwargs):
+        self.calls.append((audio, kwargs))
+        words = [SimpleNamespace(word=" hallo", start=0.1, end=0.4)]
+        seg = SimpleNamespace(start=0.0, end=0.5, text=" hallo ", words=words)
+        return iter([seg]), None
+
+def test_transcribe_accepts_decoded_array(monkeypatch):
+    import app.services.asr as asr
+
+    fake = _FakeWhisper()
+    monkeypatch.setattr(asr, "get_model", lambda *a, **k: fake)
+
+    wav = np.zeros(8000, dtype=np.float32)
+    out = asr.transcribe(wav, language="nl", word_timestamps=True, sr=8000)
+
+    audio, kwargs = fake.calls[0]
+    assert isinstance(audio, np.ndarray) and audio.dtype == np.float32
+    assert len(audio) == 16000  # resampled to Whisper's 16 kHz
+    assert kwargs["language"] == "nl"
+    assert out == [{"start": 0.0, "end": 0.5, "text": "hallo",
+                    "words": [{"word": "hallo", "start": 0.1, "end": 0.4}]}]
+
+def test_pack_voiced_chunks_bounds_and_splits():
+    from app.services.asr import pack_voiced_chunks
+
+    segs = [(1.0, 3.0), (3.1, 5.0), (20.0, 28.0), (40.0, 112.0)]
+    chunks = pack_voiced_chunks(segs, chunk_sec=30.0, pad_sec=0.2, gap_sec=0.3, total_sec=120.0)
+    for pieces in chunks:
+        packed = sum(b - a for a, b in pieces) + 0.3 * (len(pieces) - 1)
+        assert packed <= 30.0 + 1e-9
+    flat = [p for c in chunks for p in c]
+    assert flat[0] == (0.8, 5.2)  # padded and merged
+    assert all(b - a <= 30.0 + 1e-9 for a, b in flat)
+    assert abs(sum(b - a for a, b in flat if a >= 39.0) - 72.4) < 1e-9
+
+def test_transcribe_voiced_remaps_to_original_timeline(monkeypatch):
+    import app.services.asr as asr
+
+    class _ChunkWhisper:
+        def transcribe(self, audio, **kwargs):
+            # one word at the very start of every packed chunk, one just after the first gap
+            words = [SimpleNamespace(word="a", start=0.0, end=0.5),
+                     SimpleNamespace(word="b", start=1.0 + 0.3 + 0.1, end=1.0 + 0.3 + 0.3)]
+            return iter([SimpleNamespace(start=0.0, end=1.7, text="a b", words=words)]), None
+
+    monkeypatch.setattr(asr, "get_model", lambda *a, **k: _ChunkWhisper())
+    monkeypatch.setattr(asr.settings, "ASR_REGION_PAD_SEC", 0.0)
+    monkeypatch.setattr(asr.settings, "ASR_CHUNK_GAP_SEC", 0.3)
+
+    sr = 16000
+    wav = np.zeros(sr * 100, dtype=np.float32)
+    segs = [(10.0, 11.0), (50.0, 51.0), (90.0, 91.0)]
+    out = asr.transcribe_voiced(wav, sr, segs, chunk_sec=2.5, workers=2)
+
+    assert [s["start"] for s in out] == [10.0, 90.0]
+    words = out[0]["words"]
+    assert words[0]["start"] == 10.0
+    assert abs(words[1]["start"] - 50.1) < 1e-6 and abs(words[1]["end"] - 50.3) < 1e-6
+
+def test_model_registry_keeps_several_sizes(monkeypatch):
+    import app.services.asr as asr
+
+    loaded = []
+
+    class _FakeModel:
+        def __init__(self, path, **kwargs):
+            loaded.append(path)
+
+    monkeypatch.setattr(asr, "WhisperModel", _FakeModel)
+    monkeypatch.setattr(asr, "_models", {})
+    monkeypatch.setattr(asr.settings, "OFFLINE_ONLY", False)
+
+    small = asr.get_model("small")
+    large = asr.get_model("large-v3")
+    assert small is not large
+    assert asr.get_model("small") is small
+    assert len(loaded) == 2
+    assert sorted(asr.loaded_models()) == ["large-v3", "small"]
+
+def test_profiles_set_decoding_options_and_compute_type(monkeypatch):
+    import pytest
+    import app.services.asr as asr
+
+    fake = _FakeWhisper()
+    requested = []
+    monkeypatch.setattr(asr, "get_model", lambda name=None, profile=None: requested.append(profile) or fake)
+
+    wav = np.zeros(16000, dtype=np.float32)
+    asr.transcribe(wav, profile="fast")
+    asr.transcribe(wav, profile="accurate")
+    fast, accurate = fake.calls[0][1], fake.calls[1][1]
+    assert (fast["beam_size"], fast["best_of"], fast["temperature"]) == (1, 1, [0.0])
+    assert fast["condition_on_previous_text"] is False
+    assert accurate["beam_size"] == 8 and len(accurate["temperature"]) > 1
+    assert requested == ["fast", "accurate"]
+
+    with pytest.raises(ValueError):
+        asr.transcribe(wav, profile="turbo")
+
+
+def test_model_registry_keys_on_profile_compute_type(monkeypatch):
+    import app.services.asr as asr
+
+    loaded = []
+
+    class _FakeModel:
+        def __init__(self, path, **kwargs):
+            loaded.append((kwargs["compute_type"], kwargs["cpu_threads"]))
+
+    monkeypatch.setattr(asr, "WhisperModel", _FakeModel)
+    monkeypatch.setattr(asr, "_models", {})
+    monkeypatch.setattr(asr.settings, "OFFLINE_ONLY", False)
+    monkeypatch.setattr(asr.torch.cuda, "is_available", lambda: False)
+    monkeypatch.setattr(asr.settings, "ASR_CPU_THREADS", 0)
+
+    fast = asr.get_model("small", "fast")
+    assert asr.get_model("small", "balanced") is fast  # both int8: one model
+    accurate = asr.get_model("small", "accurate")
+    assert accurate is not fast
+    assert loaded == [("int8", asr._PIPELINE_CORES), ("float32", asr._PIPELINE_CORES)]
+    assert asr.loaded_models() == ["small"]
+    assert asr.warmup_profiles() == ["fast", "accurate"]
+
+    # an explicit thread bound applies to every profile
+    monkeypatch.setattr(asr, "_models", {})
+    monkeypatch.setattr(asr.settings, "ASR_CPU_THREADS", 2)
+    asr.get_model("small", "balanced")
+    assert loaded[-1] == ("int8", 2)
+
+    monkeypatch.setattr(asr.torch.cuda, "is_available", lambda: True)
+    assert asr.warmup_profiles() == ["fast"]  # float16 for every profile
+
+def test_warm_up_loads_every_profile_compute_type(monkeypatch):
+    from app.services import warmup
+
+    monkeypatch.setattr(warmup.settings, "WHISPER_MODEL", "small")
+    monkeypatch.setattr(warmup.settings, "WHISPER_MODELS", "")
+    monkeypatch.setattr(warmup, "warmup_profiles", lambda: ["fast", "accurate"])
+    monkeypatch.setattr(warmup, "embed_segments", lambda *a, **k: [])
+    loaded, decoded = [], []
+    monkeypatch.setattr(warmup, "get_model", lambda name=None, profile=None: loaded.append((name, profile)))
+    monkeypatch.setattr(warmup, "transcribe", lambda *a, **k: decoded.append(k["profile"]) or [])
+
+    timings = warmup.warm_up()
+    assert loaded == [("small", "fast"), ("small", "accurate")]
+    assert decoded == ["fast", "accurate"]
+    assert set(timings) == {"ecapa", "whisper:small"}
+
+def test_asr_profile_setting_is_validated(monkeypatch):
+    import pytest
+    from app.config import ASR_PROFILES, _getenv_choice
+    from app.services.asr import PROFILES
+
+    assert ASR_PROFILES == tuple(PROFILES)
+    monkeypatch.setenv("ASR_PROFILE", "fastest")
+    with pytest.raises(ValueError):
+        _getenv_choice("ASR_PROFILE", "balanced", ASR_PROFILES)
@@ -0,0 +1,71 @@
+import json
+import os
+
+import pytest
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_inputs_and_skip_existing(tmp_path, capsys):
+    from cli import batch
+
+    src = tmp_path / "in"
+    (src / "site_a").mkdir(parents=True)
+    for name in ["site_a/s1.wav", "s2.wav", "notes.txt"]:
+        (src / name).write_bytes(b"")
+    out = tmp_path / "out"
+
+    items = batch._items_from_dir(src, out, "*.wav")
+    assert [it["out"] for it in items] == [str(out / "s2.json"), str(out / "site_a" / "s1.json")]
+
+    manifest = tmp_path / "m.jsonl"
+    manifest.write_text(json.dumps({"wav": str(src / "s2.wav"), "thr": 0.8}) + "\n\n")
+    assert batch._items_from_manifest(manifest, out) == [{"wav": str(src / "s2.wav"), "thr": 0.8, "out": str(out / "s2.json")}]
+
+    # everything already has output: nothing is started (no model load)
+    for it in items:
+        os.makedirs(os.path.dirname(it["out"]), exist_ok=True)
+        open(it["out"], "w").close()
+    batch.main(["--input", str(src), "--out_dir", str(out)])
+    assert "2 already done, 0 to process" in capsys.readouterr().out
+
+def test_manifest_outputs_do_not_collide(tmp_path):
+    from cli import batch
+
+    src, out, manifest = tmp_path / "in", tmp_path / "out", tmp_path / "m.jsonl"
+    for d in ("site_a", "site_b"):
+        (src / d).mkdir(parents=True)
+        (src / d / "s1.wav").write_bytes(b"")
+    # same file name in two folders: outputs keep the folders apart; explicit clashes are rejected
+    manifest.write_text("\n".join(json.dumps({"wav": str(src / d / "s1.wav")}) for d in ("site_a", "site_b")))
+    assert [it["out"] for it in batch._items_from_manifest(manifest, out)] == [
+        str(out / "site_a" / "s1.json"), str(out / "site_b" / "s1.json")]
+    manifest.write_text("\n".join(json.dumps({"wav": str(src / d / "s1.wav"), "out": str(out / "x.json")})
+                                   for d in ("site_a", "site_b")))
+    with pytest.raises(SystemExit):
+        batch._items_from_manifest(manifest, out)
+
+def test_process_file_matches_enrolled_coaches(tmp_path, monkeypatch):
+    import numpy as np
+    from benchmarks.synth import write_session
+    from app.services.diarization import SpeakerMatches
+    from app.routers import transcribe
+    from cli import demo_batch
+
+    session = write_session(tmp_path / "s.wav", 0.3, n_speakers=2, seed=1)
+    seen = {}
+
+    def fake_match(embs, top_k=3, coach_ids=None):
+        seen.update(top_k=top_k, coach_ids=coach_ids)
+        scores = np.array([0.9 if i % 2 == 0 else 0.1 for i in range(len(embs))], dtype=np.float32)
+        return SpeakerMatches([[("anna", float(v))] for v in scores], scores)
+
+    monkeypatch.setattr(demo_batch, "embed_segments",
+                        lambda wav, sr, segs: [np.eye(4, dtype=np.float32)[i % 4] for i in range(len(segs))])
+    monkeypatch.setattr(transcribe, "match_speakers", fake_match)  # labelling is the router's diarize_and_align
+    monkeypatch.setattr(demo_batch, "asr_transcribe", lambda audio, **kw: [])
+
+    out = demo_batch.process_file(session.path, coach_ids=["anna"], top_k=2, log=lambda m: None)
+    assert seen == {"top_k": 2, "coach_ids": ["anna"]}
+    assert out["speakers"][0] == {"id": "COACH", "display": "anna"}
+    assert any(s["speaker"] == "COACH" for s in out["segments"])
+    assert out["metrics"]["diarization"]["n_clustered"] > 0
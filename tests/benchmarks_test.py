@@ -0,0 +1,22 @@
+import os
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_suite_runs_on_short_synthetic_session(tmp_path):
+    from benchmarks.suite import TIMED, compare, run
+
+    r = run(0.5, n_speakers=3, source_sr=44100, channels=2, workdir=tmp_path)
+    assert set(TIMED) <= set(r["stage_sec"])
+    assert r["n_segments"] > 0 and r["n_words"] > 0 and r["n_utterances"] > 0
+    assert abs(r["audio_sec"] - 30.0) < 0.01
+
+    slower = {**r, "stage_sec": {k: v * 10 + 1.0 for k, v in r["stage_sec"].items()}}
+    assert compare([r], [r], tolerance=0.25) == []
+    assert len(compare([slower], [r], tolerance=0.25)) == len(TIMED)
+
+def test_word_error_rate():
+    from benchmarks.asr_bench import word_error_rate
+
+    assert word_error_rate("Hallo, hoe gaat het?", "hallo hoe gaat het") == 0.0
+    assert word_error_rate("een twee drie vier", "een drie vier vijf") == 0.5  # one deletion, one insertion
+    assert word_error_rate("a b", "") == 1.0
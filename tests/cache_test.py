@@ -0,0 +1,61 @@
+import asyncio
+import io
+import os
+import time
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_lru_eviction(tmp_path):
+    from app.services.cache import ArtifactCache
+
+    cache = ArtifactCache(tmp_path, max_bytes=3 * 1024 + 512)
+    for i in range(3):
+        cache.put_array(f"{i:02d}" + "a" * 62, "emb", np.zeros(128, dtype=np.float64))  # ~1.1 KB each
+        time.sleep(0.01)
+    assert cache.get_array("00" + "a" * 62, "emb") is not None  # refresh the oldest entry
+    cache.put_array("03" + "a" * 62, "emb", np.zeros(128, dtype=np.float64))
+
+    assert cache.get_array("01" + "a" * 62, "emb") is None  # least recently used went first
+    assert cache.get_array("00" + "a" * 62, "emb") is not None
+    assert cache.size_bytes() <= 3 * 1024 + 512
+
+def test_rerun_skips_audio_stages(tmp_path, monkeypatch):
+    import soundfile as sf
+    from app.routers import transcribe
+    from app.services import diarization
+    from app.services.cache import ArtifactCache
+    from app.services.sessions import SessionStore
+    from app.services.speaker_store import SpeakerStore
+
+    cache = ArtifactCache(tmp_path / "cache")
+    sessions = SessionStore(tmp_path / "sessions")
+    speakers = SpeakerStore(tmp_path / "speaker_db.json")  # nobody enrolled
+    calls = []
+    monkeypatch.setattr(transcribe, "get_artifact_cache", lambda: cache)
+    monkeypatch.setattr(transcribe, "get_session_store", lambda: sessions)
+    monkeypatch.setattr(diarization, "get_speaker_store", lambda: speakers)
+    monkeypatch.setattr(transcribe, "detect_voiced_segments", lambda *a, **k: calls.append("vad") or [(0.0, 1.0), (1.5, 2.0)])
+    monkeypatch.setattr(transcribe, "embed_segments", lambda *a, **k: calls.append("embedding") or [np.ones(4), -np.ones(4)])
+    monkeypatch.setattr(transcribe, "asr_transcribe", lambda **k: calls.append("asr") or [
+        {"start": 0.0, "end": 2.0, "text": "hoi daar",
+         "words": [{"word": "hoi", "start": 0.1, "end": 0.5}, {"word": "daar", "start": 1.6, "end": 1.9}]},
+    ])
+    buf = io.BytesIO()
+    sf.write(buf, np.zeros(32000, dtype=np.float32), 16000, format="WAV")
+
+    def run(**kw):
+        opts = dict(language="nl", coach_threshold=0.72, max_speakers=2, use_word_timestamps=True)
+        return asyncio.run(transcribe.run_pipeline(buf.getvalue(), **{**opts, **kw}))
+
+    first = run()
+    assert calls == ["vad", "embedding", "asr"]
+    second = run(max_speakers=1, coach_threshold=0.5)
+    assert calls == ["vad", "embedding", "asr"]
+    assert [s.name for s in second.metrics.stages if s.cached] == ["vad", "embedding", "asr"]
+    assert "decode" not in [s.name for s in second.metrics.stages]
+    assert [w.w for u in second.utterances for w in u.words] == [w.w for u in first.utterances for w in u.words]
+
+    run(language="en")
+    assert calls[-1] == "asr" and calls.count("vad") == 1
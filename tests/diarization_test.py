@@ -0,0 +1,74 @@
+import os
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def _reference_labels(embs, coach_emb, thr, k):
+    # per-segment cosine + per-window np.median, as labelled before vectorisation
+    from app.services.embeddings import cosine
+
+    raw = np.array([1 if cosine(e, coach_emb) >= thr else 0 for e in embs], dtype=np.int32)
+    smoothed = raw.copy()
+    if k > 1 and len(raw) >= k:
+        pad = k // 2
+        padded = np.pad(raw, (pad, pad), mode="edge")
+        smoothed = np.array([int(np.median(padded[i : i + k])) for i in range(len(raw))], dtype=np.int32)
+    return ["COACH" if v == 1 else "UNK" for v in smoothed]
+
+def test_vectorised_labels_match_reference():
+    from app.services.diarization import label_segments_with_coach
+
+    rng = np.random.default_rng(0)
+    coach = rng.standard_normal(32).astype(np.float32)
+    for n in [0, 1, 2, 5, 40]:
+        embs = [coach * rng.uniform(-1, 1) + rng.standard_normal(32).astype(np.float32) for _ in range(n)]
+        segments = [(i * 1.0, i * 1.0 + 0.8) for i in range(n)]
+        for k in [1, 2, 3, 4, 5]:
+            got = label_segments_with_coach(segments, embs, coach, thr=0.3, smooth_window=k)
+            assert got == _reference_labels(embs, coach, 0.3, k)
+
+def _speakers(rng, n_speakers, n, dim=64, noise=0.3):
+    centres = rng.standard_normal((n_speakers, dim)).astype(np.float32)
+    truth = rng.integers(0, n_speakers, size=n)
+    return centres[truth] + noise * rng.standard_normal((n, dim)).astype(np.float32), truth
+
+def _purity(labels, truth):
+    from collections import Counter
+    return sum(Counter(truth[labels == c]).most_common(1)[0][1] for c in np.unique(labels)) / len(truth)
+
+def test_small_inputs_cluster_like_plain_agglomerative():
+    from sklearn.cluster import AgglomerativeClustering
+    from app.services.diarization import cluster_embeddings
+
+    X, _ = _speakers(np.random.default_rng(1), 3, 200)
+    stats = {}
+    got = cluster_embeddings(X, 3, direct_max=1000, stats=stats)
+    assert np.array_equal(got, AgglomerativeClustering(n_clusters=3).fit_predict(X))
+    assert stats.pop("peak_mem_mb") > 0
+    assert stats == {"method": "agglomerative", "n_clustered": 200, "n_clusters": 3}
+
+def test_two_stage_and_threshold_modes():
+    from app.services.diarization import cluster_embeddings
+
+    X, truth = _speakers(np.random.default_rng(2), 3, 5000)
+    stats = {}
+    labels = cluster_embeddings(X, 3, direct_max=1000, n_centroids=128, stats=stats)
+    assert stats["method"] == "kmeans+agglomerative"
+    assert _purity(labels, truth) > 0.99
+
+    # count estimated from the threshold, capped by n_clusters
+    labels = cluster_embeddings(X, 4, distance_threshold=0.5, direct_max=1000, n_centroids=128)
+    assert len(np.unique(labels)) == 3 and _purity(labels, truth) > 0.99
+    assert len(np.unique(cluster_embeddings(X[:300], 2, distance_threshold=0.5))) == 2
+
+def test_diarize_with_stats_reports_memory():
+    from app.services.diarization import diarize, diarize_with_stats
+
+    X, _ = _speakers(np.random.default_rng(3), 2, 50)
+    segments = [(i * 1.0, i * 1.0 + 0.8) for i in range(50)]
+    diar, stats = diarize_with_stats(segments, list(X), None, max_speakers=2)
+    assert diar == diarize(segments, list(X), None, max_speakers=2)
+    assert stats["method"] == "agglomerative"
+    n, d = X.shape
+    assert stats["peak_mem_mb"] * (1 << 20) == 8 * (n * d + n * (n - 1) // 2)  # rows + condensed distances
@@ -0,0 +1,145 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import torch
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def _random_ecapa():
+    """ECAPA front-end + encoder with random weights, wired like EncoderClassifier."""
+    from speechbrain.lobes.features import Fbank
+    from speechbrain.lobes.models.ECAPA_TDNN import ECAPA_TDNN
+    from speechbrain.processing.features import InputNormalization
+    from speechbrain.pretrained import EncoderClassifier
+
+    torch.manual_seed(0)
+    mods = SimpleNamespace(
+        compute_features=Fbank(n_mels=80),
+        mean_var_norm=InputNormalization(norm_type="sentence", std_norm=False),
+        embedding_model=ECAPA_TDNN(80, lin_neurons=192, channels=[64, 64, 64, 64, 192]).eval(),
+    )
+    clf = SimpleNamespace(mods=mods, device="cpu", hparams=None)
+    clf.encode_batch = lambda wavs, wav_lens=None, normalize=False: EncoderClassifier.encode_batch(clf, wavs, wav_lens, normalize)
+    return clf
+
+def test_batched_embeddings_match_per_segment(monkeypatch):
+    import app.services.embeddings as embeddings
+    from app.services.embeddings import cosine
+
+    clf = _random_ecapa()
+    monkeypatch.setattr(embeddings, "get_classifier", lambda: clf)
+
+    sr = 16000
+    rng = np.random.default_rng(0)
+    wav = (0.1 * rng.standard_normal(sr * 12)).astype(np.float32)
+    segments = [(0.0, 1.2), (1.5, 4.0), (4.1, 4.7), (5.0, 9.5), (9.6, 10.4), (11.0, 11.0)]
+
+    batched = embeddings.embed_segments(wav, sr, segments, max_batch_sec=8.0, max_batch_size=3)
+    single = [embeddings.embed_signal(wav, sr, t0, t1) for (t0, t1) in segments]
+
+    assert len(batched) == len(segments)
+    assert all(e.shape == (192,) for e in batched)
+    assert not np.any(batched[-1])  # zero-length segment
+    for b, s in zip(batched[:-1], single[:-1]):
+        assert cosine(b, s) > 0.999
+
+def test_length_buckets_respect_budget():
+    from app.services.embeddings import _length_buckets
+
+    lengths = [10, 50, 20, 40, 30]
+    order = sorted(range(5), key=lambda i: lengths[i])
+    batches = _length_buckets(lengths, order, max_batch_samples=90, max_batch_size=8)
+    assert sorted(i for b in batches for i in b) == list(range(5))
+    for b in batches:
+        assert len(b) == 1 or len(b) * max(lengths[i] for i in b) <= 90
+
+def test_shared_features_match_per_segment_front_end(monkeypatch):
+    import app.services.embeddings as embeddings
+    from app.services.embeddings import cosine
+
+    clf = _random_ecapa()
+    monkeypatch.setattr(embeddings, "get_classifier", lambda: clf)
+
+    sr = 16000
+    rng = np.random.default_rng(1)
+    wav = (0.1 * rng.standard_normal(sr * 20)).astype(np.float32)
+    wav[sr * 8 : sr * 9] = 0.0  # silence: exercises the dB floor across blocks
+
+    # blocked front-end == one Fbank call over the recording
+    monkeypatch.setattr(embeddings, "FEATURE_BLOCK_FRAMES", 300)
+    blocked = embeddings.recording_features(wav, clf)
+    whole = clf.mods.compute_features(torch.from_numpy(wav).unsqueeze(0))[0]
+    assert blocked.shape == whole.shape
+    assert torch.allclose(blocked, whole, atol=1e-4)
+
+    segments = [(0.3, 2.0), (2.4, 7.9), (9.2, 9.9), (10.0, 19.5)]
+    shared = embeddings.embed_segments(wav, sr, segments, shared_features=True)
+    separate = embeddings.embed_segments(wav, sr, segments, shared_features=False)
+    recording = embeddings.embed_segments(wav, sr, segments, shared_features=True, feature_norm="recording")
+    for a, b, c in zip(shared, separate, recording):
+        assert cosine(a, b) > 0.999
+        assert c.shape == (192,)
+
+def test_embedding_backend_selection_and_fallback(tmp_path, monkeypatch):
+    import app.services.embeddings as embeddings
+    from app.config import settings
+
+    clf = _random_ecapa()
+    eager = clf.mods.embedding_model
+    embeddings._select_backend(clf, "torchscript", tmp_path)
+    assert embeddings.backend_info["backend"] == "torchscript"
+    assert embeddings.backend_info["parity_min_cos"] > 0.999
+    assert (tmp_path / "embedding_model.ts").exists()
+
+    monkeypatch.setattr(embeddings, "get_classifier", lambda: clf)
+    x = torch.randn(2, 120, 80)
+    rel = torch.tensor([1.0, 0.5])
+    with torch.no_grad():
+        assert torch.allclose(clf.mods.embedding_model(x, rel), eager(x, rel), atol=1e-4)
+
+    clf.mods.embedding_model = eager
+    monkeypatch.setattr(settings, "EMBED_PARITY_MIN_COS", 1.01)  # unreachable: keep eager
+    embeddings._select_backend(clf, "torchscript", tmp_path)
+    assert embeddings.backend_info["backend"] == "speechbrain"
+    assert clf.mods.embedding_model is eager
+    monkeypatch.setattr(settings, "EMBED_BACKEND", "torchscript")
+    assert embeddings.active_backend() == "speechbrain"  # cache key follows the fallback
+
+    embeddings._select_backend(clf, "tflite", tmp_path)
+    assert embeddings.backend_info["backend"] == "speechbrain" and "error" in embeddings.backend_info
+
+def test_concurrent_backend_loads_export_once(tmp_path, monkeypatch):
+    import threading
+    import app.services.embed_backends as eb
+
+    model = _random_ecapa().mods.embedding_model
+    exports = []
+    real_export = eb.export_torchscript
+
+    def counting_export(m, path):
+        exports.append(path)
+        real_export(m, path)
+
+    monkeypatch.setattr(eb, "export_torchscript", counting_export)
+    loaded = []
+    threads = [threading.Thread(target=lambda: loaded.append(eb.load_backend("torchscript", model, tmp_path)))
+               for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(exports) == 1 and exports[0].name != "embedding_model.ts"  # written aside, then moved
+    assert len(loaded) == 3
+    assert sorted(p.name for p in tmp_path.iterdir()) == [".export.lock", "embedding_model.ts"]
+
+def test_feature_norm_is_validated(monkeypatch):
+    import pytest
+    from app.config import _getenv_choice
+    from app.services.embeddings import embed_segments
+
+    monkeypatch.setenv("EMBED_FEATURE_NORM", "Recording")
+    with pytest.raises(ValueError):
+        _getenv_choice("EMBED_FEATURE_NORM", "segment", ("segment", "recording"))
+    with pytest.raises(ValueError):
+        embed_segments(np.zeros(16000, dtype=np.float32), 16000, [(0.0, 1.0)], feature_norm="global")
@@ -0,0 +1,59 @@
+import asyncio
+import os
+import time
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def _slow(x):
+    time.sleep(0.05)
+    return x * 2
+
+def test_stage_runner_records_queue_and_run_time():
+    from app.services.executor import StageRunner
+
+    async def main():
+        run = StageRunner()
+        out = await run.run("double", _slow, 21)
+        return out, run.stages
+
+    out, stages = asyncio.run(main())
+    assert out == 42
+    assert [s["name"] for s in stages] == ["double"]
+    assert stages[0]["run_sec"] >= 0.04
+    assert stages[0]["queue_sec"] >= 0.0
+
+def test_admission_rejects_when_queue_full():
+    from app.services.executor import AdmissionController, Overloaded
+
+    async def main():
+        ctrl = AdmissionController(max_concurrency=1, max_queue=1, retry_after=7)
+        release = asyncio.Event()
+        rejected = []
+
+        async def hold():
+            async with ctrl.slot():
+                await release.wait()
+
+        async def wait_in_queue():
+            async with ctrl.slot() as waited:
+                return waited
+
+        first = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        second = asyncio.create_task(wait_in_queue())
+        await asyncio.sleep(0)
+        try:
+            async with ctrl.slot():
+                pass
+        except Overloaded as e:
+            rejected.append(e.retry_after)
+
+        release.set()
+        await first
+        waited = await second
+        return rejected, waited, ctrl.active, ctrl.waiting
+
+    rejected, waited, active, waiting = asyncio.run(main())
+    assert rejected == [7]
+    assert waited >= 0.0
+    assert active == 0 and waiting == 0
@@ -0,0 +1,21 @@
+import os
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_ready_reports_warmup_state():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import warmup
+
+    client = TestClient(app)  # no lifespan: warm-up is driven manually below
+    warmup.mark_failed("RuntimeError: model missing")
+    r = client.get("/ready")
+    assert r.status_code == 503
+    assert r.json()["error"] == "RuntimeError: model missing"
+    assert r.json()["status"] == "failed"
+    assert client.get("/health").status_code == 200
+
+    warmup.mark_ready({"ecapa": 0.5, "whisper:small": 1.5})
+    r = client.get("/ready")
+    assert r.status_code == 200
+    assert r.json()["models"] == ["small"] and r.json()["status"] == "ready"
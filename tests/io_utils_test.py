@@ -0,0 +1,65 @@
+import io
+import os
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def _wav_bytes(x, sr, subtype="PCM_16"):
+    import soundfile as sf
+    bio = io.BytesIO()
+    sf.write(bio, x, sr, format="WAV", subtype=subtype)
+    return bio.getvalue()
+
+def test_load_audio_matches_one_shot_decode():
+    import soundfile as sf
+    from scipy.signal import resample_poly
+    from app.services import io_utils
+
+    rng = np.random.default_rng(0)
+    for sr in (44100, 48000, 8000):
+        x = (0.4 * rng.standard_normal((sr * 3 + 17, 2))).astype(np.float32)
+        data = _wav_bytes(x, sr)
+        ref, _ = sf.read(io.BytesIO(data), always_2d=True, dtype="float32")
+        g = np.gcd(sr, 16000)
+        ref = resample_poly(np.mean(ref, axis=1, dtype=np.float32), 16000 // g, sr // g)
+        ref = np.clip(ref, -1.0, 1.0).astype(np.float32)
+
+        io_utils.DECODE_BLOCK_FRAMES = 4096
+        try:
+            wav, out_sr = io_utils.load_audio(data, target_sr=16000)
+        finally:
+            io_utils.DECODE_BLOCK_FRAMES = 1 << 16
+        assert out_sr == 16000 and wav.dtype == np.float32
+        np.testing.assert_array_equal(wav, ref)
+
+def test_load_audio_fast_path_16k_mono():
+    import soundfile as sf
+    from app.services.io_utils import load_audio
+
+    x = (0.5 * np.sin(np.arange(16000) / 7.0)).astype(np.float32)
+    data = _wav_bytes(x, 16000)
+    wav, sr = load_audio(data, target_sr=16000)
+    ref, _ = sf.read(io.BytesIO(data), dtype="float32")
+    assert sr == 16000 and wav.dtype == np.float32
+    np.testing.assert_array_equal(wav, ref)
+
+def test_load_audio_mmap_pcm16_and_fallback(tmp_path):
+    import soundfile as sf
+    from app.services.io_utils import as_float32, load_audio, load_audio_mmap
+    from app.services.vad import detect_voiced_segments
+
+    rng = np.random.default_rng(1)
+    x = (0.3 * rng.standard_normal(16000 * 2)).astype(np.float32)
+    path = tmp_path / "a.wav"
+    sf.write(path, x, 16000, subtype="PCM_16")
+
+    wav, sr = load_audio_mmap(path, target_sr=16000)
+    assert sr == 16000 and isinstance(wav, np.memmap) and wav.dtype == np.int16
+    ref, _ = load_audio(path, target_sr=16000)
+    np.testing.assert_array_equal(as_float32(wav[100:900]), ref[100:900])
+    assert detect_voiced_segments(wav, sr) == detect_voiced_segments(as_float32(wav), sr)
+
+    sf.write(path, np.stack([x, x], axis=1), 16000, subtype="PCM_16")  # stereo: decoded instead
+    wav, sr = load_audio_mmap(path, target_sr=16000)
+    assert not isinstance(wav, np.memmap) and wav.dtype == np.float32
@@ -0,0 +1,70 @@
+import os
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_job_store_lifecycle_and_restart(tmp_path):
+    from app.services.jobs import JobStore, QUEUED, RUNNING, DONE
+
+    db = tmp_path / "jobs.sqlite3"
+    store = JobStore(db)
+    first = store.create({"language": "nl"})
+    second = store.create({"language": "en"})
+
+    job = store.claim_next()
+    assert job["id"] == first and job["status"] == RUNNING
+    assert job["params"] == {"language": "nl"}
+    store.update_progress(first, "asr", 0.5)
+    assert store.get(first)["stage"] == "asr"
+
+    # Simulate a restart while the first job was running
+    store.close()
+    store = JobStore(db)
+    assert store.requeue_interrupted() == 1
+    assert store.get(first)["status"] == QUEUED
+
+    assert store.claim_next()["id"] == first
+    store.complete(first, '{"ok": true}')
+    assert store.get(first)["status"] == DONE
+    assert store.claim_next()["id"] == second
+    assert store.claim_next() is None
+
+def test_failed_job_records_progress_and_removes_audio(tmp_path, monkeypatch):
+    import asyncio
+    import app.routers.jobs as jobs_router
+    from app.services.jobs import JobStore, FAILED
+
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    audio = tmp_path / "job.wav"
+    audio.write_bytes(b"RIFF")
+
+    async def failing_pipeline(path, progress=None, **kwargs):
+        progress("vad", 0.2)
+        raise RuntimeError("decoder crashed")
+
+    monkeypatch.setattr(jobs_router, "get_job_store", lambda: store)
+    monkeypatch.setattr(jobs_router, "run_pipeline", failing_pipeline)
+
+    job_id = store.create({"language": "nl", "coach_threshold": 0.72, "max_speakers": 2,
+                           "use_word_timestamps": True}, audio_path=audio)
+    asyncio.run(jobs_router._process(store.claim_next()))
+
+    job = store.get(job_id)
+    assert job["status"] == FAILED and "decoder crashed" in job["error"]
+    assert job["stage"] == "vad"
+    assert not audio.exists()
+
+def test_finished_jobs_are_purged_after_ttl(tmp_path):
+    from app.services.jobs import JobStore, QUEUED
+
+    store = JobStore(tmp_path / "jobs.sqlite3", ttl_sec=60)
+    done = store.create({})
+    failed = store.create({})
+    store.claim_next(), store.claim_next()
+    store.complete(done, "{}")
+    store.fail(failed, "boom")
+    store._conn.execute("UPDATE jobs SET updated_at = updated_at - 120 WHERE id = ?", (failed,))
+
+    queued = store.create({})  # creating a job purges expired ones
+    assert store.get(failed) is None
+    assert store.get(done) is not None and store.get(queued)["status"] == QUEUED
+    assert store.purge() == 0
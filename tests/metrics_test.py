@@ -0,0 +1,34 @@
+import asyncio
+import os
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def _sleep(sec):
+    import time
+    time.sleep(sec)
+
+def test_metrics_endpoint_exposes_stages_and_rtf():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.services import metrics
+    from app.services.executor import StageRunner
+
+    async def main():
+        run = StageRunner()
+        await run.run("vad", _sleep, 0.02)
+        run.skip("asr")
+
+    asyncio.run(main())
+    metrics.observe_pipeline(processing_sec=30.0, audio_sec=120.0, n_segments=40, n_words=300)
+
+    r = TestClient(app).get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    lines = r.text.splitlines()
+    assert "# TYPE nidos_stage_duration_seconds histogram" in lines
+    assert any(l.startswith('nidos_stage_duration_seconds_bucket{stage="vad",le="0.05"}') for l in lines)
+    assert any(l.startswith('nidos_stage_cache_hits_total{stage="asr"}') for l in lines)
+    # 30 s for 120 s of audio: RTF 0.25 falls in the 0.3 bucket, not the 0.2 one
+    rtf = {l.split(" ")[0]: float(l.split(" ")[1]) for l in lines if l.startswith("nidos_realtime_factor_bucket")}
+    assert rtf['nidos_realtime_factor_bucket{le="0.3"}'] - rtf['nidos_realtime_factor_bucket{le="0.2"}'] >= 1
+    assert any(l.startswith("nidos_pipeline_waiting ") for l in lines)
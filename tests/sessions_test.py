@@ -0,0 +1,62 @@
+import asyncio
+import io
+import os
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_rediarize_reuses_stored_session(tmp_path, monkeypatch):
+    import soundfile as sf
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routers import transcribe, sessions
+    from app.services.sessions import SessionStore
+
+    store = SessionStore(tmp_path / "sessions")
+    monkeypatch.setattr(transcribe, "get_artifact_cache", lambda: None)
+    monkeypatch.setattr(transcribe, "get_session_store", lambda: store)
+    monkeypatch.setattr(sessions, "get_session_store", lambda: store)
+    monkeypatch.setattr(transcribe, "detect_voiced_segments", lambda *a, **k: [(0.0, 1.0), (1.5, 2.0), (2.5, 3.0)])
+    embs = [np.array([1.0, 0.0, 0.0]), np.array([0.0, 1.0, 0.0]), np.array([0.0, 0.0, 1.0])]
+    monkeypatch.setattr(transcribe, "embed_segments", lambda *a, **k: embs)
+    monkeypatch.setattr(transcribe, "asr_transcribe", lambda **k: [
+        {"start": 0.0, "end": 3.0, "text": "een twee drie", "words": [
+            {"word": "een", "start": 0.2, "end": 0.8},
+            {"word": "twee", "start": 1.6, "end": 1.9},
+            {"word": "drie", "start": 2.6, "end": 2.9},
+        ]},
+    ])
+    buf = io.BytesIO()
+    sf.write(buf, np.zeros(48000, dtype=np.float32), 16000, format="WAV")
+    first = asyncio.run(transcribe.run_pipeline(buf.getvalue(), "nl", 0.72, max_speakers=1, use_word_timestamps=True))
+    assert {u.speaker for u in first.utterances} == {"JONGERE"}
+
+    # the audio stages must not run again
+    for name in ("detect_voiced_segments", "embed_segments", "asr_transcribe"):
+        monkeypatch.setattr(transcribe, name, lambda *a, **k: (_ for _ in ()).throw(AssertionError("re-ran")))
+    client = TestClient(app)
+    from app.services import metrics
+    pipelines, audio_sec = metrics.pipelines_total._series.get((), 0.0), metrics.audio_seconds_total._series.get((), 0.0)
+    r = client.post(f"/sessions/{first.session_id}/rediarize", json={"max_speakers": 3})
+    assert r.status_code == 200, r.text
+    # a re-diarization is not a new transcription
+    assert metrics.pipelines_total._series.get((), 0.0) == pipelines
+    assert metrics.audio_seconds_total._series.get((), 0.0) == audio_sec
+    assert "nidos_rediarizations_total 1" in client.get("/metrics").text
+    body = r.json()
+    assert body["session_id"] == first.session_id and body["language"] == "nl"
+    assert len({u["speaker"] for u in body["utterances"]}) == 3
+    assert [s["name"] for s in body["metrics"]["stages"]] == ["identification", "diarization", "alignment"]
+
+    assert client.post("/sessions/nope/rediarize", json={}).status_code == 404
+    assert client.post("/sessions/../rediarize", json={}).status_code == 404
+
+def test_rediarize_defaults_follow_settings(monkeypatch):
+    from app.config import settings
+    from app.schemas import RediarizeRequest
+
+    monkeypatch.setattr(settings, "COACH_THRESHOLD", 0.8)
+    monkeypatch.setattr(settings, "SPEAKER_TOP_K", 5)
+    req = RediarizeRequest()
+    assert (req.coach_threshold, req.top_k) == (0.8, 5)
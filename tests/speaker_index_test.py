@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def _unit(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+def test_flat_top_k_matches_brute_force_and_filter():
+    from app.services.speaker_index import SpeakerIndex
+
+    rng = np.random.default_rng(0)
+    names = [f"coach_{i}" for i in range(300)]
+    mat = _unit(rng.standard_normal((300, 192))).astype(np.float32)
+    q = rng.standard_normal((50, 192)).astype(np.float32)
+    index = SpeakerIndex(names, mat, ivf_min=0)
+
+    rows, vals = index.search(q, k=5)
+    ref = _unit(q) @ mat.T
+    assert np.array_equal(rows, np.argsort(-ref, axis=1)[:, :5])
+    assert np.allclose(vals, np.sort(ref, axis=1)[:, ::-1][:, :5], atol=1e-5)
+
+    rows, _ = index.search(q, k=3, names=["coach_7", "coach_42"])
+    assert rows.shape == (50, 2) and set(rows.ravel()) <= {7, 42}
+
+def test_ivf_finds_the_enrolled_voice():
+    from app.services.speaker_index import SpeakerIndex
+
+    rng = np.random.default_rng(1)
+    mat = _unit(rng.standard_normal((5000, 64))).astype(np.float32)
+    index = SpeakerIndex([str(i) for i in range(5000)], mat, ivf_min=4096, n_probe=8)
+    assert index.is_ivf
+    targets = rng.choice(5000, size=100, replace=False)
+    noisy = mat[targets] + 0.05 * rng.standard_normal((100, 64)).astype(np.float32)
+    rows, vals = index.search(noisy, k=3)
+    assert np.mean(rows[:, 0] == targets) > 0.95
+    assert np.all(vals[:, 0] >= vals[:, 1])
+
+def test_match_speakers_and_dominant_coach(tmp_path, monkeypatch):
+    from app.services import diarization
+    from app.services.speaker_store import SpeakerStore
+
+    store = SpeakerStore(tmp_path / "speaker_db.json")
+    store.put("ANNA", np.array([1.0, 0.0, 0.0]), sr=16000)
+    store.put("BOB", np.array([0.0, 1.0, 0.0]), sr=16000)
+    monkeypatch.setattr(diarization, "get_speaker_store", lambda: store)
+
+    embs = [np.array([0.9, 0.1, 0.0]), np.array([0.1, 0.9, 0.0]), np.array([0.0, 0.0, 1.0]), np.array([1.0, 0.0, 0.1])]
+    segments = [(0.0, 4.0), (4.0, 5.0), (5.0, 6.0), (6.0, 9.0)]
+    found = diarization.match_speakers(embs, top_k=2)
+    assert [m[0][0] for m in found.matches] == ["ANNA", "BOB", "ANNA", "ANNA"]
+    assert len(found.matches[0]) == 2
+
+    labels = diarization.label_segments_with_coach(segments, embs, None, thr=0.72, smooth_window=1, scores=found.coach_scores)
+    assert labels == ["COACH", "COACH", "UNK", "COACH"]
+    assert diarization.dominant_coach(segments, labels, found.best_names()) == "ANNA"
+
+    only_bob = diarization.match_speakers(embs, top_k=2, coach_ids=["BOB"])
+    assert all(m[0][0] == "BOB" and len(m) == 1 for m in only_bob.matches)
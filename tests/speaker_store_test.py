@@ -0,0 +1,35 @@
+import json
+import os
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_legacy_db_is_read_and_converted(tmp_path):
+    from app.services.speaker_store import SpeakerStore
+
+    path = tmp_path / "speaker_db.json"
+    path.write_text(json.dumps({"COACH": {"embedding": [3.0, 4.0], "sr": 16000, "name": "COACH"}}))
+    store = SpeakerStore(path)
+    assert np.allclose(store.get("COACH"), [0.6, 0.8])
+    assert store.get("NOBODY") is None
+
+    store.put("ANNA", np.array([0.0, 2.0]), sr=16000, duration=12.0)
+    meta = json.loads(path.read_text())
+    assert "embedding" not in meta["COACH"] and meta["ANNA"]["row"] == 1
+    names, mat = SpeakerStore(path).matrix()
+    assert names == ["COACH", "ANNA"]
+    assert isinstance(mat, np.memmap)
+    assert np.allclose(mat, [[0.6, 0.8], [0.0, 1.0]])
+
+def test_reloads_when_another_process_writes(tmp_path):
+    from app.services.speaker_store import SpeakerStore
+
+    path = tmp_path / "speaker_db.json"
+    reader, writer = SpeakerStore(path), SpeakerStore(path)
+    assert reader.names() == []
+    writer.put("COACH", np.array([1.0, 0.0, 0.0]), sr=16000)
+    assert reader.names() == ["COACH"]
+    writer.put("COACH", np.array([0.0, 0.0, 5.0]), sr=16000)
+    os.utime(path, ns=(0, 1))  # force a visible change even on coarse-mtime filesystems
+    assert np.allclose(reader.get("COACH"), [0.0, 0.0, 1.0])
@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+SR = 16000
+
+def _voiced(seconds, f0):
+    t = np.arange(int(seconds * SR)) / SR
+    x = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 10))
+    x *= 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+    return (0.3 * x / np.abs(x).max()).astype(np.float32)
+
+def _session_audio():
+    silence = np.zeros(int(0.8 * SR), dtype=np.float32)
+    return np.concatenate([silence, _voiced(1.5, 120), silence, _voiced(1.2, 210), silence])
+
+def test_streaming_vad_matches_offline_segments():
+    from app.services.io_utils import float_to_int16_pcm
+    from app.services.vad import StreamingVad, detect_voiced_segments
+
+    wav = _session_audio()
+    offline = detect_voiced_segments(wav, SR, frame_ms=30, aggressiveness=2, min_seg_dur=0.5, merge_gap=0.2)
+
+    sv = StreamingVad(SR, frame_ms=30, aggressiveness=2, min_seg_dur=0.5, merge_gap=0.2)
+    pcm = float_to_int16_pcm(wav)
+    regions = []
+    for i in range(0, len(pcm), 1234):  # chunk size unrelated to the frame size
+        regions += sv.push(pcm[i:i + 1234])
+    regions += sv.flush()
+
+    assert [(a, b) for a, b, _ in regions] == offline
+    assert len(regions) == 2
+    assert all(len(x) == round((b - a) * SR) for a, b, x in regions)
+
+def test_online_clusterer_separates_and_promotes_dominant():
+    from app.services.diarization import OnlineSpeakerClusterer
+
+    coach = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    c = OnlineSpeakerClusterer(coach, coach_thr=0.9, cluster_thr=0.8, max_speakers=2)
+    assert c.assign(np.array([0.99, 0.05, 0.0]), 1.0) == -1
+    a = c.assign(np.array([0.0, 1.0, 0.0]), 1.0)
+    b = c.assign(np.array([0.0, 0.0, 1.0]), 3.0)
+    assert a != b and c.label_for(b) == "JONGERE" and c.label_for(a).startswith("OTHER_")
+    assert c.assign(np.array([0.0, 0.1, 1.0]), 1.0) == b
+    assert c.label_for(-1) == "COACH"
+
+def test_ws_transcribe_emits_final_utterances(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    import app.routers.stream as stream
+    from app.services.io_utils import float_to_int16_pcm
+
+    monkeypatch.setattr(stream.settings, "STREAM_PARTIAL_SEC", 0.0)
+    from app.services.diarization import SpeakerMatches
+
+    # first region matches nobody well, the second one enrolled coach "bram"
+    scores = iter([[("anna", 0.1)], [("bram", 0.9), ("anna", 0.2)]])
+
+    def fake_match(embs, top_k=3, coach_ids=None):
+        m = next(scores)
+        return SpeakerMatches([m], np.array([m[0][1]], dtype=np.float32))
+
+    monkeypatch.setattr(stream, "match_speakers", fake_match)
+    active = []
+
+    def fake_embed(wav, sr):
+        active.append(stream.admission.active)
+        return np.array([1.0, 0.0], dtype=np.float32)
+
+    monkeypatch.setattr(stream, "embed_signal", fake_embed)
+    monkeypatch.setattr(stream, "asr_transcribe", lambda wav, **kw: [
+        {"start": 0.0, "end": len(wav) / SR, "text": "hallo",
+         "words": [{"word": "hallo", "start": 0.1, "end": 0.4}]}])
+
+    pcm = float_to_int16_pcm(_session_audio())
+    client = TestClient(app)
+    with client.websocket_connect("/ws/transcribe") as ws:
+        ws.send_json({"type": "config", "language": "nl", "max_speakers": 1})
+        for i in range(0, len(pcm), 3200):
+            ws.send_bytes(pcm[i:i + 3200])
+        ws.send_json({"type": "stop"})
+        msgs = []
+        while True:
+            m = ws.receive_json()
+            msgs.append(m)
+            if m["type"] == "done":
+                break
+
+    assert msgs[0]["type"] == "ready"
+    finals = [m["utterance"] for m in msgs if m["type"] == "final"]
+    assert len(finals) == 2
+    assert finals[0]["speaker"] == "JONGERE"
+    assert finals[1]["speaker"] == "COACH"
+    assert active == [1, 1]  # each region ran inside a pipeline slot
+    final_msgs = [m for m in msgs if m["type"] == "final"]
+    assert final_msgs[1]["matches"][0] == {"name": "bram", "score": 0.9}
+    assert abs(finals[0]["words"][0]["start"] - (finals[0]["start"] + 0.1)) < 1e-9
+    assert finals[0]["start"] < finals[1]["start"]
+
+def test_stream_config_defaults_follow_settings(monkeypatch):
+    from app.config import settings
+    from app.schemas import StreamConfig
+
+    monkeypatch.setattr(settings, "LANGUAGE", "en")
+    monkeypatch.setattr(settings, "COACH_THRESHOLD", 0.65)
+    cfg = StreamConfig(max_speakers=3)
+    assert (cfg.language, cfg.coach_threshold, cfg.top_k) == ("en", 0.65, settings.SPEAKER_TOP_K)
+
+def test_ws_transcribe_rejects_malformed_text_frames():
+    import pytest
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+    from app.main import app
+    import app.routers.stream as stream
+
+    client = TestClient(app)
+    for frame in ("{not json", "[]"):
+        with client.websocket_connect("/ws/transcribe") as ws:
+            ws.send_text(frame)
+            with pytest.raises(WebSocketDisconnect) as exc:
+                ws.receive_json()
+            assert exc.value.code == 1003
+    assert stream._active_sessions == 0
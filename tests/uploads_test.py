@@ -0,0 +1,88 @@
+import hashlib
+import os
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+def test_upload_limit_and_hash(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.main import app
+    from app.routers import transcribe
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_MB", 1)
+    monkeypatch.setattr(settings, "UPLOAD_DIR", tmp_path)
+    seen = {}
+
+    async def fake_pipeline(data, **kw):
+        seen["path"], seen["hash"] = data, kw["audio_hash"]
+        seen["bytes"] = data.read_bytes()
+        raise transcribe.HTTPException(status_code=418)
+
+    monkeypatch.setattr(transcribe, "run_pipeline", fake_pipeline)
+    client = TestClient(app)
+
+    body = os.urandom(3 << 19)  # 1.5 MB, spans several chunks
+    r = client.post("/transcribe", files={"file": ("a.wav", body, "audio/wav")})
+    assert r.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+    body = body[: 700_000]
+    r = client.post("/transcribe", files={"file": ("a.wav", body, "audio/wav")})
+    assert r.status_code == 418
+    assert seen["bytes"] == body and seen["hash"] == hashlib.sha256(body).hexdigest()
+    assert not seen["path"].exists()  # removed once the request is done
+
+def test_upload_limit_middleware_rejects_before_parsing():
+    from fastapi import FastAPI, Request
+    from fastapi.testclient import TestClient
+    from app.services.uploads import FORM_OVERHEAD_BYTES, UploadLimitMiddleware
+
+    app = FastAPI()
+    reached = []
+
+    @app.post("/transcribe")
+    async def endpoint(request: Request):
+        reached.append(len(await request.body()))
+        return {"ok": True}
+
+    app.add_middleware(UploadLimitMiddleware, paths=("/transcribe",), max_bytes=1000)
+    client = TestClient(app)
+    limit = 1000 + FORM_OVERHEAD_BYTES
+
+    assert client.post("/transcribe", content=b"x" * (limit + 1)).status_code == 413
+    assert reached == []  # rejected on Content-Length, the app never read the body
+
+    def chunks():  # no Content-Length: counted while streaming
+        for _ in range(3):
+            yield b"x" * (limit // 2)
+
+    assert client.post("/transcribe", content=chunks()).status_code == 413
+    assert reached == []
+    assert client.post("/transcribe", content=b"x" * 500).status_code == 200
+    assert reached == [500]
+
+def test_chunked_multipart_upload_gets_413_on_real_routes(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.config import settings
+    from app.main import app
+    from app.routers import transcribe
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_MB", 1)
+    monkeypatch.setattr(settings, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(transcribe, "run_pipeline", None)  # must never be reached
+
+    boundary = "xBOUNDARYx"
+    head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.wav\"\r\n"
+            "Content-Type: audio/wav\r\n\r\n").encode()
+
+    def chunks():  # 2 MB file part without a Content-Length header
+        yield head
+        for _ in range(32):
+            yield b"\0" * (64 << 10)
+        yield f"\r\n--{boundary}--\r\n".encode()
+
+    client = TestClient(app)
+    for path in ("/transcribe", "/enroll", "/jobs"):
+        r = client.post(path, content=chunks(), headers={"content-type": f"multipart/form-data; boundary={boundary}"})
+        assert r.status_code == 413, (path, r.text)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,77 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+import webrtcvad
+
+os.environ.setdefault("OFFLINE_ONLY", "true")
+
+SR = 16000
+
+def _reference_segments(wav, sr, frame_ms, aggressiveness, min_seg_dur, merge_gap) -> List[Tuple[float, float]]:
+    """The original loop-based implementation, kept as an oracle."""
+    vad = webrtcvad.Vad(int(aggressiveness))
+    pcm = (np.clip(wav, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+    frame_bytes = int(sr * (frame_ms / 1000.0)) * 2
+    n_frames = len(pcm) // frame_bytes
+    flags = [1 if vad.is_speech(pcm[i * frame_bytes:(i + 1) * frame_bytes], sr) else 0 for i in range(n_frames)]
+    segments = []
+    i = 0
+    while i < n_frames:
+        if flags[i] == 1:
+            start_i = i
+            while i < n_frames and flags[i] == 1:
+                i += 1
+            segments.append((start_i * frame_ms / 1000.0, i * frame_ms / 1000.0))
+        else:
+            i += 1
+    merged = []
+    for s in segments:
+        if merged and s[0] - merged[-1][1] <= merge_gap:
+            merged[-1] = (merged[-1][0], s[1])
+        else:
+            merged.append(s)
+    return [(a, b) for (a, b) in merged if (b - a) >= min_seg_dur]
+
+def _synth(total_sec, seed):
+    rng = np.random.default_rng(seed)
+    wav = (0.005 * rng.standard_normal(int(total_sec * SR))).astype(np.float32)
+    t = 0.2
+    while t < total_sec - 3.5:
+        d, gap = rng.uniform(0.1, 3.0), rng.uniform(0.03, 1.2)
+        n = int(d * SR)
+        tt = np.arange(n) / SR
+        f0 = rng.uniform(90, 250)
+        x = sum(np.sin(2 * np.pi * f0 * k * tt) / k for k in range(1, 10)) * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * tt))
+        a = int(t * SR)
+        wav[a:a + n] += (0.3 * x / np.abs(x).max()).astype(np.float32)
+        t += d + gap
+    return wav
+
+def test_vectorised_vad_matches_reference():
+    from app.services.vad import detect_voiced_segments
+
+    for seed, (frame_ms, gap, min_dur) in enumerate([(30, 0.2, 0.5), (20, 0.1, 0.3), (10, 0.0, 0.0)]):
+        wav = _synth(90, seed)
+        expected = _reference_segments(wav, SR, frame_ms, 2, min_dur, gap)
+        assert len(expected) > 5
+        assert detect_voiced_segments(wav, SR, frame_ms, 2, min_dur, gap) == expected
+
+def test_int16_input_is_framed_directly():
+    from app.services.io_utils import float_to_int16
+    from app.services.vad import detect_voiced_segments
+
+    wav = _synth(30, 7)
+    assert detect_voiced_segments(float_to_int16(wav), SR) == detect_voiced_segments(wav, SR)
+
+def test_padding_and_hangover_widen_runs():
+    from app.services.vad import flags_to_segments
+
+    flags = np.zeros(100, dtype=bool)
+    flags[10:20] = True
+    flags[30:40] = True
+    assert flags_to_segments(flags, frame_ms=30, min_seg_dur=0.0, merge_gap=0.2) == [(0.3, 0.6), (0.9, 1.2)]
+    # 150 ms on each side closes the 300 ms gap
+    assert flags_to_segments(flags, frame_ms=30, min_seg_dur=0.0, merge_gap=0.0,
+                             padding_ms=150, hangover_ms=150) == [(0.15, 1.35)]
+    assert flags_to_segments(np.zeros(5, dtype=bool)) == []
@@ -218,6 +218,43 @@ async function transcribeFromRecording() {
 
 /* ---------------- Shared render logic ---------------- */
 
+function renderUtterance(u) {
+  const bubble = document.createElement("div");
+  bubble.className = "bubble";
+
+  const chip = document.createElement("span");
+  const spk = (u.speaker || "").toUpperCase();
+  chip.className = `chip ${spk === "COACH" ? "coach" : (spk === "JONGERE" ? "jongere" : "")}`;
+  chip.textContent = spk;
+
+  const metaLine = document.createElement("div");
+  metaLine.className = "meta";
+  metaLine.appendChild(chip);
+  const tspan = document.createElement("span");
+  tspan.textContent = `${fmtTime(u.start)} → ${fmtTime(u.end)} (${(u.end-u.start).toFixed(2)}s)`;
+  metaLine.appendChild(tspan);
+
+  const text = document.createElement("div");
+  text.textContent = u.text;
+
+  bubble.appendChild(metaLine);
+  bubble.appendChild(text);
+
+  if (u.words && u.words.length) {
+    const wordsDiv = document.createElement("div");
+    wordsDiv.className = "words";
+    for (const w of u.words) {
+      const wspan = document.createElement("span");
+      wspan.className = "word";
+      wspan.title = `${fmtTime(w.start)}–${fmtTime(w.end)} (${(w.end - w.start).toFixed(2)}s) • ${w.speaker}`;
+      wspan.textContent = w.w;
+      wordsDiv.appendChild(wspan);
+    }
+    bubble.appendChild(wordsDiv);
+  }
+  return bubble;
+}
+
 async function doTranscribe(formData, status, meta, chat) {
   try {
     const res = await fetch("/transcribe", { method: "POST", body: formData });
@@ -232,50 +269,119 @@ async function doTranscribe(formData, status, meta, chat) {
     `;
 
     chat.innerHTML = "";
-    for (const u of j.utterances) {
-      const bubble = document.createElement("div");
-      bubble.className = "bubble";
-
-      const chip = document.createElement("span");
-      const spk = (u.speaker || "").toUpperCase();
-      chip.className = `chip ${spk === "COACH" ? "coach" : (spk === "JONGERE" ? "jongere" : "")}`;
-      chip.textContent = spk;
-
-      const metaLine = document.createElement("div");
-      metaLine.className = "meta";
-      metaLine.appendChild(chip);
-      const tspan = document.createElement("span");
-      tspan.textContent = `${fmtTime(u.start)} → ${fmtTime(u.end)} (${(u.end-u.start).toFixed(2)}s)`;
-      metaLine.appendChild(tspan);
-
-      const text = document.createElement("div");
-      text.textContent = u.text;
-
-      bubble.appendChild(metaLine);
-      bubble.appendChild(text);
-
-      if (u.words && u.words.length) {
-        const wordsDiv = document.createElement("div");
-        wordsDiv.className = "words";
-        for (const w of u.words) {
-          const wspan = document.createElement("span");
-          wspan.className = "word";
-          wspan.title = `${fmtTime(w.start)}–${fmtTime(w.end)} (${(w.end - w.start).toFixed(2)}s) • ${w.speaker}`;
-          wspan.textContent = w.w;
-          wordsDiv.appendChild(wspan);
-        }
-        bubble.appendChild(wordsDiv);
+    for (const u of j.utterances) chat.appendChild(renderUtterance(u));
+
+    status.textContent = "Done.";
+  } catch (e) {
+    status.textContent = `Error: ${e.message}`;
+  }
+}
+
+/* ---------------- Live streaming (WebSocket) ---------------- */
+
+class LiveStreamer {
+  constructor(onMessage) {
+    this.onMessage = onMessage;
+    this.ws = null;
+    this.audioCtx = null;
+    this.stream = null;
+    this.source = null;
+    this.proc = null;
+  }
+
+  async start(config) {
+    const proto = location.protocol === "https:" ? "wss:" : "ws:";
+    this.ws = new WebSocket(`${proto}//${location.host}/ws/transcribe`);
+    this.ws.binaryType = "arraybuffer";
+    this.ws.onmessage = (ev) => this.onMessage(JSON.parse(ev.data));
+    await new Promise((resolve, reject) => {
+      this.ws.onopen = resolve;
+      this.ws.onerror = () => reject(new Error("WebSocket connection failed"));
+    });
+    this.ws.send(JSON.stringify({ type: "config", ...config }));
+
+    this.stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+    // Ask the browser to resample to 16 kHz; the server expects 16 kHz int16 PCM.
+    this.audioCtx = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: 16000 });
+    this.source = this.audioCtx.createMediaStreamSource(this.stream);
+    this.proc = this.audioCtx.createScriptProcessor(4096, 1, 1);
+    this.source.connect(this.proc);
+    this.proc.connect(this.audioCtx.destination);
+    this.proc.onaudioprocess = (e) => {
+      if (!this.ws || this.ws.readyState !== WebSocket.OPEN) return;
+      const input = e.inputBuffer.getChannelData(0);
+      const pcm = new Int16Array(input.length);
+      for (let i = 0; i < input.length; i++) {
+        const s = Math.max(-1, Math.min(1, input[i]));
+        pcm[i] = s < 0 ? s * 0x8000 : s * 0x7FFF;
       }
+      this.ws.send(pcm.buffer);
+    };
+  }
 
-      chat.appendChild(bubble);
-    }
+  async stop() {
+    if (this.proc) this.proc.disconnect();
+    if (this.source) this.source.disconnect();
+    if (this.audioCtx) await this.audioCtx.close();
+    if (this.stream) this.stream.getTracks().forEach(t => t.stop());
+    if (this.ws && this.ws.readyState === WebSocket.OPEN) this.ws.send(JSON.stringify({ type: "stop" }));
+  }
+}
 
+let live = null;
+let livePartial = null;
+
+function onLiveMessage(m) {
+  const chat = $("#chat"); const status = $("#trans-status");
+  if (m.type === "ready") {
+    status.textContent = m.coach_enrolled ? "Live (coach enrolled)" : "Live (no coach enrolled)";
+  } else if (m.type === "partial") {
+    if (!livePartial) {
+      livePartial = document.createElement("div");
+      livePartial.className = "bubble partial";
+      chat.appendChild(livePartial);
+    }
+    livePartial.textContent = `${fmtTime(m.start)} … ${m.text}`;
+  } else if (m.type === "final") {
+    if (livePartial) { livePartial.remove(); livePartial = null; }
+    chat.appendChild(renderUtterance(m.utterance));
+  } else if (m.type === "error") {
+    status.textContent = `Error: ${m.detail}`;
+  } else if (m.type === "done") {
+    if (livePartial) { livePartial.remove(); livePartial = null; }
     status.textContent = "Done.";
+    if (live && live.ws) live.ws.close();
+    live = null;
+  }
+}
+
+async function startLive() {
+  $("#chat").innerHTML = ""; $("#meta").textContent = "";
+  $("#btn-live-start").disabled = true;
+  $("#btn-live-stop").disabled = false;
+  $("#trans-status").textContent = "Connecting…";
+  live = new LiveStreamer(onLiveMessage);
+  try {
+    await live.start({
+      language: $("#language").value,
+      coach_threshold: Number($("#thr").value),
+      use_word_timestamps: $("#wordts").checked,
+      max_speakers: Number(document.getElementById("max_speakers").value),
+    });
   } catch (e) {
-    status.textContent = `Error: ${e.message}`;
+    $("#trans-status").textContent = `Error: ${e.message}`;
+    $("#btn-live-start").disabled = false;
+    $("#btn-live-stop").disabled = true;
   }
 }
 
+async function stopLive() {
+  $("#btn-live-stop").disabled = true;
+  $("#btn-live-start").disabled = false;
+  $("#trans-status").textContent = "Finishing…";
+  if (live) await live.stop();
+}
+
 /* ---------------- Wire up buttons ---------------- */
 
 $("#btn-enroll-file").addEventListener("click", enrollFromFile);
@@ -288,3 +394,6 @@ $("#btn-enroll-rec").addEventListener("click", enrollFromRecording);
 $("#btn-rec-trans").addEventListener("click", startRecTrans);
 $("#btn-stop-trans").addEventListener("click", stopRecTrans);
 $("#btn-trans-rec").addEventListener("click", transcribeFromRecording);
+
+$("#btn-live-start").addEventListener("click", startLive);
+$("#btn-live-stop").addEventListener("click", stopLive);